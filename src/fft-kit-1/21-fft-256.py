@@ -6,6 +6,8 @@ import math
 import struct
 import time
 import array
+from pyfft import radix4_fft
+import fftplan
 
 # OLED Display configuration
 SCL = Pin(2)  # SPI Clock
@@ -49,31 +51,17 @@ audio_in = I2S(
 FFT_SIZE = 512
 # FFT_SIZE = 256
 
-# Precompute the Hanning window coefficients
-hanning_window = array.array('f', [0] * FFT_SIZE)
-for i in range(FFT_SIZE):
-    hanning_window[i] = 0.5 * (1 - math.cos(2 * math.pi * i / (FFT_SIZE - 1)))
+# draw_spectrum() shows only the lowest half of the bins
+FOCUS_BINS = FFT_SIZE // 4
 
-# Precompute bit-reversal table - MicroPython compatible version
-def bit_reverse(n, bits):
-    result = 0
-    for i in range(bits):
-        result = (result << 1) | (n & 1)
-        n >>= 1
-    return result
-
-bit_reverse_table = array.array('H', [0] * FFT_SIZE)
-bits = int(math.log2(FFT_SIZE))
-for i in range(FFT_SIZE):
-    bit_reverse_table[i] = bit_reverse(i, bits)
-
-# Precompute twiddle factors (complex exponentials)
-twiddle_factors_real = array.array('f', [0] * (FFT_SIZE // 2))
-twiddle_factors_imag = array.array('f', [0] * (FFT_SIZE // 2))
-for i in range(FFT_SIZE // 2):
-    angle = -2 * math.pi * i / FFT_SIZE
-    twiddle_factors_real[i] = math.cos(angle)
-    twiddle_factors_imag[i] = math.sin(angle)
+# Window, bit reversal swap, twiddle and display bar tables come from a shared plan:
+# built once per size and only looked up if the size is used again
+plan = fftplan.get(FFT_SIZE, 'hanning', SAMPLE_RATE, 64, FOCUS_BINS)
+hanning_window = plan.win
+bit_reverse_swaps = plan.swaps
+twiddle_factors_real = plan.wr
+twiddle_factors_imag = plan.wi
+display_bins = array.array('f', [0] * 64)
 
 def capture_audio_samples():
     """Capture audio samples for FFT processing"""
@@ -110,42 +98,9 @@ def iterative_fft(real, imag):
     n = len(real)
     assert n == len(imag)
     assert n == FFT_SIZE, "FFT size must match precomputed tables"
-    
-    # Bit-reverse reordering
-    for i in range(n):
-        j = bit_reverse_table[i]
-        if i < j:
-            real[i], real[j] = real[j], real[i]
-            imag[i], imag[j] = imag[j], imag[i]
-    
-    # Cooley-Tukey iterative FFT
-    for stage in range(1, int(math.log2(n)) + 1):
-        m = 2 ** stage  # Distance between butterflies
-        m2 = m // 2     # Distance between butterfly pairs
-        
-        # Process each group of butterflies
-        for k in range(0, n, m):
-            # Process each butterfly pair
-            for j in range(m2):
-                # Get twiddle factor
-                twiddle_idx = j * (n // m)
-                wr = twiddle_factors_real[twiddle_idx]
-                wi = twiddle_factors_imag[twiddle_idx]
-                
-                # Get indices for butterfly operation
-                idx1 = k + j
-                idx2 = idx1 + m2
-                
-                # Calculate butterfly
-                tr = real[idx2] * wr - imag[idx2] * wi
-                ti = real[idx2] * wi + imag[idx2] * wr
-                
-                # Store results
-                real[idx2] = real[idx1] - tr
-                imag[idx2] = imag[idx1] - ti
-                real[idx1] = real[idx1] + tr
-                imag[idx1] = imag[idx1] + ti
-    
+    # Radix 4 kernel: fewer passes and multiplies than radix 2, first stages
+    # unrolled (plan.leaf)
+    radix4_fft(real, imag, bit_reverse_swaps, twiddle_factors_real, twiddle_factors_imag, 0, plan.leaf)
     return (real, imag)
 
 def calculate_magnitudes(real, imag):
@@ -170,13 +125,9 @@ def draw_spectrum(magnitudes):
     # Clear the display
     oled.fill(0)
     
-    # Number of frequency bins to display
-    # num_bins = 64
-    num_bins = 64
-    
-    # Focus on lower frequencies by only taking the first third of the spectrum
+    # Focus on lower frequencies by only taking the first half of the spectrum
     # This will make whistling frequencies more visible across the display
-    lower_freq_focus = len(magnitudes) // 2
+    lower_freq_focus = FOCUS_BINS
     
     # Calculate the frequency range being displayed
     # Nyquist frequency is half the sample rate
@@ -189,22 +140,8 @@ def draw_spectrum(magnitudes):
     freq_start = 0  # Hz
     freq_end = int(bin_freq_width * lower_freq_focus)  # Hz
     
-    # Combine frequency bins to fit display (use precomputed indexes)
-    display_bins = array.array('f', [0] * num_bins)
-    bin_width = lower_freq_focus // num_bins
-    
-    # Simple averaging of bins, focusing on lower frequencies
-    for i in range(num_bins):
-        start_idx = i * bin_width
-        end_idx = min((i + 1) * bin_width, lower_freq_focus)
-        if start_idx >= lower_freq_focus:
-            break
-            
-        # Fast averaging
-        bin_sum = 0
-        for j in range(start_idx, end_idx):
-            bin_sum += magnitudes[j]
-        display_bins[i] = bin_sum / (end_idx - start_idx) if end_idx > start_idx else 0
+    # Combine frequency bins to fit display (bar edges precomputed by the plan)
+    plan.group(magnitudes, display_bins)
     
     # Find maximum value for scaling (avoid division by zero)
     max_magnitude = 1
@@ -266,7 +203,7 @@ try:
     # Calculate and print frequency range information
     nyquist_freq = SAMPLE_RATE / 2
     bin_freq_width = nyquist_freq / (FFT_SIZE // 2)
-    lower_freq_focus = (FFT_SIZE // 2) // 3
+    lower_freq_focus = FOCUS_BINS
     max_freq = int(bin_freq_width * lower_freq_focus)
     
     print("Frequency resolution: {:.2f} Hz per bin".format(bin_freq_width))
@@ -6,6 +6,8 @@ import math
 import struct
 import time
 import array
+from pyfft import radix4_fft
+import fftplan
 
 # OLED Display configuration
 SCL = Pin(2)  # SPI Clock
@@ -46,32 +48,13 @@ audio_in = I2S(
 # FFT size (must be a power of 2)
 FFT_SIZE = 256  # Changed from 512 to 256
 
-# Precompute the Hanning window coefficients - make sure to use the new FFT_SIZE
-hanning_window = array.array('f', [0] * FFT_SIZE)
-for i in range(FFT_SIZE):
-    hanning_window[i] = 0.5 * (1 - math.cos(2 * math.pi * i / (FFT_SIZE - 1)))
-
-# Precompute bit-reversal table - MicroPython compatible version
-def bit_reverse(n, bits):
-    result = 0
-    for i in range(bits):
-        result = (result << 1) | (n & 1)
-        n >>= 1
-    return result
-
-# Use the correct number of bits for FFT_SIZE=256 (8 bits instead of 9 for 512)
-bits = int(math.log2(FFT_SIZE))
-bit_reverse_table = array.array('H', [0] * FFT_SIZE)
-for i in range(FFT_SIZE):
-    bit_reverse_table[i] = bit_reverse(i, bits)
-
-# Precompute twiddle factors (complex exponentials) - use the new FFT_SIZE
-twiddle_factors_real = array.array('f', [0] * (FFT_SIZE // 2))
-twiddle_factors_imag = array.array('f', [0] * (FFT_SIZE // 2))
-for i in range(FFT_SIZE // 2):
-    angle = -2 * math.pi * i / FFT_SIZE
-    twiddle_factors_real[i] = math.cos(angle)
-    twiddle_factors_imag[i] = math.sin(angle)
+# Window, bit reversal swap, twiddle and display bar tables come from a shared plan:
+# built once per size and only looked up if the size is used again
+plan = fftplan.get(FFT_SIZE, 'hanning', SAMPLE_RATE, 64)
+hanning_window = plan.win
+bit_reverse_swaps = plan.swaps
+twiddle_factors_real = plan.wr
+twiddle_factors_imag = plan.wi
 
 def capture_audio_samples():
     """Capture audio samples for FFT processing"""
@@ -108,42 +91,9 @@ def iterative_fft(real, imag):
     n = len(real)
     assert n == len(imag)
     assert n == FFT_SIZE, "FFT size must match precomputed tables"
-    
-    # Bit-reverse reordering
-    for i in range(n):
-        j = bit_reverse_table[i]
-        if i < j:
-            real[i], real[j] = real[j], real[i]
-            imag[i], imag[j] = imag[j], imag[i]
-    
-    # Cooley-Tukey iterative FFT
-    for stage in range(1, int(math.log2(n)) + 1):
-        m = 2 ** stage  # Distance between butterflies
-        m2 = m // 2     # Distance between butterfly pairs
-        
-        # Process each group of butterflies
-        for k in range(0, n, m):
-            # Process each butterfly pair
-            for j in range(m2):
-                # Get twiddle factor
-                twiddle_idx = j * (n // m)
-                wr = twiddle_factors_real[twiddle_idx]
-                wi = twiddle_factors_imag[twiddle_idx]
-                
-                # Get indices for butterfly operation
-                idx1 = k + j
-                idx2 = idx1 + m2
-                
-                # Calculate butterfly
-                tr = real[idx2] * wr - imag[idx2] * wi
-                ti = real[idx2] * wi + imag[idx2] * wr
-                
-                # Store results
-                real[idx2] = real[idx1] - tr
-                imag[idx2] = imag[idx1] - ti
-                real[idx1] = real[idx1] + tr
-                imag[idx1] = imag[idx1] + ti
-    
+    # Radix 4 kernel: fewer passes and multiplies than radix 2, first stages
+    # unrolled (plan.leaf)
+    radix4_fft(real, imag, bit_reverse_swaps, twiddle_factors_real, twiddle_factors_imag, 0, plan.leaf)
     return (real, imag)
 
 def calculate_magnitudes(real, imag):
@@ -1,40 +1,11 @@
-# Sound Spectrum Analyzer with Optimized FFT
+# Sound Spectrum Analyzer using the fastest FFT engine on this board
 # Combines INMP441 I2S microphone with SSD1306 OLED display
 from machine import I2S, Pin, SPI
 import ssd1306
 import math
-import struct
 import time
 import array
-
-# Try to import the DFT module with adjusted expectations
-print("Importing FFT modules...")
-try:
-    # Try to import the base modules
-    import dft
-    import dftclass
-    import polar
-    import window
-    
-    # Define constants if they don't exist
-    FORWARD = 1  # Forward transform
-    REVERSE = 0  # Inverse transform
-    POLAR = 3    # Polar conversion
-    DB = 7       # dB conversion
-    
-    print("FFT modules imported successfully")
-    print("Available functions:", dir(dftclass))
-    
-    # Check if DFT class exists
-    has_dft_class = hasattr(dftclass, 'DFT')
-    print(f"DFT class available: {has_dft_class}")
-    
-    if has_dft_class:
-        DFT = dftclass.DFT
-    
-except ImportError as e:
-    print(f"Could not import FFT modules: {e}")
-    # We'll implement a fallback FFT later if needed
+import fftbackend
 
 # OLED Display configuration
 SCL = Pin(2)  # SPI Clock
@@ -77,108 +48,17 @@ audio_in = I2S(
 # FFT size (must be a power of 2)
 FFT_SIZE = 256
 
-# Create a Hanning window function (for later use)
-def hanning(x, length):
-    return 0.5 - 0.5 * math.cos(2 * math.pi * x / (length - 1))
-
-# Try to initialize the DFT object
-fft_processor = None
-using_dft_class = False
-try:
-    if 'DFT' in locals():
-        print("Creating DFT instance...")
-        # Check the constructor parameters
-        import inspect
-        if hasattr(inspect, 'signature'):
-            sig = inspect.signature(DFT.__init__)
-            print(f"DFT constructor parameters: {sig.parameters}")
-        
-        # Try different parameter combinations based on inspection
-        try:
-            # Try with the standard parameters we expected
-            fft_processor = DFT(FFT_SIZE, None, hanning)
-            using_dft_class = True
-            print("DFT instance created successfully with our expected parameters")
-        except TypeError:
-            try:
-                # Try with just the length parameter
-                fft_processor = DFT(FFT_SIZE)
-                using_dft_class = True
-                print("DFT instance created with just length parameter")
-            except Exception as e:
-                print(f"Could not create DFT instance: {e}")
-except Exception as e:
-    print(f"Error while trying to create DFT instance: {e}")
-
-# Arrays for FFT input/output if we need to use a fallback
-fft_re = array.array('f', [0] * FFT_SIZE)
-fft_im = array.array('f', [0] * FFT_SIZE)
-
-# Define a simple fallback FFT implementation using the Cooley-Tukey algorithm
-def simple_fft(real, imag, inverse=False):
-    """Simple FFT implementation as fallback"""
-    n = len(real)
-    if n <= 1:
-        return
-    
-    # Bit-reverse permutation
-    j = 0
-    for i in range(1, n):
-        bit = n >> 1
-        while j & bit:
-            j ^= bit
-            bit >>= 1
-        j ^= bit
-        
-        if i < j:
-            real[i], real[j] = real[j], real[i]
-            imag[i], imag[j] = imag[j], imag[i]
-    
-    # Cooley-Tukey FFT
-    step = 2
-    while step <= n:
-        half_step = step // 2
-        angle_step = (-2 if inverse else 2) * math.pi / step
-        
-        for m in range(0, n, step):
-            for k in range(half_step):
-                angle = k * angle_step
-                cos_val = math.cos(angle)
-                sin_val = math.sin(angle)
-                
-                a_re = real[m + k]
-                a_im = imag[m + k]
-                b_re = real[m + k + half_step]
-                b_im = imag[m + k + half_step]
-                
-                t_re = b_re * cos_val - b_im * sin_val
-                t_im = b_re * sin_val + b_im * cos_val
-                
-                real[m + k] = a_re + t_re
-                imag[m + k] = a_im + t_im
-                real[m + k + half_step] = a_re - t_re
-                imag[m + k + half_step] = a_im - t_im
-        
-        step *= 2
-    
-    # Scale if inverse
-    if inverse:
-        for i in range(n):
-            real[i] /= n
-            imag[i] /= n
-
-# Convert to polar coordinates
-def to_polar(real, imag):
-    """Convert complex values to polar (magnitude, phase)"""
-    n = len(real)
-    for i in range(n):
-        magnitude = math.sqrt(real[i]*real[i] + imag[i]*imag[i])
-        phase = math.atan2(imag[i], real[i])
-        real[i] = magnitude
-        imag[i] = phase
+# Select the FFT engine: assembler, viper fixed point, native or Python.
+# The first run on a board benchmarks them (a few seconds) and saves the choice.
+# A Hanning window by name lets the assembler engine apply it to the spectrum.
+print("Selecting FFT engine...")
+engine = fftbackend.select(FFT_SIZE, 'hanning')
+print(f"Using {engine.name} FFT engine")
+magnitudes = None
+mag_scale = 1.0
 
 # Raw audio buffer for incoming samples
-raw_samples = bytearray(FFT_SIZE * 4)  # 32-bit samples = 4 bytes each
+raw_samples = array.array('i', [0] * FFT_SIZE)  # 32-bit samples
 
 def capture_audio_samples():
     """Capture audio samples and populate the FFT input arrays"""
@@ -190,29 +70,12 @@ def capture_audio_samples():
             print("No data received from microphone")
             return False
         
-        # Process raw samples
-        samples_count = num_bytes_read // 4
-        format_str = "<{}i".format(samples_count)
-        samples = struct.unpack(format_str, raw_samples[:num_bytes_read])
+        # Zero-pad if we didn't fill the array
+        for i in range(num_bytes_read // 4, FFT_SIZE):
+            raw_samples[i] = 0
         
-        # Populate the real array, zero the imaginary array
-        sample_count = min(len(samples), FFT_SIZE)
-        for i in range(sample_count):
-            # Need to shift right by 8 bits for INMP441 (24-bit samples in 32-bit words)
-            if using_dft_class:
-                fft_processor.re[i] = samples[i] >> 8
-            else:
-                # Apply Hanning window directly
-                fft_re[i] = (samples[i] >> 8) * hanning(i, FFT_SIZE)
-                fft_im[i] = 0.0
-        
-        # If we didn't fill the array, zero the rest
-        for i in range(sample_count, FFT_SIZE):
-            if using_dft_class:
-                fft_processor.re[i] = 0
-            else:
-                fft_re[i] = 0
-                fft_im[i] = 0
+        # The engine shifts the 24-bit samples down and applies the window
+        engine.load(raw_samples)
         
         return True
     except Exception as e:
@@ -220,17 +83,13 @@ def capture_audio_samples():
         return False
 
 def process_fft():
-    """Process the FFT with appropriate implementation"""
+    """Process the FFT with the selected engine"""
+    global magnitudes, mag_scale
     try:
-        if using_dft_class:
-            # Run the FFT with polar conversion using the DFT class
-            fft_processor.run(POLAR)
-            return True
-        else:
-            # Use our fallback FFT implementation
-            simple_fft(fft_re, fft_im)
-            to_polar(fft_re, fft_im)
-            return True
+        # First FFT_SIZE // 2 elements are magnitudes
+        magnitudes = engine.run()
+        mag_scale = engine.scale
+        return True
     except Exception as e:
         print(f"Error in process_fft: {e}")
         return False
@@ -261,11 +120,8 @@ def draw_spectrum():
             # Fast averaging
             bin_sum = 0
             for j in range(start_idx, end_idx):
-                if using_dft_class:
-                    bin_sum += fft_processor.re[j]  # Magnitudes are in the real array after POLAR transform
-                else:
-                    bin_sum += fft_re[j]  # Magnitudes are in fft_re after to_polar
-            display_bins[i] = bin_sum / (end_idx - start_idx) if end_idx > start_idx else 0
+                bin_sum += magnitudes[j]
+            display_bins[i] = bin_sum * mag_scale / (end_idx - start_idx) if end_idx > start_idx else 0
         
         # Find maximum value for scaling (avoid division by zero)
         max_magnitude = 1.0
@@ -285,7 +141,7 @@ def draw_spectrum():
         max_idx = 0
         max_val = 0
         for i in range(FFT_SIZE // 2):
-            curr_val = fft_processor.re[i] if using_dft_class else fft_re[i]
+            curr_val = magnitudes[i]
             if curr_val > max_val:
                 max_val = curr_val
                 max_idx = i
@@ -340,10 +196,7 @@ try:
     # Welcome message on OLED
     oled.fill(0)
     oled.text("FFT Analyzer", 0, 0, 1)
-    if using_dft_class:
-        oled.text("Using DFT lib", 0, 10, 1)
-    else:
-        oled.text("Using fallback", 0, 10, 1)
+    oled.text(f"Using {engine.name} FFT", 0, 10, 1)
     oled.text("Starting...", 0, 20, 1)
     oled.show()
     time.sleep(1)
@@ -354,7 +207,7 @@ try:
     max_freq = int(bin_freq_width * (FFT_SIZE // 2))
     
     print("\nAnalyzer configuration:")
-    print(f"- Using DFT class: {using_dft_class}")
+    print(f"- FFT engine: {engine.name}")
     print(f"- Frequency resolution: {bin_freq_width:.2f} Hz per bin")
     print(f"- Display frequency range: 0 Hz to {max_freq} Hz")
     print(f"- FFT size: {FFT_SIZE}")
@@ -1,19 +1,12 @@
-# Sound Spectrum Analyzer with direct use of assembler FFT
+# Sound Spectrum Analyzer using the fastest FFT engine on this board
 # Combines INMP441 I2S microphone with SSD1306 OLED display
 from machine import I2S, Pin, SPI
 import ssd1306
 import math
-import struct
 import time
 import array
 
-print("Importing FFT modules...")
-try:
-    # Try to import the direct assembler FFT function
-    import dft
-    print("FFT module imported successfully")
-except ImportError as e:
-    print(f"Could not import FFT module: {e}")
+import fftbackend
 
 # OLED Display configuration
 SCL = Pin(2)  # SPI Clock
@@ -56,91 +49,17 @@ audio_in = I2S(
 # FFT size (must be a power of 2)
 FFT_SIZE = 256
 
-# Create a Hanning window function
-def hanning(x, length):
-    return 0.5 - 0.5 * math.cos(2 * math.pi * x / (length - 1))
-
-# Check if we have the direct FFT assembler function
-have_asm_fft = hasattr(dft, 'fft')
-
-# Create the control structure for the FFT assembler function
-if have_asm_fft:
-    print("Setting up direct assembler FFT...")
-    try:
-        # Create arrays for real and imaginary data
-        fft_re = array.array('f', [0] * FFT_SIZE)
-        fft_im = array.array('f', [0] * FFT_SIZE)
-        
-        # Calculate bits for FFT size
-        bits = int(math.log2(FFT_SIZE))
-        
-        # Create control array
-        # ctrl[0] = length of data array
-        # ctrl[1] = no. of bits to represent the length
-        # ctrl[2] = Address of real data array
-        # ctrl[3] = Address of imaginary data array
-        # ctrl[4] = Byte Offset into entry 0 of complex roots of unity
-        # ctrl[5] = Address of scratchpad for use by fft code
-        from uctypes import addressof
-        ctrl = array.array('i', [0] * 6)
-        ctrl[0] = FFT_SIZE
-        ctrl[1] = bits
-        ctrl[2] = addressof(fft_re)
-        ctrl[3] = addressof(fft_im)
-        
-        # Create complex scratchpad and roots of unity
-        COMPLEX_NOS = 7
-        ROOTSOFFSET = COMPLEX_NOS * 2
-        cmplx = array.array('f', [0.0] * ((bits + 1 + COMPLEX_NOS) * 2))
-        ctrl[4] = COMPLEX_NOS * 8  # Byte offset
-        ctrl[5] = addressof(cmplx)
-        
-        # Initialize u value
-        cmplx[0] = 1.0
-        cmplx[1] = 0.0
-        
-        # Add scaling factor
-        cmplx[12] = 1.0 / FFT_SIZE
-        cmplx[13] = 0.0
-        
-        # Calculate roots of unity
-        i = ROOTSOFFSET
-        creal = -1
-        cimag = 0
-        cmplx[i] = creal
-        cmplx[i + 1] = cimag
-        i += 2
-        
-        for x in range(bits):
-            cimag = math.sqrt((1.0 - creal) / 2.0)
-            creal = math.sqrt((1.0 + creal) / 2.0)
-            cmplx[i] = creal
-            cmplx[i + 1] = cimag
-            i += 2
-        
-        print("Direct assembler FFT setup successful")
-        using_asm_fft = True
-    except Exception as e:
-        print(f"Error setting up direct assembler FFT: {e}")
-        have_asm_fft = False
-        using_asm_fft = False
-
-# Define FFT constants
-FORWARD = 1  # Forward transform
-REVERSE = 0  # Inverse transform
-
-# Convert to polar coordinates
-def to_polar(real, imag):
-    """Convert complex values to polar (magnitude, phase)"""
-    n = len(real)
-    for i in range(n):
-        magnitude = math.sqrt(real[i]*real[i] + imag[i]*imag[i])
-        phase = math.atan2(imag[i], real[i])
-        real[i] = magnitude
-        imag[i] = phase
+# Select the FFT engine: assembler, viper fixed point, native or Python.
+# The first run on a board benchmarks them (a few seconds) and saves the choice.
+# A Hanning window by name lets the assembler engine apply it to the spectrum.
+print("Selecting FFT engine...")
+engine = fftbackend.select(FFT_SIZE, 'hanning')
+print(f"Using {engine.name} FFT engine")
+magnitudes = None
+mag_scale = 1.0
 
 # Raw audio buffer for incoming samples
-raw_samples = bytearray(FFT_SIZE * 4)  # 32-bit samples = 4 bytes each
+raw_samples = array.array('i', [0] * FFT_SIZE)  # 32-bit samples
 
 # Performance monitoring variables
 total_capture_time = 0
@@ -161,25 +80,12 @@ def capture_audio_samples():
         if num_bytes_read == 0:
             return False
         
-        # Process raw samples
-        samples_count = num_bytes_read // 4
-        format_str = "<{}i".format(samples_count)
-        samples = struct.unpack(format_str, raw_samples[:num_bytes_read])
-        
-        # Clear arrays
-        for i in range(FFT_SIZE):
-            fft_im[i] = 0.0
-        
-        # Populate the real array, apply windowing
-        sample_count = min(len(samples), FFT_SIZE)
-        for i in range(sample_count):
-            # Need to shift right by 8 bits for INMP441 (24-bit samples in 32-bit words)
-            # Apply Hanning window
-            fft_re[i] = (samples[i] >> 8) * hanning(i, FFT_SIZE)
-        
         # Zero-pad if we didn't fill the array
-        for i in range(sample_count, FFT_SIZE):
-            fft_re[i] = 0.0
+        for i in range(num_bytes_read // 4, FFT_SIZE):
+            raw_samples[i] = 0
+        
+        # The engine shifts the 24-bit samples down and applies the window
+        engine.load(raw_samples)
             
         # Update timing statistics
         elapsed = time.ticks_diff(time.ticks_us(), start_time)
@@ -191,17 +97,15 @@ def capture_audio_samples():
         return False
 
 def process_fft():
-    """Process the FFT with appropriate implementation"""
-    global total_fft_time
+    """Process the FFT with the selected engine"""
+    global total_fft_time, magnitudes, mag_scale
     
     try:
         start_time = time.ticks_us()
         
-        # Run the FFT with the assembler function
-        dft.fft(ctrl, FORWARD)
-        
-        # Convert to polar manually
-        to_polar(fft_re, fft_im)
+        # First FFT_SIZE // 2 elements are magnitudes
+        magnitudes = engine.run()
+        mag_scale = engine.scale
         
         # Update timing statistics
         elapsed = time.ticks_diff(time.ticks_us(), start_time)
@@ -242,8 +146,8 @@ def draw_spectrum():
             # Fast averaging
             bin_sum = 0
             for j in range(start_idx, end_idx):
-                bin_sum += fft_re[j]  # Magnitudes are in the real array after polar conversion
-            display_bins[i] = bin_sum / (end_idx - start_idx) if end_idx > start_idx else 0
+                bin_sum += magnitudes[j]
+            display_bins[i] = bin_sum * mag_scale / (end_idx - start_idx) if end_idx > start_idx else 0
         
         # Find maximum value for scaling (avoid division by zero)
         max_magnitude = 1.0
@@ -263,8 +167,8 @@ def draw_spectrum():
         max_idx = 0
         max_val = 0
         for i in range(FFT_SIZE // 2):
-            if fft_re[i] > max_val:
-                max_val = fft_re[i]
+            if magnitudes[i] > max_val:
+                max_val = magnitudes[i]
                 max_idx = i
         
         # Calculate the peak frequency in Hz
@@ -322,7 +226,7 @@ try:
     # Welcome message on OLED
     oled.fill(0)
     oled.text("FFT Analyzer", 0, 0, 1)
-    oled.text("Using ASM FFT", 0, 10, 1)
+    oled.text(f"Using {engine.name} FFT", 0, 10, 1)
     oled.text("Starting...", 0, 20, 1)
     oled.show()
     time.sleep(1)
@@ -333,7 +237,7 @@ try:
     max_freq = int(bin_freq_width * (FFT_SIZE // 2))
     
     print("\nAnalyzer configuration:")
-    print(f"- Using assembler FFT: {using_asm_fft}")
+    print(f"- FFT engine: {engine.name}")
     print(f"- Frequency resolution: {bin_freq_width:.2f} Hz per bin")
     print(f"- Display frequency range: 0 Hz to {max_freq} Hz")
     print(f"- FFT size: {FFT_SIZE}")
@@ -146,6 +146,27 @@ def fft_asm(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
     pop({r2, r3})
     bx(lr)              # ! CONJUGATE
 
+    # Load u from the twiddle table (see lib/dft.py), conjugated if forward
+    label(TWIDDLE)
+    push({r0, r1, r2})
+    mov(r1, r11)        # Address of table entry
+    vldr(s14, [r1, 0])  # cos
+    vldr(s15, [r1, 4])  # sin
+    mov(r2, r10)        # Control
+    mov(r0, 1)
+    tst(r2, r0)
+    it(ne)
+    vneg(s15, s15)      # Conjugate if forward
+    mov(r0, r8)
+    ldr(r0, [r0, 20])   # &complex_scratchpad
+    vstr(s14, [r0, 8])  # u
+    vstr(s15, [r0, 12])
+    mov(r0, r12)        # Stride
+    add(r1, r1, r0)
+    mov(r11, r1)        # Next entry
+    pop({r0, r1, r2})
+    bx(lr)              # ! TWIDDLE
+
     # Main calculation enter with r2 = i r5 = l1
     label(DOMATHS)
     push({lr, r1, r2, r3, r4})
@@ -251,9 +272,17 @@ def fft_asm(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
 
     # Main FFT entry point
     label(ENTRY)
-    push({r8, r9, r10})
+    push({r8, r9, r10, r11, r12})
     mov(r8, r0)         # r8 address of scratch
     mov(r10, r1)        # control (forward = 1)
+    mov(r2, 0)          # No twiddle table
+    mov(r3, 8)          # bit 3: twiddle table
+    tst(r1, r3)
+    beq(NOTABLE)
+    ldr(r2, [r0, 28])   # Stride for 2 point stage
+    add(r2, r2, r2)     # Halved at the start of each stage
+    label(NOTABLE)
+    mov(r12, r2)
     bl(ARRAY_REVERSE)   # Reverse data arrays
 
     mov(r0, r8)
@@ -264,10 +293,17 @@ def fft_asm(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
 
     label(OUTER)
     push({r1, r2})
+    mov(r0, r12)        # Twiddle table stride for this stage
+    lsr(r0, r0, 1)
+    mov(r12, r0)
+    mov(r0, r8)
+    ldr(r0, [r0, 24])
+    mov(r11, r0)        # Table entry for j = 0
     mov(r4, r9)
     mov(r5, r4)         # r5 = l1
     add(r4, r4, r4)     # l2 <<= 1
     mov(r9, r4)         # Save l2
+    push({r2})
 
     mov(r0, r8)
     ldr(r0, [r0, 20])   # &complex_scratchpad
@@ -300,6 +336,10 @@ def fft_asm(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
 
     label(INNER1)
     push({r1, r2})
+    mov(r0, r12)
+    cmp(r0, 0)
+    it(ne)
+    bl(TWIDDLE)         # u = table[j*stride]
 
     mov(r0, r8)
     ldr(r1, [r0, 0])    # r1 = length, r2 (i) = j
@@ -311,12 +351,16 @@ def fft_asm(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
     cmp(r2, r1)
     blt(INNER2)
 
+    mov(r0, r12)
+    cmp(r0, 0)
+    bne(NEXTJ)          # Table lookup replaces u*c
     mov(r0, r8)
     ldr(r0, [r0, 20])   # &complex_scratchpad
     mov(r1, 8)          # u
     mov(r2, r1)
     mov(r3, 16)         # c
     bl(CMUL)            # u = (u*c)
+    label(NEXTJ)
     pop({r1, r2})
     add(r2, 1)
     cmp(r2, r1)
@@ -353,8 +397,7 @@ def fft_asm(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
     add(r2, 4)
     sub(r4, 1)
     cmp(r4, 0)
-    bge(SCALE01)
+    bgt(SCALE01)
 
     label(DFTDONE)
-    pop({r8, r9, r10})
-    bx(lr) 
\ No newline at end of file
+    pop({r8, r9, r10, r11, r12}) 
\ No newline at end of file
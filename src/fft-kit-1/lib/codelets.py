@@ -0,0 +1,855 @@
+# codelets.py Unrolled leaf FFTs for pyfft.radix4_fft()
+# GENERATED by tools/gencodelets.py: do not edit.
+# leafL(real, imag, n) performs the first log2(L) stages of a length n FFT whose
+# input has been bit reversed, on each block of L elements, and returns L.
+# leaves: (L, function) largest first. See fftplan.FFTPlan.leaf.
+
+try:
+    import micropython
+except ImportError:             # CPython: the decorator has no effect
+    class micropython:
+        native = staticmethod(lambda f: f)
+
+@micropython.native
+def leaf8(real, imag, n):
+    C8 = 0.707106781
+    for b in range(0, n, 8):
+        a0r = real[b]
+        a0i = imag[b]
+        a1r = real[b + 1]
+        a1i = imag[b + 1]
+        a2r = real[b + 2]
+        a2i = imag[b + 2]
+        a3r = real[b + 3]
+        a3i = imag[b + 3]
+        a4r = real[b + 4]
+        a4i = imag[b + 4]
+        a5r = real[b + 5]
+        a5i = imag[b + 5]
+        a6r = real[b + 6]
+        a6i = imag[b + 6]
+        a7r = real[b + 7]
+        a7i = imag[b + 7]
+        # Stage 1: 2 point butterflies
+        b0r = a0r + a1r
+        b0i = a0i + a1i
+        b1r = a0r - a1r
+        b1i = a0i - a1i
+        b2r = a2r + a3r
+        b2i = a2i + a3i
+        b3r = a2r - a3r
+        b3i = a2i - a3i
+        b4r = a4r + a5r
+        b4i = a4i + a5i
+        b5r = a4r - a5r
+        b5i = a4i - a5i
+        b6r = a6r + a7r
+        b6i = a6i + a7i
+        b7r = a6r - a7r
+        b7i = a6i - a7i
+        # Stage 2: 4 point butterflies
+        a0r = b0r + b2r
+        a0i = b0i + b2i
+        a2r = b0r - b2r
+        a2i = b0i - b2i
+        a1r = b1r + b3i
+        a1i = b1i - b3r
+        a3r = b1r - b3i
+        a3i = b1i + b3r
+        a4r = b4r + b6r
+        a4i = b4i + b6i
+        a6r = b4r - b6r
+        a6i = b4i - b6i
+        a5r = b5r + b7i
+        a5i = b5i - b7r
+        a7r = b5r - b7i
+        a7i = b5i + b7r
+        # Stage 3: 8 point butterflies
+        b0r = a0r + a4r
+        b0i = a0i + a4i
+        b4r = a0r - a4r
+        b4i = a0i - a4i
+        tr = (a5r + a5i)*C8
+        ti = (a5i - a5r)*C8
+        b1r = a1r + tr
+        b1i = a1i + ti
+        b5r = a1r - tr
+        b5i = a1i - ti
+        b2r = a2r + a6i
+        b2i = a2i - a6r
+        b6r = a2r - a6i
+        b6i = a2i + a6r
+        tr = (a7i - a7r)*C8
+        ti = -(a7r + a7i)*C8
+        b3r = a3r + tr
+        b3i = a3i + ti
+        b7r = a3r - tr
+        b7i = a3i - ti
+        real[b] = b0r
+        imag[b] = b0i
+        real[b + 1] = b1r
+        imag[b + 1] = b1i
+        real[b + 2] = b2r
+        imag[b + 2] = b2i
+        real[b + 3] = b3r
+        imag[b + 3] = b3i
+        real[b + 4] = b4r
+        imag[b + 4] = b4i
+        real[b + 5] = b5r
+        imag[b + 5] = b5i
+        real[b + 6] = b6r
+        imag[b + 6] = b6i
+        real[b + 7] = b7r
+        imag[b + 7] = b7i
+    return 8
+
+@micropython.native
+def leaf16(real, imag, n):
+    C8 = 0.707106781
+    for b in range(0, n, 16):
+        a0r = real[b]
+        a0i = imag[b]
+        a1r = real[b + 1]
+        a1i = imag[b + 1]
+        a2r = real[b + 2]
+        a2i = imag[b + 2]
+        a3r = real[b + 3]
+        a3i = imag[b + 3]
+        a4r = real[b + 4]
+        a4i = imag[b + 4]
+        a5r = real[b + 5]
+        a5i = imag[b + 5]
+        a6r = real[b + 6]
+        a6i = imag[b + 6]
+        a7r = real[b + 7]
+        a7i = imag[b + 7]
+        a8r = real[b + 8]
+        a8i = imag[b + 8]
+        a9r = real[b + 9]
+        a9i = imag[b + 9]
+        a10r = real[b + 10]
+        a10i = imag[b + 10]
+        a11r = real[b + 11]
+        a11i = imag[b + 11]
+        a12r = real[b + 12]
+        a12i = imag[b + 12]
+        a13r = real[b + 13]
+        a13i = imag[b + 13]
+        a14r = real[b + 14]
+        a14i = imag[b + 14]
+        a15r = real[b + 15]
+        a15i = imag[b + 15]
+        # Stage 1: 2 point butterflies
+        b0r = a0r + a1r
+        b0i = a0i + a1i
+        b1r = a0r - a1r
+        b1i = a0i - a1i
+        b2r = a2r + a3r
+        b2i = a2i + a3i
+        b3r = a2r - a3r
+        b3i = a2i - a3i
+        b4r = a4r + a5r
+        b4i = a4i + a5i
+        b5r = a4r - a5r
+        b5i = a4i - a5i
+        b6r = a6r + a7r
+        b6i = a6i + a7i
+        b7r = a6r - a7r
+        b7i = a6i - a7i
+        b8r = a8r + a9r
+        b8i = a8i + a9i
+        b9r = a8r - a9r
+        b9i = a8i - a9i
+        b10r = a10r + a11r
+        b10i = a10i + a11i
+        b11r = a10r - a11r
+        b11i = a10i - a11i
+        b12r = a12r + a13r
+        b12i = a12i + a13i
+        b13r = a12r - a13r
+        b13i = a12i - a13i
+        b14r = a14r + a15r
+        b14i = a14i + a15i
+        b15r = a14r - a15r
+        b15i = a14i - a15i
+        # Stage 2: 4 point butterflies
+        a0r = b0r + b2r
+        a0i = b0i + b2i
+        a2r = b0r - b2r
+        a2i = b0i - b2i
+        a1r = b1r + b3i
+        a1i = b1i - b3r
+        a3r = b1r - b3i
+        a3i = b1i + b3r
+        a4r = b4r + b6r
+        a4i = b4i + b6i
+        a6r = b4r - b6r
+        a6i = b4i - b6i
+        a5r = b5r + b7i
+        a5i = b5i - b7r
+        a7r = b5r - b7i
+        a7i = b5i + b7r
+        a8r = b8r + b10r
+        a8i = b8i + b10i
+        a10r = b8r - b10r
+        a10i = b8i - b10i
+        a9r = b9r + b11i
+        a9i = b9i - b11r
+        a11r = b9r - b11i
+        a11i = b9i + b11r
+        a12r = b12r + b14r
+        a12i = b12i + b14i
+        a14r = b12r - b14r
+        a14i = b12i - b14i
+        a13r = b13r + b15i
+        a13i = b13i - b15r
+        a15r = b13r - b15i
+        a15i = b13i + b15r
+        # Stage 3: 8 point butterflies
+        b0r = a0r + a4r
+        b0i = a0i + a4i
+        b4r = a0r - a4r
+        b4i = a0i - a4i
+        tr = (a5r + a5i)*C8
+        ti = (a5i - a5r)*C8
+        b1r = a1r + tr
+        b1i = a1i + ti
+        b5r = a1r - tr
+        b5i = a1i - ti
+        b2r = a2r + a6i
+        b2i = a2i - a6r
+        b6r = a2r - a6i
+        b6i = a2i + a6r
+        tr = (a7i - a7r)*C8
+        ti = -(a7r + a7i)*C8
+        b3r = a3r + tr
+        b3i = a3i + ti
+        b7r = a3r - tr
+        b7i = a3i - ti
+        b8r = a8r + a12r
+        b8i = a8i + a12i
+        b12r = a8r - a12r
+        b12i = a8i - a12i
+        tr = (a13r + a13i)*C8
+        ti = (a13i - a13r)*C8
+        b9r = a9r + tr
+        b9i = a9i + ti
+        b13r = a9r - tr
+        b13i = a9i - ti
+        b10r = a10r + a14i
+        b10i = a10i - a14r
+        b14r = a10r - a14i
+        b14i = a10i + a14r
+        tr = (a15i - a15r)*C8
+        ti = -(a15r + a15i)*C8
+        b11r = a11r + tr
+        b11i = a11i + ti
+        b15r = a11r - tr
+        b15i = a11i - ti
+        # Stage 4: 16 point butterflies
+        a0r = b0r + b8r
+        a0i = b0i + b8i
+        a8r = b0r - b8r
+        a8i = b0i - b8i
+        tr = b9r*0.923879533 - b9i*-0.382683432
+        ti = b9r*-0.382683432 + b9i*0.923879533
+        a1r = b1r + tr
+        a1i = b1i + ti
+        a9r = b1r - tr
+        a9i = b1i - ti
+        tr = (b10r + b10i)*C8
+        ti = (b10i - b10r)*C8
+        a2r = b2r + tr
+        a2i = b2i + ti
+        a10r = b2r - tr
+        a10i = b2i - ti
+        tr = b11r*0.382683432 - b11i*-0.923879533
+        ti = b11r*-0.923879533 + b11i*0.382683432
+        a3r = b3r + tr
+        a3i = b3i + ti
+        a11r = b3r - tr
+        a11i = b3i - ti
+        a4r = b4r + b12i
+        a4i = b4i - b12r
+        a12r = b4r - b12i
+        a12i = b4i + b12r
+        tr = b13r*-0.382683432 - b13i*-0.923879533
+        ti = b13r*-0.923879533 + b13i*-0.382683432
+        a5r = b5r + tr
+        a5i = b5i + ti
+        a13r = b5r - tr
+        a13i = b5i - ti
+        tr = (b14i - b14r)*C8
+        ti = -(b14r + b14i)*C8
+        a6r = b6r + tr
+        a6i = b6i + ti
+        a14r = b6r - tr
+        a14i = b6i - ti
+        tr = b15r*-0.923879533 - b15i*-0.382683432
+        ti = b15r*-0.382683432 + b15i*-0.923879533
+        a7r = b7r + tr
+        a7i = b7i + ti
+        a15r = b7r - tr
+        a15i = b7i - ti
+        real[b] = a0r
+        imag[b] = a0i
+        real[b + 1] = a1r
+        imag[b + 1] = a1i
+        real[b + 2] = a2r
+        imag[b + 2] = a2i
+        real[b + 3] = a3r
+        imag[b + 3] = a3i
+        real[b + 4] = a4r
+        imag[b + 4] = a4i
+        real[b + 5] = a5r
+        imag[b + 5] = a5i
+        real[b + 6] = a6r
+        imag[b + 6] = a6i
+        real[b + 7] = a7r
+        imag[b + 7] = a7i
+        real[b + 8] = a8r
+        imag[b + 8] = a8i
+        real[b + 9] = a9r
+        imag[b + 9] = a9i
+        real[b + 10] = a10r
+        imag[b + 10] = a10i
+        real[b + 11] = a11r
+        imag[b + 11] = a11i
+        real[b + 12] = a12r
+        imag[b + 12] = a12i
+        real[b + 13] = a13r
+        imag[b + 13] = a13i
+        real[b + 14] = a14r
+        imag[b + 14] = a14i
+        real[b + 15] = a15r
+        imag[b + 15] = a15i
+    return 16
+
+@micropython.native
+def leaf32(real, imag, n):
+    C8 = 0.707106781
+    for b in range(0, n, 32):
+        a0r = real[b]
+        a0i = imag[b]
+        a1r = real[b + 1]
+        a1i = imag[b + 1]
+        a2r = real[b + 2]
+        a2i = imag[b + 2]
+        a3r = real[b + 3]
+        a3i = imag[b + 3]
+        a4r = real[b + 4]
+        a4i = imag[b + 4]
+        a5r = real[b + 5]
+        a5i = imag[b + 5]
+        a6r = real[b + 6]
+        a6i = imag[b + 6]
+        a7r = real[b + 7]
+        a7i = imag[b + 7]
+        a8r = real[b + 8]
+        a8i = imag[b + 8]
+        a9r = real[b + 9]
+        a9i = imag[b + 9]
+        a10r = real[b + 10]
+        a10i = imag[b + 10]
+        a11r = real[b + 11]
+        a11i = imag[b + 11]
+        a12r = real[b + 12]
+        a12i = imag[b + 12]
+        a13r = real[b + 13]
+        a13i = imag[b + 13]
+        a14r = real[b + 14]
+        a14i = imag[b + 14]
+        a15r = real[b + 15]
+        a15i = imag[b + 15]
+        a16r = real[b + 16]
+        a16i = imag[b + 16]
+        a17r = real[b + 17]
+        a17i = imag[b + 17]
+        a18r = real[b + 18]
+        a18i = imag[b + 18]
+        a19r = real[b + 19]
+        a19i = imag[b + 19]
+        a20r = real[b + 20]
+        a20i = imag[b + 20]
+        a21r = real[b + 21]
+        a21i = imag[b + 21]
+        a22r = real[b + 22]
+        a22i = imag[b + 22]
+        a23r = real[b + 23]
+        a23i = imag[b + 23]
+        a24r = real[b + 24]
+        a24i = imag[b + 24]
+        a25r = real[b + 25]
+        a25i = imag[b + 25]
+        a26r = real[b + 26]
+        a26i = imag[b + 26]
+        a27r = real[b + 27]
+        a27i = imag[b + 27]
+        a28r = real[b + 28]
+        a28i = imag[b + 28]
+        a29r = real[b + 29]
+        a29i = imag[b + 29]
+        a30r = real[b + 30]
+        a30i = imag[b + 30]
+        a31r = real[b + 31]
+        a31i = imag[b + 31]
+        # Stage 1: 2 point butterflies
+        b0r = a0r + a1r
+        b0i = a0i + a1i
+        b1r = a0r - a1r
+        b1i = a0i - a1i
+        b2r = a2r + a3r
+        b2i = a2i + a3i
+        b3r = a2r - a3r
+        b3i = a2i - a3i
+        b4r = a4r + a5r
+        b4i = a4i + a5i
+        b5r = a4r - a5r
+        b5i = a4i - a5i
+        b6r = a6r + a7r
+        b6i = a6i + a7i
+        b7r = a6r - a7r
+        b7i = a6i - a7i
+        b8r = a8r + a9r
+        b8i = a8i + a9i
+        b9r = a8r - a9r
+        b9i = a8i - a9i
+        b10r = a10r + a11r
+        b10i = a10i + a11i
+        b11r = a10r - a11r
+        b11i = a10i - a11i
+        b12r = a12r + a13r
+        b12i = a12i + a13i
+        b13r = a12r - a13r
+        b13i = a12i - a13i
+        b14r = a14r + a15r
+        b14i = a14i + a15i
+        b15r = a14r - a15r
+        b15i = a14i - a15i
+        b16r = a16r + a17r
+        b16i = a16i + a17i
+        b17r = a16r - a17r
+        b17i = a16i - a17i
+        b18r = a18r + a19r
+        b18i = a18i + a19i
+        b19r = a18r - a19r
+        b19i = a18i - a19i
+        b20r = a20r + a21r
+        b20i = a20i + a21i
+        b21r = a20r - a21r
+        b21i = a20i - a21i
+        b22r = a22r + a23r
+        b22i = a22i + a23i
+        b23r = a22r - a23r
+        b23i = a22i - a23i
+        b24r = a24r + a25r
+        b24i = a24i + a25i
+        b25r = a24r - a25r
+        b25i = a24i - a25i
+        b26r = a26r + a27r
+        b26i = a26i + a27i
+        b27r = a26r - a27r
+        b27i = a26i - a27i
+        b28r = a28r + a29r
+        b28i = a28i + a29i
+        b29r = a28r - a29r
+        b29i = a28i - a29i
+        b30r = a30r + a31r
+        b30i = a30i + a31i
+        b31r = a30r - a31r
+        b31i = a30i - a31i
+        # Stage 2: 4 point butterflies
+        a0r = b0r + b2r
+        a0i = b0i + b2i
+        a2r = b0r - b2r
+        a2i = b0i - b2i
+        a1r = b1r + b3i
+        a1i = b1i - b3r
+        a3r = b1r - b3i
+        a3i = b1i + b3r
+        a4r = b4r + b6r
+        a4i = b4i + b6i
+        a6r = b4r - b6r
+        a6i = b4i - b6i
+        a5r = b5r + b7i
+        a5i = b5i - b7r
+        a7r = b5r - b7i
+        a7i = b5i + b7r
+        a8r = b8r + b10r
+        a8i = b8i + b10i
+        a10r = b8r - b10r
+        a10i = b8i - b10i
+        a9r = b9r + b11i
+        a9i = b9i - b11r
+        a11r = b9r - b11i
+        a11i = b9i + b11r
+        a12r = b12r + b14r
+        a12i = b12i + b14i
+        a14r = b12r - b14r
+        a14i = b12i - b14i
+        a13r = b13r + b15i
+        a13i = b13i - b15r
+        a15r = b13r - b15i
+        a15i = b13i + b15r
+        a16r = b16r + b18r
+        a16i = b16i + b18i
+        a18r = b16r - b18r
+        a18i = b16i - b18i
+        a17r = b17r + b19i
+        a17i = b17i - b19r
+        a19r = b17r - b19i
+        a19i = b17i + b19r
+        a20r = b20r + b22r
+        a20i = b20i + b22i
+        a22r = b20r - b22r
+        a22i = b20i - b22i
+        a21r = b21r + b23i
+        a21i = b21i - b23r
+        a23r = b21r - b23i
+        a23i = b21i + b23r
+        a24r = b24r + b26r
+        a24i = b24i + b26i
+        a26r = b24r - b26r
+        a26i = b24i - b26i
+        a25r = b25r + b27i
+        a25i = b25i - b27r
+        a27r = b25r - b27i
+        a27i = b25i + b27r
+        a28r = b28r + b30r
+        a28i = b28i + b30i
+        a30r = b28r - b30r
+        a30i = b28i - b30i
+        a29r = b29r + b31i
+        a29i = b29i - b31r
+        a31r = b29r - b31i
+        a31i = b29i + b31r
+        # Stage 3: 8 point butterflies
+        b0r = a0r + a4r
+        b0i = a0i + a4i
+        b4r = a0r - a4r
+        b4i = a0i - a4i
+        tr = (a5r + a5i)*C8
+        ti = (a5i - a5r)*C8
+        b1r = a1r + tr
+        b1i = a1i + ti
+        b5r = a1r - tr
+        b5i = a1i - ti
+        b2r = a2r + a6i
+        b2i = a2i - a6r
+        b6r = a2r - a6i
+        b6i = a2i + a6r
+        tr = (a7i - a7r)*C8
+        ti = -(a7r + a7i)*C8
+        b3r = a3r + tr
+        b3i = a3i + ti
+        b7r = a3r - tr
+        b7i = a3i - ti
+        b8r = a8r + a12r
+        b8i = a8i + a12i
+        b12r = a8r - a12r
+        b12i = a8i - a12i
+        tr = (a13r + a13i)*C8
+        ti = (a13i - a13r)*C8
+        b9r = a9r + tr
+        b9i = a9i + ti
+        b13r = a9r - tr
+        b13i = a9i - ti
+        b10r = a10r + a14i
+        b10i = a10i - a14r
+        b14r = a10r - a14i
+        b14i = a10i + a14r
+        tr = (a15i - a15r)*C8
+        ti = -(a15r + a15i)*C8
+        b11r = a11r + tr
+        b11i = a11i + ti
+        b15r = a11r - tr
+        b15i = a11i - ti
+        b16r = a16r + a20r
+        b16i = a16i + a20i
+        b20r = a16r - a20r
+        b20i = a16i - a20i
+        tr = (a21r + a21i)*C8
+        ti = (a21i - a21r)*C8
+        b17r = a17r + tr
+        b17i = a17i + ti
+        b21r = a17r - tr
+        b21i = a17i - ti
+        b18r = a18r + a22i
+        b18i = a18i - a22r
+        b22r = a18r - a22i
+        b22i = a18i + a22r
+        tr = (a23i - a23r)*C8
+        ti = -(a23r + a23i)*C8
+        b19r = a19r + tr
+        b19i = a19i + ti
+        b23r = a19r - tr
+        b23i = a19i - ti
+        b24r = a24r + a28r
+        b24i = a24i + a28i
+        b28r = a24r - a28r
+        b28i = a24i - a28i
+        tr = (a29r + a29i)*C8
+        ti = (a29i - a29r)*C8
+        b25r = a25r + tr
+        b25i = a25i + ti
+        b29r = a25r - tr
+        b29i = a25i - ti
+        b26r = a26r + a30i
+        b26i = a26i - a30r
+        b30r = a26r - a30i
+        b30i = a26i + a30r
+        tr = (a31i - a31r)*C8
+        ti = -(a31r + a31i)*C8
+        b27r = a27r + tr
+        b27i = a27i + ti
+        b31r = a27r - tr
+        b31i = a27i - ti
+        # Stage 4: 16 point butterflies
+        a0r = b0r + b8r
+        a0i = b0i + b8i
+        a8r = b0r - b8r
+        a8i = b0i - b8i
+        tr = b9r*0.923879533 - b9i*-0.382683432
+        ti = b9r*-0.382683432 + b9i*0.923879533
+        a1r = b1r + tr
+        a1i = b1i + ti
+        a9r = b1r - tr
+        a9i = b1i - ti
+        tr = (b10r + b10i)*C8
+        ti = (b10i - b10r)*C8
+        a2r = b2r + tr
+        a2i = b2i + ti
+        a10r = b2r - tr
+        a10i = b2i - ti
+        tr = b11r*0.382683432 - b11i*-0.923879533
+        ti = b11r*-0.923879533 + b11i*0.382683432
+        a3r = b3r + tr
+        a3i = b3i + ti
+        a11r = b3r - tr
+        a11i = b3i - ti
+        a4r = b4r + b12i
+        a4i = b4i - b12r
+        a12r = b4r - b12i
+        a12i = b4i + b12r
+        tr = b13r*-0.382683432 - b13i*-0.923879533
+        ti = b13r*-0.923879533 + b13i*-0.382683432
+        a5r = b5r + tr
+        a5i = b5i + ti
+        a13r = b5r - tr
+        a13i = b5i - ti
+        tr = (b14i - b14r)*C8
+        ti = -(b14r + b14i)*C8
+        a6r = b6r + tr
+        a6i = b6i + ti
+        a14r = b6r - tr
+        a14i = b6i - ti
+        tr = b15r*-0.923879533 - b15i*-0.382683432
+        ti = b15r*-0.382683432 + b15i*-0.923879533
+        a7r = b7r + tr
+        a7i = b7i + ti
+        a15r = b7r - tr
+        a15i = b7i - ti
+        a16r = b16r + b24r
+        a16i = b16i + b24i
+        a24r = b16r - b24r
+        a24i = b16i - b24i
+        tr = b25r*0.923879533 - b25i*-0.382683432
+        ti = b25r*-0.382683432 + b25i*0.923879533
+        a17r = b17r + tr
+        a17i = b17i + ti
+        a25r = b17r - tr
+        a25i = b17i - ti
+        tr = (b26r + b26i)*C8
+        ti = (b26i - b26r)*C8
+        a18r = b18r + tr
+        a18i = b18i + ti
+        a26r = b18r - tr
+        a26i = b18i - ti
+        tr = b27r*0.382683432 - b27i*-0.923879533
+        ti = b27r*-0.923879533 + b27i*0.382683432
+        a19r = b19r + tr
+        a19i = b19i + ti
+        a27r = b19r - tr
+        a27i = b19i - ti
+        a20r = b20r + b28i
+        a20i = b20i - b28r
+        a28r = b20r - b28i
+        a28i = b20i + b28r
+        tr = b29r*-0.382683432 - b29i*-0.923879533
+        ti = b29r*-0.923879533 + b29i*-0.382683432
+        a21r = b21r + tr
+        a21i = b21i + ti
+        a29r = b21r - tr
+        a29i = b21i - ti
+        tr = (b30i - b30r)*C8
+        ti = -(b30r + b30i)*C8
+        a22r = b22r + tr
+        a22i = b22i + ti
+        a30r = b22r - tr
+        a30i = b22i - ti
+        tr = b31r*-0.923879533 - b31i*-0.382683432
+        ti = b31r*-0.382683432 + b31i*-0.923879533
+        a23r = b23r + tr
+        a23i = b23i + ti
+        a31r = b23r - tr
+        a31i = b23i - ti
+        # Stage 5: 32 point butterflies
+        b0r = a0r + a16r
+        b0i = a0i + a16i
+        b16r = a0r - a16r
+        b16i = a0i - a16i
+        tr = a17r*0.98078528 - a17i*-0.195090322
+        ti = a17r*-0.195090322 + a17i*0.98078528
+        b1r = a1r + tr
+        b1i = a1i + ti
+        b17r = a1r - tr
+        b17i = a1i - ti
+        tr = a18r*0.923879533 - a18i*-0.382683432
+        ti = a18r*-0.382683432 + a18i*0.923879533
+        b2r = a2r + tr
+        b2i = a2i + ti
+        b18r = a2r - tr
+        b18i = a2i - ti
+        tr = a19r*0.831469612 - a19i*-0.555570233
+        ti = a19r*-0.555570233 + a19i*0.831469612
+        b3r = a3r + tr
+        b3i = a3i + ti
+        b19r = a3r - tr
+        b19i = a3i - ti
+        tr = (a20r + a20i)*C8
+        ti = (a20i - a20r)*C8
+        b4r = a4r + tr
+        b4i = a4i + ti
+        b20r = a4r - tr
+        b20i = a4i - ti
+        tr = a21r*0.555570233 - a21i*-0.831469612
+        ti = a21r*-0.831469612 + a21i*0.555570233
+        b5r = a5r + tr
+        b5i = a5i + ti
+        b21r = a5r - tr
+        b21i = a5i - ti
+        tr = a22r*0.382683432 - a22i*-0.923879533
+        ti = a22r*-0.923879533 + a22i*0.382683432
+        b6r = a6r + tr
+        b6i = a6i + ti
+        b22r = a6r - tr
+        b22i = a6i - ti
+        tr = a23r*0.195090322 - a23i*-0.98078528
+        ti = a23r*-0.98078528 + a23i*0.195090322
+        b7r = a7r + tr
+        b7i = a7i + ti
+        b23r = a7r - tr
+        b23i = a7i - ti
+        b8r = a8r + a24i
+        b8i = a8i - a24r
+        b24r = a8r - a24i
+        b24i = a8i + a24r
+        tr = a25r*-0.195090322 - a25i*-0.98078528
+        ti = a25r*-0.98078528 + a25i*-0.195090322
+        b9r = a9r + tr
+        b9i = a9i + ti
+        b25r = a9r - tr
+        b25i = a9i - ti
+        tr = a26r*-0.382683432 - a26i*-0.923879533
+        ti = a26r*-0.923879533 + a26i*-0.382683432
+        b10r = a10r + tr
+        b10i = a10i + ti
+        b26r = a10r - tr
+        b26i = a10i - ti
+        tr = a27r*-0.555570233 - a27i*-0.831469612
+        ti = a27r*-0.831469612 + a27i*-0.555570233
+        b11r = a11r + tr
+        b11i = a11i + ti
+        b27r = a11r - tr
+        b27i = a11i - ti
+        tr = (a28i - a28r)*C8
+        ti = -(a28r + a28i)*C8
+        b12r = a12r + tr
+        b12i = a12i + ti
+        b28r = a12r - tr
+        b28i = a12i - ti
+        tr = a29r*-0.831469612 - a29i*-0.555570233
+        ti = a29r*-0.555570233 + a29i*-0.831469612
+        b13r = a13r + tr
+        b13i = a13i + ti
+        b29r = a13r - tr
+        b29i = a13i - ti
+        tr = a30r*-0.923879533 - a30i*-0.382683432
+        ti = a30r*-0.382683432 + a30i*-0.923879533
+        b14r = a14r + tr
+        b14i = a14i + ti
+        b30r = a14r - tr
+        b30i = a14i - ti
+        tr = a31r*-0.98078528 - a31i*-0.195090322
+        ti = a31r*-0.195090322 + a31i*-0.98078528
+        b15r = a15r + tr
+        b15i = a15i + ti
+        b31r = a15r - tr
+        b31i = a15i - ti
+        real[b] = b0r
+        imag[b] = b0i
+        real[b + 1] = b1r
+        imag[b + 1] = b1i
+        real[b + 2] = b2r
+        imag[b + 2] = b2i
+        real[b + 3] = b3r
+        imag[b + 3] = b3i
+        real[b + 4] = b4r
+        imag[b + 4] = b4i
+        real[b + 5] = b5r
+        imag[b + 5] = b5i
+        real[b + 6] = b6r
+        imag[b + 6] = b6i
+        real[b + 7] = b7r
+        imag[b + 7] = b7i
+        real[b + 8] = b8r
+        imag[b + 8] = b8i
+        real[b + 9] = b9r
+        imag[b + 9] = b9i
+        real[b + 10] = b10r
+        imag[b + 10] = b10i
+        real[b + 11] = b11r
+        imag[b + 11] = b11i
+        real[b + 12] = b12r
+        imag[b + 12] = b12i
+        real[b + 13] = b13r
+        imag[b + 13] = b13i
+        real[b + 14] = b14r
+        imag[b + 14] = b14i
+        real[b + 15] = b15r
+        imag[b + 15] = b15i
+        real[b + 16] = b16r
+        imag[b + 16] = b16i
+        real[b + 17] = b17r
+        imag[b + 17] = b17i
+        real[b + 18] = b18r
+        imag[b + 18] = b18i
+        real[b + 19] = b19r
+        imag[b + 19] = b19i
+        real[b + 20] = b20r
+        imag[b + 20] = b20i
+        real[b + 21] = b21r
+        imag[b + 21] = b21i
+        real[b + 22] = b22r
+        imag[b + 22] = b22i
+        real[b + 23] = b23r
+        imag[b + 23] = b23i
+        real[b + 24] = b24r
+        imag[b + 24] = b24i
+        real[b + 25] = b25r
+        imag[b + 25] = b25i
+        real[b + 26] = b26r
+        imag[b + 26] = b26i
+        real[b + 27] = b27r
+        imag[b + 27] = b27i
+        real[b + 28] = b28r
+        imag[b + 28] = b28i
+        real[b + 29] = b29r
+        imag[b + 29] = b29i
+        real[b + 30] = b30r
+        imag[b + 30] = b30i
+        real[b + 31] = b31r
+        imag[b + 31] = b31i
+    return 32
+
+leaves = ((32, leaf32), (16, leaf16), (8, leaf8),)
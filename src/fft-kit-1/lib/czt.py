@@ -0,0 +1,181 @@
+# czt.py Chirp-Z transform: M bins spread evenly over any band
+# An FFT's bins cover 0..rate/2: a display of 300-2600Hz wastes most of them. The
+# chirp-Z transform evaluates X(f) = sum(x[n]*exp(-2j*pi*n*f/rate)) at exactly M
+# frequencies f1 + m*df, df = (f2 - f1)/(M - 1), for any f1 and f2.
+# Bluestein's method: writing n*m = (n*n + m*m - (m - n)**2)/2 turns the sum into a
+# convolution, done with two FFTs of length L >= N + M - 1 (a power of two):
+#   y[m] = sum(a[n]*x[n]*b[m - n])      a[n] = w[n]*exp(-2j*pi*(n*f1/rate + n*n*d/2))
+#   abs(X(f1 + m*df)) = abs(y[m])       b[k] = exp(j*pi*k*k*d), d = df/rate
+# The window w, a[] and the transform of b[] depend only on the band: they are built
+# once and shared, up to a byte budget, by CZT instances with the same parameters.
+# Each run is then a premultiply, dft.fft_fast() forward, a complex multiply,
+# fft_fast() reverse and polar.magnitude(). Chirp phases are reduced modulo one
+# cycle in integer arithmetic so they stay exact at large n*n in single precision.
+# Requires the assembler (FPU boards), as lib/dft.
+# Usage:
+# cz = CZT(256, 300, 2600, 64, 8000, 'hanning')
+# cz.load(buf)              # buf: array('i') of raw 32 bit INMP441 I2S words
+# mags = cz.run()           # mags[m] for m < 64 is abs(X) at cz.freq(m), unscaled
+# Multiply by scale for |X|/length: a sine of amplitude A at a bin gives A/2.
+
+import array
+import math
+from dft import fft_fast
+from dftclass import DFT, FORWARD, REVERSE, TABLE, NOSCALE
+from window import setarray
+from polar import magnitude
+import fftplan
+
+# Multiply real samples by a complex table: re[i], im[i] = x*t[2i], x*t[2i + 1]
+# r0: real array (samples in, real parts out)
+# r1: imaginary array
+# r2: table of n complex values [re, im, re, im...]
+# r3: n
+@micropython.asm_thumb
+def premultiply(r0, r1, r2, r3):
+    label(LOOP)
+    vldr(s0, [r0, 0])
+    vldr(s1, [r2, 0])
+    vldr(s2, [r2, 4])
+    vmul(s1, s0, s1)
+    vmul(s2, s0, s2)
+    vstr(s1, [r0, 0])
+    vstr(s2, [r1, 0])
+    add(r0, 4)
+    add(r1, 4)
+    add(r2, 8)
+    sub(r3, 1)
+    bgt(LOOP)
+
+# Complex multiply in place by a table: (re[i] + j*im[i]) *= t[2i] + j*t[2i + 1]
+# Arguments as premultiply()
+@micropython.asm_thumb
+def cmultiply(r0, r1, r2, r3):
+    label(LOOP)
+    vldr(s0, [r0, 0])
+    vldr(s1, [r1, 0])
+    vldr(s2, [r2, 0])
+    vldr(s3, [r2, 4])
+    vmul(s4, s0, s2)
+    vmul(s5, s1, s3)
+    vsub(s4, s4, s5)
+    vmul(s5, s0, s3)
+    vmul(s6, s1, s2)
+    vadd(s5, s5, s6)
+    vstr(s4, [r0, 0])
+    vstr(s5, [r1, 0])
+    add(r0, 4)
+    add(r1, 4)
+    add(r2, 8)
+    sub(r3, 1)
+    bgt(LOOP)
+
+_Q = 1 << 40                    # Phases in units of 1/_Q cycle
+
+def _phasor(table, i, phase):   # table[2i], table[2i + 1] = exp(2j*pi*phase/_Q)
+    a = 2*math.pi*(phase % _Q)/_Q
+    table[2*i] = math.cos(a)
+    table[2*i + 1] = math.sin(a)
+
+# Chirp tables are shared by all CZT instances of the same band and window name, in
+# least recently used order as fftplan.get(). When their size exceeds budget bytes
+# the oldest are dropped. Tables for a window function are not shared.
+budget = 16384
+_chirps = {}
+_order = []                     # Keys, least recently used first
+
+# Returns (a, fb) for the band: a[] as above including the window, fb the transform
+# of b[] scaled by 1/L. dft is a DFT of length L used to transform b.
+def chirps(length, f1, f2, bins, rate, winfunc, dft):
+    key = (length, f1, f2, bins, rate, winfunc)
+    if key in _chirps:
+        _order.remove(key)
+        _order.append(key)
+        return _chirps[key]
+    tables = _build(length, f1, f2, bins, rate, winfunc, dft)
+    if winfunc is None or isinstance(winfunc, str):
+        _chirps[key] = tables
+        _order.append(key)
+        total = 0
+        for k in _order:
+            total += _nbytes(_chirps[k])
+        while total > budget and len(_order) > 1:
+            total -= _nbytes(_chirps.pop(_order.pop(0)))
+    return tables
+
+def _nbytes(tables):
+    return 4*(len(tables[0]) + len(tables[1]))
+
+def _build(length, f1, f2, bins, rate, winfunc, dft):
+    size = dft.length
+    df = (f2 - f1)/(bins - 1) if bins > 1 else 0
+    f = round(f1/rate*_Q)       # Cycles per sample
+    h = round(df/rate/2*_Q)     # d/2
+    win = None
+    if winfunc is not None:
+        win = fftplan.windows[winfunc] if isinstance(winfunc, str) else winfunc
+    a = array.array('f', (0 for x in range(2*length)))
+    for n in range(length):
+        _phasor(a, n, -(n*f + n*n*h))
+        if win is not None:
+            w = win(n, length)
+            a[2*n] *= w
+            a[2*n + 1] *= w
+    b = array.array('f', [0.0, 0.0])
+    re = dft.re
+    im = dft.im
+    for k in range(size):       # b[k] at k mod L for -(length - 1) <= k < bins
+        m = k if k < bins else k - size
+        if m < bins and m > -length:
+            _phasor(b, 0, m*m*h)
+            re[k] = b[0]
+            im[k] = b[1]
+        else:
+            re[k] = 0.0
+            im[k] = 0.0
+    fft_fast(dft.ctrl, FORWARD | TABLE | NOSCALE)
+    fb = array.array('f', (0 for x in range(2*size)))
+    for k in range(size):       # Fold in the 1/L of the inverse transform
+        fb[2*k] = re[k]/size
+        fb[2*k + 1] = im[k]/size
+    return a, fb
+
+class CZT(object):
+    # length: samples per frame, f1, f2: first and last bin (Hz), bins: M
+    # rate: sample rate (Hz), winfunc: None, a key of fftplan.windows or f(x, length)
+    def __init__(self, length, f1, f2, bins, rate, winfunc=None):
+        size = 2
+        while size < length + bins - 1:
+            size <<= 1
+        self.length = length
+        self.bins = bins
+        self.f1 = f1
+        self.df = (f2 - f1)/(bins - 1) if bins > 1 else 0
+        self.scale = 1/length
+        self._dft = DFT(size, table=True)
+        self.re = self._dft.re  # Samples in re[0..length - 1], magnitudes out
+        self.im = self._dft.im
+        self._a, self._fb = chirps(length, f1, f2, bins, rate, winfunc, self._dft)
+
+    def freq(self, m):          # Frequency (Hz) of mags[m]
+        return self.f1 + m*self.df
+
+    def load(self, buf):
+        re = self.re
+        for i in range(self.length):
+            re[i] = buf[i] >> 8
+
+    # Transform the samples in re. Returns re with abs(X) at freq(m) in re[m], m < bins.
+    def run(self):
+        ctrl = self._dft.ctrl
+        size = self._dft.length
+        length = self.length
+        premultiply(self.re, self.im, self._a, length)
+        if size > length:       # Zero padding
+            setarray(ctrl[2] + 4*length, 0, size - length)
+            setarray(ctrl[3] + 4*length, 0, size - length)
+        fft_fast(ctrl, FORWARD | TABLE | NOSCALE)
+        cmultiply(self.re, self.im, self._fb, size)
+        fft_fast(ctrl, REVERSE | TABLE)
+        magnitude(self.re, self.im, self.bins, 4)
+        return self.re
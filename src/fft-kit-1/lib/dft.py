@@ -13,6 +13,19 @@
 # Test moved out to dfttest.py
 # Now produces plausible results with 16384 scaling
 # Note: weird results always arise from overflow. Try reducing amplitude.
+# This applied to the integer version. Data are now float32 whose 8 bit exponent
+# is in effect a per element block floating point: 24 bit integer input cannot
+# overflow at any length and quiet signals keep full precision. For boards
+# without an FPU, lib/fixfft scales each stage only when headroom runs out.
+# Real input mode: realpack() and realsplit() wrap an N/2 point fft() to
+# transform N real samples. See rfft(). pairsplit() separates the spectra of two
+# real signals transformed together by one complex fft().
+# fft_fast(): register resident version of fft() with identical results. Executes
+# about 4.4x fewer instructions at 1024 points. Checked by tools/fftcheck.py.
+# fft_fast() control bit 4 runs the stages in reverse as decimation in frequency.
+# The bit reversal pass is skipped and bin k is left at index rev(k): for a display
+# which only groups magnitudes the order does not matter if the grouping map does.
+# goertzel(): single bin DFTs of a real frame for a Goertzel filter bank (lib/goertzel).
 
 # Source: ARM v7-M Architecture Reference Manual
 import array
@@ -34,12 +47,28 @@ from uctypes import addressof
 # CMUL computes the product of two complex nos. and shifts the result right by N bits
 # CCOPY copies a complex from one scratchpad location to another
 # CONJUGATE replaces a complex with its conjugate
+# TWIDDLE loads u from the twiddle table
 # Routines preserve all registers
 
 # ********* DFT FUNCTION ENTRY POINT ********* 
 # On entry r0 holds adress of scratchpad
 # r1: 
 # bit 0 if set specifies a Forward transform otherwise a Reverse transform
+# bit 3 if set takes the twiddle factors from a table instead of computing u = u*c
+# bit 4 (fft_fast() only) selects decimation in frequency: the input is in natural
+# order and the result is left in bit reversed order, with no reordering pass.
+# bit 5 if set skips the scaling of a forward transform by cmplx[12]: for use where
+# the caller applies the scale elsewhere (window coefficients, dB offset).
+# Twiddle table: ctrl[6] = Address of (cos, sin) pairs of 2*pi*k/T for k in 0..T/2 - 1
+# ctrl[7] = Byte stride through the table for the first (2 point) stage = 4*T
+# ctrl[8] = Byte stride between elements (fft_fast() and realsplit() only): 4 for
+# separate real and imaginary arrays, 8 for one interleaved array [re, im, re, im...]
+# with ctrl[3] = ctrl[2] + 4. fft() assumes 4.
+# ctrl[9] = Number of frames (fft_fast() only, normally 1). Frames of ctrl[0] elements
+# follow each other in the arrays and each is transformed and scaled in turn. ctrl[2],
+# ctrl[3] and ctrl[9] are altered: the caller must restore them.
+# T is normally the transform length. A larger T (e.g. a table shared with realsplit())
+# is allowed: the stride skips the unused entries.
 
 @micropython.asm_thumb
 def fft(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
@@ -223,6 +252,29 @@ def fft(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
     pop({r2, r3})
     bx(lr)              # ! CONJUGATE
 
+# Load u from the twiddle table, conjugated if forward, and advance the table pointer
+# r11 = address of table entry
+# r12 = stride in bytes
+    label(TWIDDLE)
+    push({r0, r1, r2})
+    mov(r1, r11)
+    vldr(s14, [r1, 0])  # cos
+    vldr(s15, [r1, 4])  # sin
+    mov(r2, r10)        # Control
+    mov(r0, 1)
+    tst(r2, r0)
+    it(ne)
+    vneg(s15, s15)      # Conjugate if forward
+    mov(r0, r8)         # &scratch
+    ldr(r0, [r0, 20])   # &complex_scratchpad
+    vstr(s14, [r0, 8])  # u
+    vstr(s15, [r0, 12])
+    mov(r0, r12)
+    add(r1, r1, r0)
+    mov(r11, r1)        # Next entry
+    pop({r0, r1, r2})
+    bx(lr)              # ! TWIDDLE
+
 # Main calculation enter with r2 = i r5 = l1
 
     label(DOMATHS)
@@ -293,8 +345,8 @@ def fft(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
 # r8  &scratch
 # r9  l2
 # r10 control
-# r11 Unused
-# r12 Unused
+# r11 Address of current twiddle table entry
+# r12 Twiddle table stride in bytes, 0 if no table
 # COMPLEX SCRATCHPAD
 # Index ByteOffset  Contents
 #  0        0       u initial value
@@ -304,9 +356,17 @@ def fft(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
 #  4       32       nums[i]
 #  5       40       nums[i1]
     label(ENTRY)
-    push({r8, r9, r10})
+    push({r8, r9, r10, r11, r12})
     mov(r8, r0)         # r8 address of scratch
     mov(r10, r1)        # control (forward = 1)
+    mov(r2, 0)          # No twiddle table
+    mov(r3, 8)          # bit 3: twiddle table
+    tst(r1, r3)
+    beq(NOTABLE)
+    ldr(r2, [r0, 28])   # Stride for 2 point stage
+    add(r2, r2, r2)     # Halved at the start of each stage
+    label(NOTABLE)
+    mov(r12, r2)
     bl(ARRAY_REVERSE)   # Reverse data arrays
 
     mov(r0, r8)
@@ -317,6 +377,12 @@ def fft(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
     mov(r9, r4)         # r9 = l2               ** l2 = 1
     label(OUTER)        #                       ** for l in range(m)
     push({r1, r2})
+    mov(r0, r12)        # Twiddle table stride for this stage
+    lsr(r0, r0, 1)
+    mov(r12, r0)
+    mov(r0, r8)
+    ldr(r0, [r0, 24])
+    mov(r11, r0)        # Table entry for j = 0
     mov(r4, r9)
     mov(r5, r4)         # r5 = l1               ** l1 = l2
     add(r4, r4, r4)     #                       ** l2 <<= 1
@@ -352,6 +418,10 @@ def fft(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
     mov(r1, r5)         # r5 = l1
     label(INNER1)       #                       ** for j in range(l1)
     push({r1, r2})      # Preserve r2 until DOMATHS
+    mov(r0, r12)
+    cmp(r0, 0)
+    it(ne)
+    bl(TWIDDLE)         #                       ** u = table[j*stride]
 
     mov(r0, r8)
     ldr(r1, [r0, 0])    # r1 = length, r2 (i) = j
@@ -365,12 +435,16 @@ def fft(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
     blt(INNER2)         # ! for i in range(j, length, l2)
 
                         #                       ** u = (u*c)/2**BITSCALE   
+    mov(r0, r12)
+    cmp(r0, 0)
+    bne(NEXTJ)          # Table lookup replaces u*c
     mov(r0, r8)         # &scratch
     ldr(r0, [r0, 20])   # &complex_scratchpad
     mov(r1, 8)          # u
     mov(r2, r1)
     mov(r3, 16)         # c
     bl(CMUL)            # ! u = (u*c)
+    label(NEXTJ)
     pop({r1, r2})
     add(r2, 1)
     cmp(r2, r1)
@@ -385,6 +459,9 @@ def fft(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
     mov(r1, 1)          # bit 0: forward transform
     tst(r2, r1)
     beq(DFTDONE)        # Reverse transform
+    mov(r1, 32)         # bit 5: no scaling
+    tst(r2, r1)
+    bne(DFTDONE)
 # scaling
     mov(r0, r8)         # &scratch
     ldr(r4, [r0, 0])    # Length
@@ -405,6 +482,594 @@ def fft(r0, r1):        # r0 address of scratchpad, r1 = Control: see above
     add(r2, 4)
     sub(r4, 1)
     cmp(r4, 0)
-    bge(SCALE01)        #                       ** ! for i in range(n):
+    bgt(SCALE01)        #                       ** ! for i in range(n):
     label(DFTDONE)
-    pop({r8, r9, r10})
+    pop({r8, r9, r10, r11, r12})
+
+
+# ********* REGISTER RESIDENT FFT *********
+# fft_fast(r0, r1) takes the same ctrl array and control bits as fft() and produces
+# bit-for-bit identical results: the floating point operations are performed in
+# the same order. The butterfly is inline with u, c, nums[i] and nums[i1] held in
+# FPU registers, so there are no subroutine calls or scratchpad copies in the
+# inner loop. The scratchpad is only read: u initial value, roots and scale.
+# Register usage
+# r0 &real[j]
+# r1 &real[i]
+# r2 &imag[i]
+# r3 l1 in bytes
+# r4 l2 in bytes
+# r5 &real[length]
+# r6, r7 &real[i1], &imag[i1] in inner loop, otherwise temporary
+# r8  &scratch
+# r9  &imag - &real
+# r10 &roots[l]
+# r11 Address of current twiddle table entry
+# r12 Twiddle table stride in bytes, 0 if no table
+# s0, s1 u
+# s2, s3 c
+# s4, s5 nums[i]
+# s6, s7 nums[i1]
+# s8 -1.0 if forward else 1.0: multiplying an imaginary part by it conjugates
+# s14 Element stride in bytes (ctrl[8]) as an integer
+
+@micropython.asm_thumb
+def fft_fast(r0, r1):   # r0 address of scratchpad, r1 = Control: see fft()
+    push({r8, r9, r10, r11, r12})
+    label(FRAME)        # Start of each frame
+    push({r1})
+    mov(r8, r0)         # r8 address of scratch
+    ldr(r2, [r0, 32])
+    vmov(s14, r2)       # Element stride
+    ldr(r2, [r0, 20])   # &complex_scratchpad
+    vldr(s8, [r2, 0])   # u initial value real part: 1.0
+    mov(r3, 1)          # bit 0: forward transform
+    tst(r1, r3)
+    beq(REVERSE)
+    vneg(s8, s8)
+    label(REVERSE)
+    ldr(r3, [r0, 16])   # Byte offset from start of scratchpad into start of roots
+    add(r3, r3, r2)
+    mov(r10, r3)        # &roots[0]
+    mov(r2, 0)          # No twiddle table
+    mov(r3, 8)          # bit 3: twiddle table
+    tst(r1, r3)
+    beq(NOTABLE)
+    ldr(r2, [r0, 28])   # Stride for 2 point stage
+    add(r2, r2, r2)     # Halved at the start of each stage
+    label(NOTABLE)
+    mov(r12, r2)
+    mov(r3, 16)         # bit 4: decimation in frequency
+    tst(r1, r3)
+    beq(DIT)
+    b(DIF)
+    label(DIT)
+                        # Bit reverse the data arrays. FPU registers are used
+                        # to swap elements so nothing need be pushed.
+    mov(r2, r0)
+    ldr(r0, [r2, 8])    # Real data array
+    ldr(r1, [r2, 12])   # Imaginary data array
+    ldr(r5, [r2, 32])   # Element stride s: 4 or 8 bytes
+    mov(r9, r5)
+    ldr(r4, [r2, 0])
+    sub(r4, 1)          # limit of source offset into data arrays length -1
+    mul(r4, r5)         # r4 is max byte offset into arrays
+    ldr(r3, [r2, 4])    # bits in address
+    lsr(r5, r5, 1)
+    add(r3, r3, r5)
+    mov(r5, 30)         # rbit(i*s) >> (30 - bits - s/2) = rev(i)*s
+    sub(r3, r5, r3)     # r3 is no. of bits to shift reversed address.
+    mov(r6, 0)          # r6 is source offset into data arrays
+    label(LOOP1)
+    rbit(r7, r6)
+    lsr(r7, r3)         # r7 bit reversed array offset as a byte address
+    cmp(r7, r6)
+    ble(PASS)           # Skip if source and dest are the same or if already done
+    add(r2, r0, r6)
+    add(r5, r0, r7)
+    vldr(s4, [r2, 0])   # Swap real
+    vldr(s5, [r5, 0])
+    vstr(s5, [r2, 0])
+    vstr(s4, [r5, 0])
+    add(r2, r1, r6)
+    add(r5, r1, r7)
+    vldr(s4, [r2, 0])   # Swap imag
+    vldr(s5, [r5, 0])
+    vstr(s5, [r2, 0])
+    vstr(s4, [r5, 0])
+    label(PASS)
+    mov(r2, r9)
+    add(r6, r6, r2)
+    cmp(r6, r4)
+    ble(LOOP1)
+
+    mov(r3, r9)         # r3 = l1 = 1 element
+    sub(r1, r1, r0)
+    mov(r9, r1)         # &imag - &real
+    add(r5, r4, r0)
+    add(r5, r5, r3)     # r5 = &real[length]
+    label(OUTER)        #                       ** while l1 < length
+    mov(r0, r8)
+    ldr(r0, [r0, 8])    # r0 = &real[0]
+    add(r6, r0, r3)
+    cmp(r6, r5)
+    blt(STAGE)
+    b(DONE)
+    label(STAGE)
+    add(r4, r3, r3)     # r4 = l2 = l1*2
+    mov(r6, r10)
+    vldr(s2, [r6, 0])   #                       ** c = roots[l]
+    vldr(s3, [r6, 4])
+    vmul(s3, s3, s8)    # Conjugate if forward
+    add(r6, 8)
+    mov(r10, r6)
+    mov(r6, r12)        # Twiddle table stride for this stage
+    lsr(r6, r6, 1)
+    mov(r12, r6)
+    mov(r6, r8)
+    ldr(r6, [r6, 24])
+    mov(r11, r6)        # Table entry for j = 0
+    mov(r6, r8)
+    ldr(r6, [r6, 20])   # &complex_scratchpad
+    vldr(s0, [r6, 0])   #                       ** u = 0j+1
+    vldr(s1, [r6, 4])
+
+    label(INNER1)       #                       ** for j in range(l1)
+    mov(r6, r12)
+    cmp(r6, 0)
+    beq(NOTWIDDLE)
+    mov(r6, r11)        #                       ** u = table[j*stride]
+    vldr(s0, [r6, 0])   # cos
+    vldr(s1, [r6, 4])   # sin
+    vmul(s1, s1, s8)    # Conjugate if forward
+    mov(r7, r12)
+    add(r6, r6, r7)
+    mov(r11, r6)        # Next entry
+    label(NOTWIDDLE)
+    mov(r1, r0)         # &real[i], i = j
+    mov(r2, r9)
+    add(r2, r2, r0)     # &imag[i]
+
+    label(INNER2)       #                       ** for i in range(j, length, l2)
+    add(r6, r1, r3)     # &real[i1]             ** i1 = i+l1
+    add(r7, r2, r3)     # &imag[i1]
+    vldr(s4, [r1, 0])   # nums[i]
+    vldr(s5, [r2, 0])
+    vldr(s6, [r6, 0])   # nums[i1]
+    vldr(s7, [r7, 0])
+    vmul(s10, s0, s6)   #                       ** t1 = u*nums[i1]
+    vmul(s9, s1, s7)
+    vsub(s10, s10, s9)
+    vmul(s11, s1, s6)
+    vmul(s9, s0, s7)
+    vadd(s11, s11, s9)
+    vsub(s12, s4, s10)  #                       ** nums[i1] = nums[i] - t1
+    vsub(s13, s5, s11)
+    vstr(s12, [r6, 0])
+    vstr(s13, [r7, 0])
+    vadd(s12, s4, s10)  #                       ** nums[i] += t1
+    vadd(s13, s5, s11)
+    vstr(s12, [r1, 0])
+    vstr(s13, [r2, 0])
+    add(r1, r1, r4)
+    add(r2, r2, r4)
+    cmp(r1, r5)
+    blt(INNER2)         # ! for i in range(j, length, l2)
+
+    mov(r6, r12)
+    cmp(r6, 0)
+    bne(NEXTJ)          # Table lookup replaces u*c
+    vmul(s11, s1, s2)   #                       ** u = u*c
+    vmul(s9, s0, s3)
+    vadd(s11, s11, s9)
+    vmul(s10, s0, s2)
+    vmul(s9, s1, s3)
+    vsub(s0, s10, s9)
+    vmov(r6, s11)
+    vmov(s1, r6)
+    label(NEXTJ)
+    vmov(r6, s14)
+    add(r0, r0, r6)     # Next element
+    mov(r6, r8)
+    ldr(r6, [r6, 8])
+    add(r6, r6, r3)     # &real[l1]
+    cmp(r0, r6)
+    blt(INNER1)         # ! for j in range(l1)
+    mov(r3, r4)         #                       ** l1 = l2
+    b(OUTER)
+
+    label(DIF)          # Natural order in, bit reversed order out
+    ldr(r0, [r0, 8])    # &real
+    mov(r2, r8)
+    ldr(r1, [r2, 12])
+    sub(r1, r1, r0)
+    mov(r9, r1)         # &imag - &real
+    ldr(r4, [r2, 0])
+    ldr(r3, [r2, 32])
+    mul(r4, r3)         # Length in bytes
+    add(r5, r4, r0)     # r5 = &real[length]
+    lsr(r3, r4, 1)      # r3 = l1 = length/2
+    ldr(r6, [r2, 4])    # m
+    sub(r6, 1)
+    mov(r7, r6)
+    mov(r1, 3)
+    lsl(r7, r1)
+    mov(r1, r10)
+    add(r1, r1, r7)
+    mov(r10, r1)        # &roots[m - 1]
+    add(r6, 2)
+    mov(r1, r12)        # Stride for 2 point stage shifted to suit the l1 = length/2 stage
+    lsr(r1, r6)         # Doubled at the start of each stage
+    mov(r12, r1)
+    label(DOUTER)       #                       ** while l1 >= 1
+    vmov(r6, s14)       # Element stride
+    cmp(r3, r6)
+    bge(DSTAGE)
+    b(DONE)
+    label(DSTAGE)
+    add(r4, r3, r3)     # r4 = l2 = l1*2
+    mov(r6, r10)
+    vldr(s2, [r6, 0])   #                       ** c = roots[l]
+    vldr(s3, [r6, 4])
+    vmul(s3, s3, s8)    # Conjugate if forward
+    sub(r6, 8)
+    mov(r10, r6)
+    mov(r6, r12)        # Twiddle table stride for this stage
+    add(r6, r6, r6)
+    mov(r12, r6)
+    mov(r6, r8)
+    ldr(r6, [r6, 24])
+    mov(r11, r6)        # Table entry for j = 0
+    mov(r6, r8)
+    ldr(r6, [r6, 20])   # &complex_scratchpad
+    vldr(s0, [r6, 0])   #                       ** u = 0j+1
+    vldr(s1, [r6, 4])
+    mov(r6, r8)
+    ldr(r0, [r6, 8])    # r0 = &real[0]
+
+    label(DINNER1)      #                       ** for j in range(l1)
+    mov(r6, r12)
+    cmp(r6, 0)
+    beq(DNOTWIDDLE)
+    mov(r6, r11)        #                       ** u = table[j*stride]
+    vldr(s0, [r6, 0])
+    vldr(s1, [r6, 4])
+    vmul(s1, s1, s8)
+    mov(r7, r12)
+    add(r6, r6, r7)
+    mov(r11, r6)
+    label(DNOTWIDDLE)
+    mov(r1, r0)         # &real[i], i = j
+    mov(r2, r9)
+    add(r2, r2, r0)     # &imag[i]
+
+    label(DINNER2)      #                       ** for i in range(j, length, l2)
+    add(r6, r1, r3)     # &real[i1]             ** i1 = i+l1
+    add(r7, r2, r3)     # &imag[i1]
+    vldr(s4, [r1, 0])   # nums[i]
+    vldr(s5, [r2, 0])
+    vldr(s6, [r6, 0])   # nums[i1]
+    vldr(s7, [r7, 0])
+    vadd(s12, s4, s6)   #                       ** nums[i] += nums[i1]
+    vadd(s13, s5, s7)
+    vstr(s12, [r1, 0])
+    vstr(s13, [r2, 0])
+    vsub(s4, s4, s6)    #                       ** nums[i1] = u*(nums[i] - nums[i1])
+    vsub(s5, s5, s7)
+    vmul(s10, s0, s4)
+    vmul(s9, s1, s5)
+    vsub(s10, s10, s9)
+    vmul(s11, s1, s4)
+    vmul(s9, s0, s5)
+    vadd(s11, s11, s9)
+    vstr(s10, [r6, 0])
+    vstr(s11, [r7, 0])
+    add(r1, r1, r4)
+    add(r2, r2, r4)
+    cmp(r1, r5)
+    blt(DINNER2)        # ! for i in range(j, length, l2)
+
+    mov(r6, r12)
+    cmp(r6, 0)
+    bne(DNEXTJ)         # Table lookup replaces u*c
+    vmul(s11, s1, s2)   #                       ** u = u*c
+    vmul(s9, s0, s3)
+    vadd(s11, s11, s9)
+    vmul(s10, s0, s2)
+    vmul(s9, s1, s3)
+    vsub(s0, s10, s9)
+    vmov(r6, s11)
+    vmov(s1, r6)
+    label(DNEXTJ)
+    vmov(r6, s14)
+    add(r0, r0, r6)     # Next element
+    mov(r6, r8)
+    ldr(r6, [r6, 8])
+    add(r6, r6, r3)     # &real[l1]
+    cmp(r0, r6)
+    blt(DINNER1)        # ! for j in range(l1)
+    lsr(r3, r3, 1)      #                       ** l1 >>= 1
+    b(DOUTER)
+
+    label(DONE)         # scale if forward
+    pop({r7})           # Control
+    mov(r2, 1)          # bit 0: forward transform
+    tst(r7, r2)
+    beq(FASTDONE)       # Reverse transform
+    mov(r2, 32)         # bit 5: no scaling
+    tst(r7, r2)
+    bne(FASTDONE)
+    mov(r0, r8)         # &scratch
+    ldr(r4, [r0, 0])    # Length
+    ldr(r1, [r0, 8])    # &real
+    ldr(r2, [r0, 12])   # &imag
+    ldr(r3, [r0, 20])   # &cmplx
+    vldr(s14, [r3, 48]) # Multiplier
+    ldr(r0, [r0, 32])   # Element stride
+    label(SCALE01)      #                       ** for i in range(n):
+    vldr(s15, [r1, 0])  #                       ** nums[i] /= n
+    vmul(s15, s14, s15)
+    vstr(s15, [r1, 0])
+    vldr(s15, [r2, 0])
+    vmul(s15, s14, s15)
+    vstr(s15, [r2, 0])
+    add(r1, r1, r0)
+    add(r2, r2, r0)
+    sub(r4, 1)
+    bgt(SCALE01)        #                       ** ! for i in range(n):
+    label(FASTDONE)
+    mov(r0, r8)
+    ldr(r2, [r0, 36])   # Frames remaining
+    sub(r2, 1)
+    ble(LASTFRAME)
+    str(r2, [r0, 36])
+    ldr(r3, [r0, 0])
+    ldr(r4, [r0, 32])
+    mul(r3, r4)         # Frame length in bytes
+    ldr(r4, [r0, 8])
+    add(r4, r4, r3)
+    str(r4, [r0, 8])    # &real of next frame
+    ldr(r4, [r0, 12])
+    add(r4, r4, r3)
+    str(r4, [r0, 12])
+    mov(r1, r7)         # Control
+    b(FRAME)
+    label(LASTFRAME)
+    pop({r8, r9, r10, r11, r12})
+
+
+# ********* REAL INPUT TRANSFORM *********
+# N real samples are transformed by an N/2 point complex fft(). On entry the real
+# array holds the N samples and ctrl[0], ctrl[1] describe the N/2 point transform.
+# realpack() moves the odd samples into the imaginary array and the even ones to
+# the start of the real array. After fft() realsplit() separates the two
+# interleaved half length spectra, leaving the N/2 + 1 unique bins in
+# real[0..N/2], imag[0..N/2]. The imaginary array therefore needs N/2 + 1 elements.
+# ctrl[6] = Address of table of (cos, sin) pairs of 2*pi*k/N for k in 0..N/4
+# With interleaved data (ctrl[8] = 8) the N samples already form N/2 complex values
+# in the required order: rfft() skips realpack() and needs an array of N + 2 floats.
+# realsplit() omits the factor of 1/2 in the split equations: the caller should
+# halve the fft() scaling factor to compensate. Forward transform only.
+
+# Pack N real samples into N/2 complex
+# r0: ctrl array
+@micropython.asm_thumb
+def realpack(r0):
+    ldr(r4, [r0, 0])    # r4 = N/2
+    ldr(r1, [r0, 8])    # r1 = &real source
+    ldr(r2, [r0, 8])    # r2 = &real dest
+    ldr(r3, [r0, 12])   # r3 = &imag dest
+    label(LOOP)         #                       ** for k in range(N/2):
+    ldr(r5, [r1, 0])    # even sample           ** real[k] = real[2k]
+    ldr(r6, [r1, 4])    # odd sample            ** imag[k] = real[2k + 1]
+    str(r5, [r2, 0])
+    str(r6, [r3, 0])
+    add(r1, 8)
+    add(r2, 4)
+    add(r3, 4)
+    sub(r4, 1)
+    bgt(LOOP)
+
+# Split the N/2 point transform into N/2 + 1 bins of the N point real transform
+# r0: ctrl array
+# For k in 1..N/4, A = Z[k], B = Z[N/2 - k], W = cos - j*sin:
+# E = A + conj(B), O = -j(A - conj(B)), T = W*O
+# X[k] = E + T, X[N/2 - k] = conj(E - T)
+@micropython.asm_thumb
+def realsplit(r0):
+    ldr(r4, [r0, 0])    # r4 = N/2
+    ldr(r1, [r0, 8])    # r1 = &real[k]
+    ldr(r2, [r0, 12])   # r2 = &imag[k]
+    ldr(r5, [r0, 24])   # r5 = &table[k]
+    ldr(r0, [r0, 32])   # r0 = element stride
+    mov(r6, r4)
+    mul(r6, r0)         # r6 = N/2 as byte offset
+    add(r3, r1, r6)     # r3 = &real[N/2]
+    add(r6, r2, r6)     # r6 = &imag[N/2]
+                        # DC and Nyquist bins from Z[0]
+    vldr(s0, [r1, 0])
+    vldr(s1, [r2, 0])
+    vadd(s2, s0, s1)    #                       ** X[0] = Z.real + Z.imag
+    vsub(s3, s0, s1)    #                       ** X[N/2] = Z.real - Z.imag
+    vadd(s2, s2, s2)    # Doubled to match the bins below
+    vadd(s3, s3, s3)
+    vstr(s2, [r1, 0])
+    vstr(s3, [r3, 0])
+    mov(r7, 0)          # Both are real
+    str(r7, [r2, 0])
+    str(r7, [r6, 0])
+    mov(r7, r4)
+    mov(r4, r6)         # r4 = &imag[N/2 - k]
+    lsr(r7, r7, 1)      # r7 = loop count N/4
+    beq(DONE)           # N/2 == 1: nothing more to do
+
+    label(LOOP)         #                       ** for k in range(1, N/4 + 1):
+    add(r1, r1, r0)
+    add(r2, r2, r0)
+    sub(r3, r3, r0)
+    sub(r4, r4, r0)
+    add(r5, 8)
+    vldr(s0, [r1, 0])   # A.real
+    vldr(s1, [r2, 0])   # A.imag
+    vldr(s2, [r3, 0])   # B.real
+    vldr(s3, [r4, 0])   # B.imag
+    vldr(s4, [r5, 0])   # cos
+    vldr(s5, [r5, 4])   # sin
+    vadd(s6, s0, s2)    # E.real = A.real + B.real
+    vsub(s7, s1, s3)    # E.imag = A.imag - B.imag
+    vadd(s8, s1, s3)    # O.real = A.imag + B.imag
+    vsub(s9, s2, s0)    # O.imag = B.real - A.real
+    vmul(s10, s4, s8)
+    vmul(s11, s5, s9)
+    vadd(s10, s10, s11) # T.real = cos*O.real + sin*O.imag
+    vmul(s11, s4, s9)
+    vmul(s12, s5, s8)
+    vsub(s11, s11, s12) # T.imag = cos*O.imag - sin*O.real
+    vsub(s14, s6, s10)
+    vsub(s15, s11, s7)
+    vstr(s14, [r3, 0])  #                       ** X[N/2 - k] = conj(E - T)
+    vstr(s15, [r4, 0])
+    vadd(s12, s6, s10)
+    vadd(s13, s7, s11)
+    vstr(s12, [r1, 0])  #                       ** X[k] = E + T
+    vstr(s13, [r2, 0])
+    sub(r7, 1)
+    bgt(LOOP)
+    label(DONE)
+
+# Forward transform of N real samples: see above
+def rfft(ctrl, control):
+    if ctrl[8] == 4:    # Interleaved data is already packed
+        realpack(ctrl)
+    fft_fast(ctrl, control)
+    realsplit(ctrl)
+
+
+# ********* TWO REAL SIGNALS *********
+# Two real frames a and b of N samples are transformed by one N point complex fft()
+# with a in the real array and b in the imaginary one: Z = A + jB. As a and b are
+# real A[k] = (Z[k] + conj(Z[N - k]))/2 and B[k] = (Z[k] - conj(Z[N - k]))/2j.
+# pairsplit() leaves A[0..N/2 - 1] in real[0..N/2 - 1], imag[0..N/2 - 1] and
+# B[0..N/2 - 1] in real[N/2..N - 1], imag[N/2..N - 1]. The Nyquist bins are dropped.
+# As realsplit() it omits the factor of 1/2: halve the fft() scaling factor.
+# Each pass of the loop handles the four bins k, N - k, N/2 - k and N/2 + k: these
+# produce the outputs for the same four locations so the split is in place.
+# r0: ctrl array. N >= 4.
+@micropython.asm_thumb
+def pairsplit(r0):
+    ldr(r4, [r0, 0])
+    mov(r3, 2)
+    lsl(r4, r3)         # r4 = N as byte offset
+    lsr(r5, r4, 1)      # r5 = N/2 as byte offset
+    ldr(r1, [r0, 8])    # r1 = &real
+    ldr(r2, [r0, 12])   # r2 = &imag
+                        # DC bins are real: A[0] = Z.real, B[0] = Z.imag
+    vldr(s0, [r1, 0])
+    vldr(s1, [r2, 0])
+    vadd(s0, s0, s0)    # Doubled to match the bins below
+    vadd(s1, s1, s1)
+    vstr(s0, [r1, 0])
+    add(r6, r1, r5)
+    vstr(s1, [r6, 0])
+    mov(r7, 0)
+    str(r7, [r2, 0])
+    add(r6, r2, r5)
+    str(r7, [r6, 0])
+    lsr(r0, r5, 1)      # r0 = N/4 as byte offset
+    mov(r3, 4)          # r3 = k as byte offset
+
+    label(LOOP)         #                       ** for k in range(1, N/4 + 1):
+    add(r6, r1, r3)
+    vldr(s0, [r6, 0])   # Z[k]
+    add(r6, r2, r3)
+    vldr(s1, [r6, 0])
+    sub(r7, r4, r3)
+    add(r6, r1, r7)
+    vldr(s2, [r6, 0])   # Z[N - k]
+    add(r6, r2, r7)
+    vldr(s3, [r6, 0])
+    sub(r7, r5, r3)
+    add(r6, r1, r7)
+    vldr(s4, [r6, 0])   # Z[N/2 - k]
+    add(r6, r2, r7)
+    vldr(s5, [r6, 0])
+    add(r7, r5, r3)
+    add(r6, r1, r7)
+    vldr(s6, [r6, 0])   # Z[N/2 + k]
+    add(r6, r2, r7)
+    vldr(s7, [r6, 0])
+    vadd(s8, s0, s2)    #                       ** A[k] = Z[k] + conj(Z[N - k])
+    vsub(s9, s1, s3)
+    vadd(s10, s1, s3)   #                       ** B[k] = -j(Z[k] - conj(Z[N - k]))
+    vsub(s11, s2, s0)
+    vadd(s12, s4, s6)   #                       ** A[N/2 - k] likewise from Z[N/2 - k], Z[N/2 + k]
+    vsub(s13, s5, s7)
+    vadd(s14, s5, s7)   #                       ** B[N/2 - k]
+    vsub(s15, s6, s4)
+    add(r6, r1, r3)
+    vstr(s8, [r6, 0])   # A[k] to k
+    add(r6, r2, r3)
+    vstr(s9, [r6, 0])
+    add(r6, r1, r7)
+    vstr(s10, [r6, 0])  # B[k] to N/2 + k
+    add(r6, r2, r7)
+    vstr(s11, [r6, 0])
+    sub(r7, r5, r3)
+    add(r6, r1, r7)
+    vstr(s12, [r6, 0])  # A[N/2 - k] to N/2 - k
+    add(r6, r2, r7)
+    vstr(s13, [r6, 0])
+    sub(r7, r4, r3)
+    add(r6, r1, r7)
+    vstr(s14, [r6, 0])  # B[N/2 - k] to N - k
+    add(r6, r2, r7)
+    vstr(s15, [r6, 0])
+    add(r3, 4)
+    cmp(r3, r0)
+    ble(LOOP)
+
+
+# ********* GOERTZEL FILTER BANK *********
+# Magnitudes of selected bins of a real frame, one pass through the data per bin:
+# s = x + c*s1 - s2 with c = 2*cos(w), then X = s1 - s2*cos(w) + j*s2*sin(w).
+# Two samples per loop with s1 and s2 exchanging roles, so the length must be even.
+# r0: array of real samples
+# r1: array('f') of (2*cos(w), cos(w), sin(w)) per bin, w = 2*pi*k/length
+# r2: array('f') of results: out[i] = abs(X[k]) for the i'th bin
+# r3: array('i', [length, bins])
+@micropython.asm_thumb
+def goertzel(r0, r1, r2, r3):
+    ldr(r7, [r3, 4])    # Bins
+    label(BIN)
+    vldr(s0, [r1, 0])   # c
+    mov(r4, 0)
+    vmov(s1, r4)        # s1 = s2 = 0.0
+    vmov(s2, r4)
+    ldr(r5, [r3, 0])    # Length
+    mov(r6, r0)
+    label(LOOP)         #                       ** for x in data:
+    vldr(s3, [r6, 0])
+    vmul(s4, s0, s1)
+    vadd(s4, s4, s3)
+    vsub(s2, s4, s2)    # s2 is now the latest
+    vldr(s3, [r6, 4])
+    vmul(s4, s0, s2)
+    vadd(s4, s4, s3)
+    vsub(s1, s4, s1)    # and s1 again
+    add(r6, 8)
+    sub(r5, 2)
+    bgt(LOOP)
+    vldr(s3, [r1, 4])   # cos
+    vmul(s3, s3, s2)
+    vsub(s3, s1, s3)    # X.real
+    vldr(s4, [r1, 8])   # sin
+    vmul(s4, s4, s2)    # X.imag
+    vmul(s3, s3, s3)
+    vmul(s4, s4, s4)
+    vadd(s3, s3, s4)
+    vsqrt(s3, s3)
+    vstr(s3, [r2, 0])
+    add(r1, 12)
+    add(r2, 4)
+    sub(r7, 1)
+    bgt(BIN)
@@ -14,19 +14,42 @@
 PYBOARD_DBOFFSET = const(59)
 import array
 import math
-import pyb
-from dft import fft
+try:
+    import pyb                  # Only needed by DFTADC
+except ImportError:
+    pyb = None
+from dft import fft_fast, rfft, pairsplit
 from uctypes import addressof
-from window import winapply, setarray, icopy
-from polar import topolar
+from window import winapply, winbatch, setarray, icopy
+from polar import topolar, magnitude, winmagnitude, cmagnitude
 import utime
 
 # Control: on entry r1 should hold one of these values to determine the direction and scaling
-# of the transform. Only bit 0 now used by fft()
+# of the transform. fft() and fft_fast() read bit 0 (direction) and the TABLE, DIF and
+# NOSCALE bits: POLAR and DB are acted on by run().
 REVERSE = const(0)      # Inverse transform (frequency to time domain)
 FORWARD = const(1)      # Forward transform
 POLAR   = const(3)      # bit 2: Polar conversion
 DB      = const(7)      # bit 3: Polar with dB conversion
+TABLE   = const(8)      # Added to the above by DFT(table=True): fft() reads twiddles from ctrl[6]
+DIF     = const(16)     # Added by DFT(dif=True): results left in bit reversed order
+NOSCALE = const(32)     # Added by run() when the scale is applied elsewhere
+# The transform is performed by dft.fft_fast(): same interface and results as dft.fft()
+
+# Frequency domain windows a - 2b*cos(2*pi*x/length) as (a, b): see polar.winmagnitude()
+FWINDOWS = {'hanning': (0.5, 0.25), 'hamming': (0.54, 0.23)}
+
+# Twiddle tables are shared by all DFT instances of the same length.
+_twiddles = {}
+
+def twiddles(length):   # (cos, sin) of 2*pi*k/length for k in 0..length/2 - 1
+    if length not in _twiddles:
+        table = array.array('f', [0.0]*length)
+        for k in range(length//2):
+            table[2*k] = math.cos(2*math.pi*k/length)
+            table[2*k +1] = math.sin(2*math.pi*k/length)
+        _twiddles[length] = table
+    return _twiddles[length]
 
 # Instantiating the class creates the real, imaginary and control arrays, populates real and imaginary
 # with zero. Populates the control array with these values:
@@ -36,61 +59,141 @@ DB      = const(7)      # bit 3: Polar with dB conversion
 # ctrl[3] = Address of imaginary data array
 # ctrl[4] = Byte Offset into entry 0 of complex roots of unity
 # ctrl[5] = Address of scratchpad for use by fft code
+# ctrl[6] = Address of shared twiddle table (real or table mode), else 0
+# ctrl[7] = Byte stride through twiddle table for a 2 point stage
+# ctrl[8] = Byte stride between elements: 4, or 8 if interleaved
+# ctrl[9] = Number of frames for fft_fast(): 1 except during run_batch()
 # After this is an array of seven complex nos followed by one for the roots of unity.
 # The first complex no. is initialised to the initial u value. The rest make up a scratchpad used by fft()
 # see ctrlmap.ods for more detail.
+# Real mode (real=True): the N real samples in re are transformed by an N/2 point complex
+# FFT. im has N/2 + 1 elements and the results occupy re[0..N/2], im[0..N/2]. Forward only.
+# Table mode (table=True): fft() looks up every twiddle factor in the shared table rather
+# than generating it by repeated multiplication. Faster, and more accurate for large N.
+# Bit reversed mode (dif=True): decimation in frequency with no reordering pass. Bin k
+# is left in re[binmap[k]], im[binmap[k]]. POLAR and DB convert only the bins below
+# length/2 (the even indices) and to magnitude only: im is not converted to phase.
+# Use fftplan.get(..., reverse=True) to group the bins into display bars.
+# Pair mode (pair=True): two real frames of length samples, one in re and one in im,
+# are transformed by a single complex FFT and separated. The spectrum of the re frame
+# is left in re[0..length/2 - 1], im[0..length/2 - 1] and that of the im frame in
+# re[length/2..length - 1], im[length/2..length - 1]. Polar conversion covers both.
+# The window is applied to both frames. Forward only, length >= 4.
+# Frequency domain window (fwindow='hanning' or 'hamming'): instead of multiplying the
+# samples by windata the window is applied as a 3 tap convolution of the spectrum in
+# the polar conversion, so POLAR or DB is required and gives magnitude only. The DC
+# component is removed as by winapply(). The window is the periodic form (cos of
+# 2*pi*x/length rather than 2*pi*x/(length - 1)): the difference is negligible.
+# The spectrum must be that of real data, so interleaved mode needs real=True:
+# complex interleaved data are loaded by the caller and need not be real.
+# Interleaved mode (interleaved=True): re is a single array [re, im, re, im...] and im
+# is None. Each butterfly operand is one 8 byte access. In real mode the N samples
+# are loaded into re[0..N - 1] as usual: they already form the N/2 complex values of
+# the half length transform so no packing pass is needed, and the N/2 + 1 bins are
+# left in re[0..N + 1]. In complex mode the caller loads complex data: run() neither
+# zeroes the imaginary parts nor applies a window. POLAR and DB give magnitude only,
+# compacted into re[0..bins - 1] as in the other modes.
+# Forward scaling: rather than scale every result run() folds the scale factor into
+# a private scaled copy of windata, the frequency domain window coefficients or the dB
+# offset if it can. windata itself is unchanged: the copy is rebuilt if the scale
+# changes or a new array is assigned to windata (changes made in place are not seen).
+# Batch mode (batch=K): re and im hold K frames of length elements (interleaved: 2*length
+# floats) one after another. run_batch(frames, conversion) transforms the first frames
+# of them with one call each to winbatch(), fft_fast() and the polar conversion rather
+# than one per frame: for short frames the calls and Python cost more than the FFTs.
+# The caller loads the frames; popfunc is not used. Bin k of frame f is then at
+# f*length + k (f*length + binmap[k] if dif). POLAR converts every bin of each frame,
+# conjugates included. Complex mode only: not real, pair or fwindow.
 
 class DFT(object):
-    def __init__(self, length, popfunc=None, winfunc=None):
+    def __init__(self, length, popfunc=None, winfunc=None, real=False, table=False, dif=False,
+                 pair=False, fwindow=None, interleaved=False, batch=1):
         bits = round(math.log(length)/math.log(2))
         assert 2**bits == length, "Length must be an integer power of two"
+        assert length >= 4 or not real, "Real mode length must be at least 4"
+        assert not (real and dif), "Real mode output must be in natural order"
+        assert not (pair and (real or dif)), "Pair mode is a complex transform in natural order"
+        assert length >= 4 or not pair, "Pair mode length must be at least 4"
+        assert fwindow is None or not (winfunc or dif or pair), "fwindow needs a natural order single spectrum"
+        assert not (interleaved and (dif or pair)), "Interleaved mode does not support dif or pair"
+        assert real or not (interleaved and winfunc), "Complex interleaved data is not windowed"
+        assert not (fwindow and interleaved and not real), "fwindow needs real input when interleaved"
+        assert batch == 1 or not (real or pair or fwindow), "Batch mode is for complex transforms"
         self.dboffset = 0               # Offset for dB calculation
         self._length = length
+        self._real = real
+        self._pair = pair
+        self._bins = length//2 + 1 if real else length//2 # No. of bins converted to polar
+        if pair:                        # Two spectra of length//2 bins
+            self._bins = length
         self.popfunc = popfunc          # Function to acquire data
-        self.re = array.array('f', (0 for x in range(self._length)))
-        self.im = array.array('f', (0 for x in range(self._length)))
+        self._interleaved = interleaved
+        self._batch = batch
+        if interleaved:
+            self.re = array.array('f', (0 for x in range(length + 2 if real else 2*length*batch)))
+            self.im = None
+        else:
+            self.re = array.array('f', (0 for x in range(self._length*batch)))
+            self.im = array.array('f', (0 for x in range(self._bins if real else self._length*batch)))
         if winfunc is not None:  # If a window function is provided, create and populate the array
             self.windata = array.array('f', (0 for x in range(self._length))) # of window coefficients
             for x in range(0, length):
                 self.windata[x] = winfunc(x, length)
         else:
             self.windata = None
+        self._winscaled = None          # windata times the scale factor
+        self._winsrc = None             # windata array _winscaled was built from
+        self._winscale = 1.0            # Scale factor included in _winscaled
+        self._fwin = None
+        if fwindow is not None:
+            self._fwin = array.array('f', FWINDOWS[fwindow])
+            self._fwinc = array.array('f', [0.0, 0.0, 8 if interleaved else 4]) # Scaled, step
         COMPLEX_NOS = 7                 # Size of complex buffer area before roots of unity
         ROOTSOFFSET = COMPLEX_NOS*2     # Word offset into complex array of roots of unity
-        bits = round(math.log(self._length)/math.log(2))
-        self.ctrl = array.array('i', [0]*6)
+        if real:                        # Complex transform is half length
+            bits -= 1
+        self.ctrl = array.array('i', [0]*10)
         self.cmplx = array.array('f', [0.0]*((bits +1 +COMPLEX_NOS)*2))
-        self.ctrl[0] = self._length
+        self.ctrl[0] = 2**bits
         self.ctrl[1] = bits
         self.ctrl[2] = addressof(self.re)
-        self.ctrl[3] = addressof(self.im)
+        self.ctrl[3] = self.ctrl[2] + 4 if interleaved else addressof(self.im)
         self.ctrl[4] = COMPLEX_NOS*8    # Byte offset into complex array of roots of unity
         self.ctrl[5] = addressof(self.cmplx) # Base address
+        self.ctrl[8] = 8 if interleaved else 4
+        self.ctrl[9] = 1
+        self._table = TABLE if table else 0
+        self._dif = DIF if dif else 0
+        self.binmap = None
+        if dif:                         # Index of bin k is k with its bits reversed
+            self.binmap = array.array('H', (0 for x in range(self._bins)))
+            for k in range(self._bins):
+                r = 0
+                for b in range(bits):
+                    r = (r << 1) | ((k >> b) & 1)
+                self.binmap[k] = r
+        if real or table:
+            self._twiddles = twiddles(length)
+            self.ctrl[6] = addressof(self._twiddles)
+            self.ctrl[7] = 4*length     # Table has length/2 entries of 8 bytes
 
         self.cmplx[0] = 1.0             # Initial value of u = [1 +j0]
         self.cmplx[1] = 0.0             # Intermediate values are used by fft() and not initialised
-        self.cmplx[12] = 1.0/self._length # Default scaling multiply by 1/length
+        self.scale = 1.0/self._length   # Default scaling multiply by 1/length
         self.cmplx[13] = 0.0            # ignored
         i = ROOTSOFFSET
-        creal = -1
-        cimag =  0
-        self.cmplx[i] = creal           # Complex roots of unity
-        self.cmplx[i +1] = cimag
-        i += 2
-        for x in range(bits):
-            cimag = math.sqrt((1.0 - creal) / 2.0)  # Imaginary part
-            self.cmplx[i +1] = cimag
-            creal = math.sqrt((1.0 + creal) / 2.0)  # Real part
-            self.cmplx[i] = creal
+        for x in range(bits +1):        # Complex roots of unity exp(j*pi/2**x)
+            self.cmplx[i] = math.cos(math.pi/2**x)
+            self.cmplx[i +1] = math.sin(math.pi/2**x)
             i += 2
 
     @property
     def scale(self):
-        return self.cmplx[12]
+        return self.cmplx[12]*2 if self._real or self._pair else self.cmplx[12]
 
     @scale.setter
     def scale(self, value):             # Allow user to override default
-        self.cmplx[12] = value
+        self.cmplx[12] = value/2 if self._real or self._pair else value # realsplit(), pairsplit() double the result
 
     @property
     def length(self):
@@ -99,19 +202,102 @@ class DFT(object):
     def run(self, conversion):          # Uses assembler for speed
         if self.popfunc is not None:
             self.popfunc(self)          # Populate the data (for fwd transfers, just the real data)
+        return self._run(conversion, 1)
+
+    def run_batch(self, frames, conversion): # Batch mode: frames already loaded
+        assert 0 < frames <= self._batch, "More frames than the batch holds"
+        return self._run(conversion, frames)
+
+    def _run(self, conversion, frames):
+        post = 1.0                      # Scale factor still to be applied
+        noscale = 0
+        windata = self.windata
+        if conversion != REVERSE and self.cmplx[12] > 0:
+            if windata is not None:
+                windata = self._foldscale()
+                noscale = NOSCALE
+            elif self._fwin is not None or conversion == DB:
+                post = self.cmplx[12]   # As applied by fft()
+                noscale = NOSCALE
         if conversion != REVERSE:       # Forward transform: real data assumed
-            setarray(self.im, 0, self._length)# Fast zero imaginary data
-            if self.windata is not None:  # Fast apply the window function
-                winapply(self.re, self.windata, self._length)
+            if not (self._real or self._pair or self._interleaved): # realpack() fills the imaginary data
+                setarray(self.im, 0, self._length*frames)# Fast zero imaginary data
+            if windata is not None and frames > 1:
+                winbatch(self.re, windata, self._length, frames)
+            elif windata is not None:   # Fast apply the window function
+                winapply(self.re, windata, self._length)
+                if self._pair:
+                    winapply(self.im, windata, self._length)
+        else:
+            assert not (self._real or self._pair), "Real and pair modes support forward transforms only"
+        assert self._fwin is None or (conversion & POLAR) == POLAR, "fwindow requires POLAR or DB"
         start = utime.ticks_us()
-        fft(self.ctrl, conversion)
+        if self._real:
+            rfft(self.ctrl, conversion | self._table | noscale)
+        else:
+            ctrl = self.ctrl
+            ctrl[9] = frames
+            re, im = ctrl[2], ctrl[3]
+            fft_fast(ctrl, conversion | self._table | self._dif | noscale)
+            ctrl[2], ctrl[3], ctrl[9] = re, im, 1 # Advanced by fft_fast() in a batch
+            if self._pair:
+                pairsplit(ctrl)
         delta = utime.ticks_diff(utime.ticks_us(), start)
         if (conversion & POLAR) == POLAR: # Ignore complex conjugates, convert 1st half of arrays
-            topolar(self.re, self.im, self._length//2) # Fast
+            step = 1
+            bins = self._bins           # Per frame
+            count = bins if frames == 1 else self._length*frames # Batch: whole frames
+            if self._dif:               # Bins below length/2 are at even indices
+                step = 2
+                magnitude(self.re, self.im, bins*frames, 8)
+            elif self._fwin is not None:
+                self._winconvert(post)
+                post = 1.0
+            elif self._interleaved:
+                cmagnitude(self.re, count)
+            else:
+                topolar(self.re, self.im, count) # Fast
             if conversion == DB:        # Ignore conjugates: convert 1st half only
-                for idx, val in enumerate(self.re[0:self._length//2]):
-                    self.re[idx] = -80.0 if val <= 0.0 else 20*math.log10(val) - self.dboffset
+                dboffset = self.dboffset - 20*math.log10(post)
+                re = self.re
+                for base in range(0, self._length*frames, self._length):
+                    for idx in range(base, base + bins*step, step):
+                        val = re[idx]
+                        re[idx] = -80.0 if val <= 0.0 else 20*math.log10(val) - dboffset
         return delta
+
+    def _foldscale(self):               # Return windata times the current scale factor
+        scale = self.cmplx[12]          # As applied by fft()
+        windata = self.windata
+        if scale != self._winscale or windata is not self._winsrc:
+            if self._winscaled is None:
+                self._winscaled = array.array('f', (0 for x in range(self._length)))
+            scaled = self._winscaled
+            for x in range(self._length):
+                scaled[x] = windata[x]*scale
+            self._winsrc = windata
+            self._winscale = scale
+        return self._winscaled
+
+    def _winconvert(self, scale):       # Frequency domain window, magnitudes only
+        coeffs = self._fwinc
+        coeffs[0] = self._fwin[0]*scale
+        coeffs[1] = self._fwin[1]*scale
+        re = self.re
+        e = 2 if self._interleaved else 1 # Index step between elements
+        re[0] = 0.0                     # Remove DC
+        if self._interleaved:
+            re[1] = 0.0
+        else:
+            self.im[0] = 0.0
+        bins = self._length//2
+        if self._real:                  # Nyquist bin: X[N/2 + 1] = conj(X[N/2 - 1])
+            a = coeffs[0]
+            b = coeffs[1]
+            nyquist = abs(a*re[e*bins] - 2*b*re[e*(bins - 1)])
+        winmagnitude(self.ctrl[2], self.ctrl[3], bins, coeffs) # Reads X[N/2]
+        if self._real:
+            re[bins] = nyquist
 # Subclass for acquiring data from Pyboard ADC using read_timed() method.
 
 class DFTADC(DFT):
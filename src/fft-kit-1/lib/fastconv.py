@@ -0,0 +1,98 @@
+# fastconv.py FIR filtering by FFT: overlap-save fast convolution
+# A P tap FIR filter costs P multiplies per sample done directly. Here blocks of the
+# stream are transformed by dft.fft_fast(), multiplied by the precomputed spectrum
+# of the filter and transformed back (REVERSE): about 2*log2(L) complex operations
+# per sample for an L point transform, whatever P. At 255 taps that is a fraction of
+# the direct cost.
+# Overlap-save: each transform of L samples, of which the first P - 1 repeat the end
+# of the previous block, yields L - P + 1 valid outputs. As the filter is real two
+# consecutive segments are filtered at once, one as the real and one as the
+# imaginary part of the input: the outputs are the real and imaginary parts of the
+# result. Each call to process() so takes block = 2*(L - P + 1) samples.
+# equalizer() designs the bass and treble filter of docs/sims/base-and-treble.
+# Requires the assembler (FPU boards), as lib/dft.
+# Usage:
+# fc = FastConv(fastconv.equalizer(8000, 6, -3))
+# fc.process(x, y)      # x, y: array('f') of fc.block samples. x and y may be the
+#                       # same array. Output lags input by (P - 1)/2 for a symmetric
+#                       # (linear phase) filter.
+
+import array
+import math
+from dft import fft_fast
+from dftclass import DFT, FORWARD, REVERSE, TABLE, NOSCALE
+from czt import cmultiply
+
+# Linear phase FIR with the response of the bass and treble simulation: gain in dB
+# bass*low(f) + treble*high(f) where low(f) = 1/(1 + (f/bass_hz)**order) and
+# high(f) = 1/(1 + (treble_hz/f)**order). Designed by frequency sampling at
+# taps points (odd) and Hamming windowed. Returns array('f') of coefficients.
+def equalizer(rate, bass, treble, taps=255, bass_hz=500, treble_hz=2000, order=4):
+    assert taps & 1, "Taps must be odd"
+    m = taps//2
+    gain = [0.0]*(m + 1)
+    for k in range(m + 1):
+        f = k*rate/taps
+        db = bass/(1 + (f/bass_hz)**order)
+        if f > 0:
+            db += treble/(1 + (treble_hz/f)**order)
+        gain[k] = 10**(db/20)
+    h = array.array('f', (0 for x in range(taps)))
+    for n in range(taps):
+        s = gain[0]
+        for k in range(1, m + 1):
+            s += 2*gain[k]*math.cos(2*math.pi*k*(n - m)/taps)
+        h[n] = s/taps*(0.54 - 0.46*math.cos(2*math.pi*n/(taps - 1)))
+    return h
+
+class FastConv(object):
+    # taps: FIR coefficients. length: transform length, default the smallest power
+    # of two of at least 4*(P - 1).
+    def __init__(self, taps, length=None):
+        p = len(taps)
+        if length is None:
+            length = 2
+            while length < 4*(p - 1):
+                length <<= 1
+        assert length > p, "Transform must be longer than the filter"
+        self.length = length
+        self._overlap = p - 1
+        self.block = 2*(length - p + 1)
+        self._dft = DFT(length, table=True)
+        self._hist = array.array('f', (0 for x in range(p - 1)))
+        re = self._dft.re
+        im = self._dft.im
+        for i in range(length):         # Filter spectrum, scaled by 1/L for REVERSE
+            re[i] = taps[i] if i < p else 0.0
+            im[i] = 0.0
+        fft_fast(self._dft.ctrl, FORWARD | TABLE | NOSCALE)
+        self._fh = array.array('f', (0 for x in range(2*length)))
+        for i in range(length):
+            self._fh[2*i] = re[i]/length
+            self._fh[2*i + 1] = im[i]/length
+
+    # Filter block input samples x into y
+    def process(self, x, y):
+        re = self._dft.re
+        im = self._dft.im
+        hist = self._hist
+        ov = self._overlap
+        n = self.length
+        b = n - ov                      # Valid outputs per segment
+        for i in range(ov):             # Segment 1: history then x[0..b - 1]
+            re[i] = hist[i]
+        for i in range(b):
+            re[ov + i] = x[i]
+        for i in range(n):              # Segment 2: x[b - ov..2b - 1]
+            im[i] = re[b + i] if b + i < n else x[b + i - ov]
+        for i in range(ov):             # Last ov samples of history then x
+            j = 2*b + i
+            hist[i] = hist[j] if j < ov else x[j - ov]
+        ctrl = self._dft.ctrl
+        fft_fast(ctrl, FORWARD | TABLE | NOSCALE)
+        cmultiply(re, im, self._fh, n)
+        fft_fast(ctrl, REVERSE | TABLE)
+        for i in range(b):
+            y[i] = re[ov + i]
+            y[b + i] = im[ov + i]
+        return y
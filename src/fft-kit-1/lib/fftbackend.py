@@ -0,0 +1,252 @@
+# fftbackend.py Choose the fastest FFT engine available on this board
+# Engines:
+# asm     lib/dft fft_fast() via dftclass.DFT in real interleaved mode. Needs an FPU
+#         (Cortex-M4/M7).
+# viper   lib/fixfft fixed point. Needs the viper emitter: runs on the RP2040.
+# native  lib/pyfft radix 4 under the native code emitter.
+# python  Radix 2 in plain Python: runs anywhere.
+# On first use for a given length select() builds each engine which imports with the
+# requested window, checks it against a test tone, times it and saves the name of the
+# fastest correct one in FILENAME. Later calls use the saved choice without
+# benchmarking.
+# Every engine has the same interface:
+# engine = Engine(length, winfunc=None)
+# winfunc: None, a function f(x, length) or a key of fftplan.windows. Given a name the
+# asm engine applies the window to the spectrum (dftclass fwindow) with no window pass.
+# Windowed engines remove the frame mean (DC) first, as window.winapply(): unwindowed
+# ones keep it.
+# engine.load(buf)   buf: array('i') of length raw 32 bit INMP441 I2S words.
+# mags = engine.run() Returns an array whose first length//2 elements are bin magnitudes.
+# Multiply by engine.scale to get |X[k]|/length in units of the 24 bit sample: a
+# full scale sine then gives 2**22 in its bin. scale is updated by each run().
+
+import array
+import math
+import fftplan
+try:
+    import ujson as json
+except ImportError:
+    import json
+try:
+    from utime import ticks_us, ticks_diff
+except ImportError:             # CPython
+    import time
+    ticks_us = lambda: time.perf_counter_ns() // 1000
+    ticks_diff = lambda a, b: a - b
+
+FILENAME = 'fftbackend.json'
+
+class AsmEngine(object):
+    name = 'asm'
+    def __init__(self, length, winfunc=None):
+        from dftclass import DFT, POLAR
+        from window import icopy
+        self._icopy = icopy
+        self._polar = POLAR
+        if isinstance(winfunc, str):
+            self._dft = DFT(length, real=True, table=True, fwindow=winfunc, interleaved=True)
+        else:
+            self._dft = DFT(length, winfunc=winfunc, real=True, table=True, interleaved=True)
+        self._dft.scale = 1/(256*length) # icopy() does not shift the 24 bit data down
+        self.scale = 1.0
+
+    def load(self, buf):
+        self._icopy(buf, self._dft.re, self._dft.length)
+
+    def run(self):
+        self._dft.run(self._polar)
+        return self._dft.re
+
+class ViperEngine(object):
+    name = 'viper'
+    def __init__(self, length, winfunc=None):
+        from fixfft import FixFFT
+        if isinstance(winfunc, str):
+            winfunc = fftplan.windows[winfunc]
+        self._fft = FixFFT(length, winfunc)
+        self.scale = 1.0
+
+    def load(self, buf):
+        self._fft.load(buf)
+
+    def run(self):
+        mags = self._fft.run()
+        self.scale = 2**self._fft.exponent/self._fft.length
+        return mags
+
+# Float engines take their window and tables from a shared fftplan.FFTPlan
+class _FloatEngine(object):
+    def __init__(self, length, winfunc=None):
+        self._length = length
+        self.re = array.array('f', (0 for x in range(length)))
+        self.im = array.array('f', (0 for x in range(length)))
+        self.mags = array.array('f', (0 for x in range(length//2)))
+        self._plan = fftplan.get(length, winfunc)
+        self._leaf = None               # Unrolled first stages: radix4_fft() only
+        self.scale = 1/length
+
+    def load(self, buf):
+        re = self.re
+        im = self.im
+        win = self._plan.win
+        n = self._length
+        mean = 0
+        if win is not None:             # Remove DC as window.winapply()
+            for i in range(n):
+                mean += buf[i] >> 8
+            mean /= n
+        for i in range(n):
+            re[i] = buf[i] >> 8 if win is None else ((buf[i] >> 8) - mean)*win[i]
+            im[i] = 0.0
+
+    def run(self):
+        plan = self._plan
+        if self._leaf is None:
+            self._fft(self.re, self.im, plan.swaps, plan.wr, plan.wi)
+        else:
+            self._fft(self.re, self.im, plan.swaps, plan.wr, plan.wi, 0, self._leaf)
+        re = self.re
+        im = self.im
+        mags = self.mags
+        for i in range(self._length//2):
+            mags[i] = math.sqrt(re[i]*re[i] + im[i]*im[i])
+        return mags
+
+class NativeEngine(_FloatEngine):
+    name = 'native'
+    def __init__(self, length, winfunc=None):
+        from pyfft import radix4_fft
+        self._fft = radix4_fft
+        super().__init__(length, winfunc)
+        self._leaf = self._plan.leaf
+
+# Radix 2 in place FFT: as iterative_fft() in faster-fft.py
+def _radix2_fft(real, imag, swaps, wr, wi):
+    n = len(real)
+    for k in range(0, len(swaps), 2):
+        i = swaps[k]
+        j = swaps[k + 1]
+        real[i], real[j] = real[j], real[i]
+        imag[i], imag[j] = imag[j], imag[i]
+    m2 = 1
+    while m2 < n:
+        m = m2 << 1
+        step = n//m
+        for j in range(m2):
+            if wi is None:              # Quarter wave table
+                c, s = fftplan.twiddle(wr, j*step)
+            else:
+                c = wr[j*step]
+                s = wi[j*step]
+            for i in range(j, n, m):
+                i1 = i + m2
+                tr = real[i1]*c - imag[i1]*s
+                ti = real[i1]*s + imag[i1]*c
+                real[i1] = real[i] - tr
+                imag[i1] = imag[i] - ti
+                real[i] += tr
+                imag[i] += ti
+        m2 = m
+
+class PythonEngine(_FloatEngine):
+    name = 'python'
+    def __init__(self, length, winfunc=None):
+        self._fft = _radix2_fft
+        super().__init__(length, winfunc)
+
+# Candidate engines in order of preference when timings are equal
+backends = [AsmEngine, ViperEngine, NativeEngine, PythonEngine]
+
+def register(cls):              # Add an engine class with the interface above
+    backends.insert(0, cls)
+    return cls
+
+def _create(cls, length, winfunc):
+    try:
+        return cls(length, winfunc)
+    except Exception:           # Module missing, or emitter/instructions unsupported
+        return None
+
+# Return True if the engine finds a test tone in the right bin at the right level.
+# gain: mean window coefficient, dc: expected level of bin 0. Bins beside the tone
+# are not checked if windowed: their level depends on the window.
+def _check(engine, buf, length, k, amplitude, gain, dc):
+    engine.load(buf)
+    mags = engine.run()
+    for i in range(length//2):
+        if gain != 1 and abs(i - k) == 1:
+            continue
+        expected = amplitude*gain/2 if i == k else dc if i == 0 else 0
+        if abs(mags[i]*engine.scale - expected) > amplitude/50:
+            return False
+    return True
+
+def _time(engine, buf, reps):
+    best = None
+    for _ in range(reps):
+        t = ticks_us()
+        engine.load(buf)
+        engine.run()
+        dt = ticks_diff(ticks_us(), t)
+        best = dt if best is None or dt < best else best
+    return best
+
+# Benchmark all engines at this length, built with winfunc. Returns a list of
+# (time_us, name) of those which passed the check, fastest first.
+# The test tone has a DC offset: a windowed engine must remove it, an unwindowed
+# one must report it in bin 0.
+def autotune(length, winfunc=None, reps=3):
+    k = length//8 + 1           # Test tone bin, amplitude 2**22
+    amplitude = 1 << 22
+    offset = amplitude >> 2
+    buf = array.array('i', ((round(amplitude*math.cos(2*math.pi*k*i/length)) + offset) << 8
+                            for i in range(length)))
+    gain = 1
+    if winfunc is not None:
+        func = fftplan.windows[winfunc] if isinstance(winfunc, str) else winfunc
+        gain = sum(func(x, length) for x in range(length))/length
+    dc = offset if winfunc is None else 0
+    results = []
+    for cls in backends:
+        engine = _create(cls, length, winfunc)
+        if engine is not None:
+            try:
+                ok = _check(engine, buf, length, k, amplitude, gain, dc)
+            except Exception:
+                ok = False
+            if ok:
+                results.append((_time(engine, buf, reps), cls.name))
+    results.sort(key=lambda r: r[0])
+    return results
+
+def _load():
+    try:
+        with open(FILENAME) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save(choices):
+    try:
+        with open(FILENAME, 'w') as f:
+            json.dump(choices, f)
+    except OSError:             # Read only filesystem: retune next boot
+        pass
+
+# Return an engine of the given length, benchmarking on first use or if retune is True
+def select(length, winfunc=None, retune=False):
+    choices = _load()
+    name = None if retune else choices.get(str(length))
+    for cls in backends:        # Use the saved choice if it still works
+        if cls.name == name:
+            engine = _create(cls, length, winfunc)
+            if engine is not None:
+                return engine
+    results = autotune(length, winfunc)
+    if not results:
+        raise OSError('No FFT engine available')
+    choices[str(length)] = results[0][1]
+    _save(choices)
+    for cls in backends:
+        if cls.name == results[0][1]:
+            return cls(length, winfunc)
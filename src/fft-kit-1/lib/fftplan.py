@@ -0,0 +1,150 @@
+# fftplan.py Tables for an FFT, built once and shared by all users
+# A plan holds everything that depends only on the FFT size, window, sample rate and
+# display: the window coefficients, bit reversal swaps, twiddle factors and the map
+# grouping spectrum bins into display bars. Building these takes seconds on a slow
+# core; get() returns an existing plan with a dictionary lookup.
+# Plans are kept in least recently used order. When their estimated size exceeds
+# budget bytes the oldest are dropped (a plan still referenced by a user stays
+# valid, it is just no longer shared).
+# Usage:
+# plan = fftplan.get(512, 'hanning', 16000, 64)
+# radix4_fft(re, im, plan.swaps, plan.wr, plan.wi, 0, plan.leaf)
+# plan.group(magnitudes, bars)
+# A plan made with reverse=True groups the output of a decimation in frequency FFT
+# (dftclass.DFT(dif=True)) which leaves bin k at index rev(k): the bar map is then
+# a list of indices rather than a range, so no bit reversal pass is needed.
+
+import array
+import math
+try:
+    import codelets             # Generated by tools/gencodelets.py
+except ImportError:
+    codelets = None
+
+budget = 32768                  # Bytes of tables to keep cached
+compact = 4096                  # Plans of this size and larger hold a quarter wave table
+
+# Window functions as used by the scripts: coefficient x of length
+windows = {
+    'hanning': lambda x, length: 0.5*(1 - math.cos(2*math.pi*x/(length - 1))),
+    'hamming': lambda x, length: 0.54 - 0.46*math.cos(2*math.pi*x/(length - 1)),
+}
+
+# Bit reversed reordering as a list of swaps: i0, j0, i1, j1... with i < j.
+# The reordering loop then touches only elements which move, once each, with no
+# table lookup or comparison for fixed points or for the second index of a pair.
+# j is a bit reversed counter, incremented by propagating a carry from the top bit.
+def swap_pairs(n):
+    pairs = array.array('H')
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j ^= bit
+        if i < j:
+            pairs.append(i)
+            pairs.append(j)
+    return pairs
+
+# Large plans store a quarter wave cosine table in wr and set wi to None: a quarter
+# of the size of wr and wi, from which the kernels reconstruct each twiddle factor
+# by symmetry. At 4096 points this saves 12KB.
+# Returns W(n)**t = exp(-2j*pi*t/n) for 0 <= t < 3n/4 as (real, imag) where
+# tab[k] = cos(2*pi*k/n) for k in 0..n/4.
+def twiddle(tab, t):
+    q = len(tab) - 1
+    if t <= q:
+        return tab[t], -tab[q - t]
+    if t <= 2*q:                # cos(pi/2 + x) = -sin(x), sin(pi/2 + x) = cos(x)
+        return -tab[2*q - t], -tab[t - q]
+    t -= 2*q                    # W(n)**(t + n/2) = -W(n)**t
+    return -tab[t], tab[q - t]
+
+class FFTPlan(object):
+    # window: None, a key of windows or a function f(x, length)
+    # rate: sample rate (Hz), for bin_hz
+    # nbars: display bars spanning the first span bins (default size//2)
+    # reverse: magnitudes passed to group() are in bit reversed order
+    def __init__(self, size, window=None, rate=0, nbars=0, span=None, reverse=False):
+        bits = round(math.log(size)/math.log(2))
+        assert 2**bits == size, "Length must be an integer power of two"
+        self.size = size
+        self.bin_hz = rate/size
+        if window is None:
+            self.win = None
+        else:
+            func = windows[window] if isinstance(window, str) else window
+            self.win = array.array('f', (func(x, size) for x in range(size)))
+        self.swaps = swap_pairs(size)
+        # Largest unrolled leaf for radix4_fft() leaving an even number of stages
+        self.leaf = None
+        if codelets is not None:
+            for lsize, leaf in codelets.leaves:
+                if lsize <= size and not (bits - lsize.bit_length() + 1) & 1:
+                    self.leaf = leaf
+                    break
+        if size >= compact:             # cos(2*pi*k/size) for k in 0..size/4: see twiddle()
+            self.wr = array.array('f', (math.cos(2*math.pi*k/size) for k in range(size//4 + 1)))
+            self.wi = None
+        else:
+            self.wr = array.array('f', (math.cos(-2*math.pi*k/size) for k in range(size//2)))
+            self.wi = array.array('f', (math.sin(-2*math.pi*k/size) for k in range(size//2)))
+        # Bar i averages bins bars[i] to bars[i + 1] - 1
+        span = size//2 if span is None else span
+        width = span//nbars if nbars else 0
+        self.bars = array.array('H', (min(i*width, span) for i in range(nbars + 1)))
+        # Bin k is at index binmap[k], or at k if binmap is None
+        self.binmap = None
+        if reverse:
+            self.binmap = array.array('H', (0 for k in range(span)))
+            for k in range(span):
+                r = 0
+                for b in range(bits):
+                    r = (r << 1) | ((k >> b) & 1)
+                self.binmap[k] = r
+        self.nbytes = 2*len(self.swaps) + 4*(len(self.wr) if self.wi is None else size)
+        self.nbytes += (4*size if window is not None else 0) + 2*(nbars + 1)
+        self.nbytes += 2*span if reverse else 0
+
+    # Average magnitudes into bars, an array of at least nbars elements
+    def group(self, mags, bars):
+        edges = self.bars
+        binmap = self.binmap
+        for i in range(len(edges) - 1):
+            start = edges[i]
+            end = edges[i + 1]
+            s = 0
+            if binmap is None:
+                for j in range(start, end):
+                    s += mags[j]
+            else:
+                for j in range(start, end):
+                    s += mags[binmap[j]]
+            bars[i] = s/(end - start) if end > start else 0
+        return bars
+
+_plans = {}
+_order = []                     # Keys, least recently used first
+
+def get(size, window=None, rate=0, nbars=0, span=None, reverse=False):
+    key = (size, window, rate, nbars, span, reverse)
+    if key in _plans:
+        _order.remove(key)
+        _order.append(key)
+        return _plans[key]
+    plan = FFTPlan(size, window, rate, nbars, span, reverse)
+    _plans[key] = plan
+    _order.append(key)
+    total = 0
+    for k in _order:
+        total += _plans[k].nbytes
+    while total > budget and len(_order) > 1:
+        old = _order.pop(0)
+        total -= _plans.pop(old).nbytes
+    return plan
+
+def clear():
+    _plans.clear()
+    del _order[:]
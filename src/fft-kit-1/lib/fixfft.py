@@ -0,0 +1,202 @@
+# fixfft.py Fixed point FFT for boards without an FPU
+# Runs on the RP2040 (Cortex-M0+) where lib/dft.fft cannot: the FPU mnemonics
+# it uses are unavailable and float arithmetic is done in software.
+# Uses the viper code emitter only, so behaves identically on the unix port.
+# Data are int32 arrays; twiddle factors are Q15 in an array('h').
+# Input is 24 bit audio: INMP441 32 bit words shifted right by 8. With a window the
+# frame mean (DC) is removed first, as window.winapply().
+# Block floating point: after each stage the peak component is checked and the
+# next stage's results are shifted right only if there is insufficient headroom.
+# Quiet signals are normalised up; loud ones cannot overflow. The net shift
+# is returned as a shared exponent: the unscaled DFT is re, im, mags * 2**exponent.
+# Magnitudes are integers, approximated by max(|re|, |im|) + 0.40625*min(|re|, |im|)
+# tools/pyfftbench.py times run() against the scripts' float iterative_fft() under
+# MicroPython (unix port or board).
+
+import array
+import math
+from fftplan import swap_pairs
+
+# Sum of n 24 bit samples in two parts which cannot overflow: sums[0] is the sum of
+# x >> 12, sums[1] that of x & 0xfff
+@micropython.viper
+def _sum(buf, sums, n: int):
+    src = ptr32(buf)
+    s = ptr32(sums)
+    hi = 0
+    lo = 0
+    for i in range(n):
+        x = src[i] >> 8
+        hi += x >> 12
+        lo += x & 0xfff
+    s[0] = hi
+    s[1] = lo
+
+# Load and window raw I2S data
+# buf: 32 bit little endian words from I2S.readinto()
+# re, im: int32 data arrays
+# win: Q15 window coefficients, ignored if n_win == 0
+# mean: subtracted from each sample before windowing, as window.winapply()
+@micropython.viper
+def _load(buf, re, im, win, n: int, n_win: int, mean: int):
+    src = ptr32(buf)
+    dre = ptr32(re)
+    dim = ptr32(im)
+    w = ptr16(win)
+    for i in range(n):
+        x = src[i] >> 8                 # 24 bit sample
+        if n_win:
+            x -= mean
+            c = (w[i] ^ 0x8000) - 0x8000    # Sign extend Q15
+            x = (x >> 15)*c + (((x & 0x7fff)*c) >> 15)
+        dre[i] = x
+        dim[i] = 0
+
+# Swap elements into bit reversed order
+# swaps: array('H') swap pairs from fftplan.swap_pairs(), n its length
+@micropython.viper
+def _reverse(re, im, swaps, n: int):
+    dre = ptr32(re)
+    dim = ptr32(im)
+    p = ptr16(swaps)
+    for k in range(0, n, 2):
+        i = p[k]
+        j = p[k + 1]
+        t = dre[i]
+        dre[i] = dre[j]
+        dre[j] = t
+        t = dim[i]
+        dim[i] = dim[j]
+        dim[j] = t
+
+# Radix 2 decimation in time butterflies on bit reversed data
+# tw: Q15 (cos, sin) pairs of 2*pi*k/n for k in 0..n/2 - 1
+# A product x*c of a 32 bit value and a Q15 coefficient is formed as
+# (x >> 15)*c + ((x & 0x7fff)*c >> 15) to avoid overflowing 32 bits.
+# A stage can grow a component by up to 1 + sqrt(2). Its results are shifted by 1
+# if the incoming peak is >= 2**28 and by 2 if >= 2**29, which keeps all values
+# below 2**29.3 and intermediate sums below 2**31. Quiet input is first shifted
+# left so that its peak is at least 2**27. Returns the net right shift.
+@micropython.viper
+def _butterflies(re, im, tw, n: int) -> int:
+    dre = ptr32(re)
+    dim = ptr32(im)
+    w = ptr16(tw)
+    peak = 0
+    for i in range(n):                  # x ^ (x >> 31) is a cheap abs(x) - 1
+        x = dre[i]
+        peak |= x ^ (x >> 31)
+        x = dim[i]
+        peak |= x ^ (x >> 31)
+    exponent = 0
+    if peak:                            # Normalise quiet input to use the headroom
+        while peak < 0x8000000:
+            peak <<= 1
+            exponent -= 1
+        if exponent:
+            sh = 0 - exponent
+            for i in range(n):
+                dre[i] = dre[i] << sh
+                dim[i] = dim[i] << sh
+    l1 = 1
+    step = n                            # Twiddle index step in halfwords: 2*n/l2
+    while l1 < n:
+        sh = 0
+        if peak >= 0x20000000:
+            sh = 2
+        elif peak >= 0x10000000:
+            sh = 1
+        exponent += sh
+        peak = 0
+        l2 = l1 << 1
+        k = 0
+        for j in range(l1):
+            c = (w[k] ^ 0x8000) - 0x8000
+            s = (w[k + 1] ^ 0x8000) - 0x8000
+            k += step
+            i = j
+            while i < n:
+                i1 = i + l1
+                br = dre[i1]
+                bi = dim[i1]
+                # t = b*conj(w)
+                tr = ((br >> 15)*c + (((br & 0x7fff)*c) >> 15)
+                      + (bi >> 15)*s + (((bi & 0x7fff)*s) >> 15))
+                ti = ((bi >> 15)*c + (((bi & 0x7fff)*c) >> 15)
+                      - (br >> 15)*s - (((br & 0x7fff)*s) >> 15))
+                ar = dre[i]
+                ai = dim[i]
+                x = (ar + tr) >> sh
+                dre[i] = x
+                peak |= x ^ (x >> 31)
+                x = (ai + ti) >> sh
+                dim[i] = x
+                peak |= x ^ (x >> 31)
+                x = (ar - tr) >> sh
+                dre[i1] = x
+                peak |= x ^ (x >> 31)
+                x = (ai - ti) >> sh
+                dim[i1] = x
+                peak |= x ^ (x >> 31)
+                i += l2
+        l1 = l2
+        step >>= 1
+    return exponent
+
+# Approximate magnitudes of the first n elements
+@micropython.viper
+def _magnitudes(re, im, mags, n: int):
+    dre = ptr32(re)
+    dim = ptr32(im)
+    dm = ptr32(mags)
+    for i in range(n):
+        a = dre[i]
+        if a < 0:
+            a = 0 - a
+        b = dim[i]
+        if b < 0:
+            b = 0 - b
+        if a > b:                       # 13/32 = 1/4 + 1/8 + 1/32 without overflow
+            dm[i] = a + (b >> 2) + (b >> 3) + (b >> 5)
+        else:
+            dm[i] = b + (a >> 2) + (a >> 3) + (a >> 5)
+
+class FixFFT(object):
+    def __init__(self, length, winfunc=None):
+        bits = round(math.log(length)/math.log(2))
+        assert 2**bits == length, "Length must be an integer power of two"
+        self._length = length
+        self.exponent = 0               # Shared exponent of the last run()
+        self.re = array.array('i', (0 for x in range(length)))
+        self.im = array.array('i', (0 for x in range(length)))
+        self.mags = array.array('i', (0 for x in range(length//2)))
+        self._tw = array.array('h', (0 for x in range(length)))
+        for k in range(length//2):      # Q15 twiddle factors
+            self._tw[2*k] = round(32767*math.cos(2*math.pi*k/length))
+            self._tw[2*k +1] = round(32767*math.sin(2*math.pi*k/length))
+        self._swaps = swap_pairs(length)
+        self._win = array.array('h', (0 for x in range(length if winfunc is not None else 1)))
+        self._sums = array.array('i', [0, 0])
+        if winfunc is not None:
+            for x in range(length):
+                self._win[x] = round(32767*winfunc(x, length))
+
+    @property
+    def length(self):
+        return self._length  # Read only
+
+    def load(self, buf):                # Raw I2S data: length 32 bit words
+        n = self._length
+        n_win = n if len(self._win) > 1 else 0
+        mean = 0
+        if n_win:                       # Remove DC as window.winapply()
+            sums = self._sums
+            _sum(buf, sums, n)
+            mean = (sums[0]*4096 + sums[1] + n//2)//n
+        _load(buf, self.re, self.im, self._win, n, n_win, mean)
+
+    def run(self):                      # Transform re, im and return magnitudes
+        _reverse(self.re, self.im, self._swaps, len(self._swaps))
+        self.exponent = _butterflies(self.re, self.im, self._tw, self._length)
+        _magnitudes(self.re, self.im, self.mags, self._length//2)
+        return self.mags
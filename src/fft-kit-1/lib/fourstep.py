@@ -0,0 +1,191 @@
+# fourstep.py Large real FFTs in little more RAM than the samples themselves
+# A length N = n1*n2 transform is done as n2 column FFTs of length n1 followed by
+# n1 row FFTs of length n2 (the four step algorithm), n1 <= n2 both near sqrt(N).
+# Only the frame of N float samples is held: each sub-FFT copies one column or row
+# into a small working buffer, transforms it with pyfft.radix4_fft() and writes
+# the result back in place. dftclass.DFT would need re, im and windata (12N bytes
+# plus the magnitude pass) where this needs 4N plus tables of O(sqrt(N)).
+# 8192 and 16384 points (sub Hz bins at 8KHz) then fit where DFT cannot.
+# Columns: sample n = i*n2 + c. The input is real so two columns are transformed
+# by one complex FFT and split. Column spectra are Hermitian: of each only bins
+# 0..n1/2 are kept, packed into n1 floats. The packed rows are contiguous:
+#   row 0: Re Y[0]   row 1: Re Y[n1/2]   rows 2k, 2k + 1: Re Y[k], Im Y[k]
+# Rows: row k1 times the twiddles W(N)**(k1*c) transforms to X[k1 + n1*k2]. The
+# twiddles are formed on the fly as W(n1)**a * W(N)**b with a*n2 + b = k1*c, from
+# two tables of n1/2 and n2 entries.
+# Output: the frame is overwritten by |X[k]| for all k, unscaled, bin k at index(k).
+# Bins k1 + n1*k2 with k1 > n1/2 are mirror images |X[N - k]|.
+# Usage:
+# fs = FourStep(fourstep.largest(gc.mem_free()//2), 'hanning')
+# fs.data[i] = sample          # Fill with N floats
+# fs.run()
+# fs.magnitudes(out, start)     # |X[start + i]|*fs.scale into out, natural order
+# Windows: 'hanning' or 'hamming' as fftplan.windows, a - b*cos(t*n) with
+# t = 2*pi/(N - 1). Rather than store N coefficients, sample n = i*n2 + c is
+# weighted by a - b*(cos(t*i*n2)*cos(t*c) - sin(t*i*n2)*sin(t*c)) from tables of
+# n1 and n2 cos, sin pairs: no trig call per sample.
+
+import array
+import math
+try:
+    import micropython
+except ImportError:             # CPython: the decorator has no effect
+    class micropython:
+        native = staticmethod(lambda f: f)
+import fftplan
+from pyfft import radix4_fft
+
+_cosine = {'hanning': (0.5, 0.5), 'hamming': (0.54, 0.46)}  # a, b
+
+# Estimated bytes for a FourStep of this length: the frame, working buffers, twiddle
+# and window tables and the two sub-FFT plans (at most 2n swaps and 4n twiddle bytes
+# each).
+def nbytes(length):
+    n1, n2 = _split(length)
+    return 4*length + 4*(2*n1 + 2*n2) + 4*(n1 + 2*n2) + 4*(2*n1 + 2*n2) + 6*(n1 + n2)
+
+# Largest length whose FourStep fits in budget bytes, or 0
+def largest(budget):
+    length = 0
+    while nbytes(max(length << 1, 16)) <= budget:
+        length = max(length << 1, 16)
+    return length
+
+def _split(length):
+    bits = round(math.log(length)/math.log(2))
+    assert 2**bits == length and bits >= 4, "Length must be an integer power of two >= 16"
+    n1 = 1 << (bits >> 1)
+    return n1, length // n1
+
+# Column FFTs, two per complex FFT. x: frame, re, im: length n1 buffers.
+# win: None or (a, b, cos, sin of t*i*n2 for i < n1, cos, sin of t*c for c < n2)
+@micropython.native
+def _columns(x, re, im, plan, n2, win):
+    n1 = len(re)
+    h = n1 >> 1
+    for c in range(0, n2, 2):
+        if win is None:
+            for i in range(n1):
+                n = i*n2 + c
+                re[i] = x[n]
+                im[i] = x[n + 1]
+        else:
+            a, b, ri, si, rc, sc = win
+            r0 = rc[c]
+            s0 = sc[c]
+            r1 = rc[c + 1]
+            s1 = sc[c + 1]
+            for i in range(n1):
+                n = i*n2 + c
+                re[i] = x[n]*(a - b*(ri[i]*r0 - si[i]*s0))
+                im[i] = x[n + 1]*(a - b*(ri[i]*r1 - si[i]*s1))
+        radix4_fft(re, im, plan.swaps, plan.wr, plan.wi, 0, plan.leaf)
+        # Z = A + jB: A[k] = (Z[k] + conj Z[n1 - k])/2, B[k] = (Z[k] - conj Z[n1 - k])/2j
+        x[c] = re[0]            # DC and n1/2 bins of real data are real
+        x[c + 1] = im[0]
+        x[n2 + c] = re[h]
+        x[n2 + c + 1] = im[h]
+        for k in range(1, h):
+            zr = re[k]
+            zi = im[k]
+            yr = re[n1 - k]
+            yi = im[n1 - k]
+            n = 2*k*n2 + c
+            x[n] = (zr + yr)*0.5
+            x[n + n2] = (zi - yi)*0.5
+            x[n + 1] = (zi + yi)*0.5
+            x[n + n2 + 1] = (yr - zr)*0.5
+
+# Row FFTs. re, im: length n2 buffers. cr, ci: W(n1)**a for a < n1/2.
+# fr, fi: W(N)**b for b < n2.
+@micropython.native
+def _rows(x, re, im, plan, n1, cr, ci, fr, fi):
+    n2 = len(re)
+    h = n1 >> 1
+    for k1 in range(h + 1):
+        if k1 == 0:             # Packed rows of real values
+            src = 0
+        elif k1 == h:
+            src = n2
+        else:
+            src = 2*k1*n2
+        a = 0
+        b = 0
+        for i in range(n2):     # Twiddle W(N)**(k1*i)
+            xr = x[src + i]
+            xi = 0.0 if k1 == 0 or k1 == h else x[src + n2 + i]
+            wr = cr[a]*fr[b] - ci[a]*fi[b]
+            wi = cr[a]*fi[b] + ci[a]*fr[b]
+            re[i] = xr*wr - xi*wi
+            im[i] = xr*wi + xi*wr
+            b += k1
+            if b >= n2:
+                b -= n2
+                a += 1
+        radix4_fft(re, im, plan.swaps, plan.wr, plan.wi, 0, plan.leaf)
+        for k2 in range(n2):    # |X[k1 + n1*k2]|
+            x[src + k2] = math.sqrt(re[k2]*re[k2] + im[k2]*im[k2])
+        if 0 < k1 < h:          # |X[n1 - k1 + n1*k2]| = |X[k1 + n1*(n2 - 1 - k2)]|
+            for k2 in range(n2):
+                r = re[n2 - 1 - k2]
+                j = im[n2 - 1 - k2]
+                x[src + n2 + k2] = math.sqrt(r*r + j*j)
+
+class FourStep(object):
+    # winfunc: None, 'hanning' or 'hamming'
+    def __init__(self, length, winfunc=None):
+        assert winfunc is None or winfunc in _cosine, "Window must be 'hanning' or 'hamming'"
+        n1, n2 = _split(length)
+        self.length = length
+        self.n1 = n1
+        self.n2 = n2
+        self.scale = 1/length
+        self._win = None
+        if winfunc is not None:
+            t = 2*math.pi/(length - 1)
+            a, b = _cosine[winfunc]
+            self._win = (a, b, array.array('f', (math.cos(t*i*n2) for i in range(n1))),
+                         array.array('f', (math.sin(t*i*n2) for i in range(n1))),
+                         array.array('f', (math.cos(t*c) for c in range(n2))),
+                         array.array('f', (math.sin(t*c) for c in range(n2))))
+        self.data = array.array('f', (0 for x in range(length)))
+        self._cre = array.array('f', (0 for x in range(n1)))
+        self._cim = array.array('f', (0 for x in range(n1)))
+        self._rre = array.array('f', (0 for x in range(n2)))
+        self._rim = array.array('f', (0 for x in range(n2)))
+        self._cr = array.array('f', (math.cos(-2*math.pi*a/n1) for a in range(n1//2)))
+        self._ci = array.array('f', (math.sin(-2*math.pi*a/n1) for a in range(n1//2)))
+        self._fr = array.array('f', (math.cos(-2*math.pi*b/length) for b in range(n2)))
+        self._fi = array.array('f', (math.sin(-2*math.pi*b/length) for b in range(n2)))
+        self._p1 = fftplan.get(n1)
+        self._p2 = fftplan.get(n2)
+        self.nbytes = 4*length + 4*(3*n1 + 4*n2) + self._p1.nbytes + self._p2.nbytes
+        if self._win is not None:
+            self.nbytes += 4*(2*n1 + 2*n2)
+
+    # Transform data in place to magnitudes: see index()
+    def run(self):
+        _columns(self.data, self._cre, self._cim, self._p1, self.n2, self._win)
+        _rows(self.data, self._rre, self._rim, self._p2, self.n1, self._cr, self._ci, self._fr, self._fi)
+
+    # Index in data of |X[k]| after run(), 0 <= k < length
+    def index(self, k):
+        n1 = self.n1
+        n2 = self.n2
+        k1 = k % n1
+        k2 = k // n1
+        if k1 == 0:
+            return k2
+        if k1 == n1 >> 1:
+            return n2 + k2
+        if k1 < n1 >> 1:
+            return 2*k1*n2 + k2
+        return (2*(n1 - k1) + 1)*n2 + k2
+
+    # Copy scaled magnitudes of bins start.. into out in natural order
+    def magnitudes(self, out, start=0):
+        data = self.data
+        scale = self.scale
+        for i in range(len(out)):
+            out[i] = data[self.index(start + i)]*scale
+        return out
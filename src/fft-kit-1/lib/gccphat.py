@@ -0,0 +1,128 @@
+# gccphat.py Time delay between two microphones by GCC-PHAT
+# Generalised cross-correlation with phase transform weighting: the cross-spectrum
+# A[k]*conj(B[k]) of the two frames is normalised to unit magnitude so every
+# frequency contributes equally, and its inverse transform peaks sharply at the
+# delay. Direct cross-correlation is O(N*N): here it is three FFT based passes.
+# The two real frames are transformed together by one complex FFT (dftclass.DFT
+# pair mode). phat() forms the weighted cross-spectrum as a full Hermitian spectrum
+# in an interleaved complex DFT, which dft.fft_fast() transforms back (REVERSE).
+# The peak within maxlag is refined to a fraction of a sample by fitting a parabola
+# through it and its neighbours.
+# Requires the assembler (FPU boards), as lib/dft.
+# Usage:
+# gp = GCCPhat(512, maxlag=20)
+# gp.loadstereo(buf)    # buf: array('i') of 2*512 raw I2S words, left and right
+#                       # alternating (INMP441 pair). Or gp.load(left, right).
+# delay = gp.run()      # Samples by which right lags left (negative: it leads)
+# gp.peak is the height of the correlation peak: 1.0 for identical frames, near 0
+# for uncorrelated ones.
+
+import array
+from dft import fft_fast
+from dftclass import DFT, FORWARD, REVERSE, TABLE
+
+# PHAT weighted cross-spectrum G[k] = A[k]*conj(B[k])/(abs(A[k]*conj(B[k])) + eps)
+# r0: ctrl of a pair mode DFT of length N: A[k] at re[k], im[k], B[k] at re[N/2 + k],
+# im[N/2 + k] for k < N/2
+# r1: interleaved array of N complex: G[k] and G[N - k] = conj(G[k]) for 0 < k < N/2.
+# G[0] and G[N/2] are zero: DC and Nyquist carry no delay information.
+# r2: array('f', [eps])
+@micropython.asm_thumb
+def phat(r0, r1, r2):
+    ldr(r3, [r0, 0])
+    lsr(r3, r3, 1)      # r3 = N/2
+    ldr(r4, [r0, 8])    # r4 = &A.re[k]
+    ldr(r5, [r0, 12])   # r5 = &A.im[k]
+    vldr(s8, [r2, 0])   # eps
+    lsl(r6, r3, 2)      # r6 = offset of B from A
+    lsl(r7, r3, 4)
+    add(r7, r7, r1)     # r7 = &G[N - k] for k = 0
+    mov(r2, 0)
+    str(r2, [r1, 0])    # G[0]
+    str(r2, [r1, 4])
+    lsl(r0, r3, 3)
+    add(r0, r0, r1)
+    str(r2, [r0, 0])    # G[N/2]
+    str(r2, [r0, 4])
+    sub(r3, 1)
+    beq(DONE)
+    label(LOOP)         #                       ** for k in range(1, N/2):
+    add(r4, 4)
+    add(r5, 4)
+    add(r1, 8)
+    sub(r7, 8)
+    vldr(s0, [r4, 0])   # A.re
+    vldr(s1, [r5, 0])   # A.im
+    add(r0, r4, r6)
+    vldr(s2, [r0, 0])   # B.re
+    add(r0, r5, r6)
+    vldr(s3, [r0, 0])   # B.im
+    vmul(s4, s0, s2)
+    vmul(s5, s1, s3)
+    vadd(s4, s4, s5)    # (A*conj(B)).re
+    vmul(s5, s1, s2)
+    vmul(s6, s0, s3)
+    vsub(s5, s5, s6)    # (A*conj(B)).im
+    vmul(s6, s4, s4)
+    vmul(s7, s5, s5)
+    vadd(s6, s6, s7)
+    vsqrt(s6, s6)
+    vadd(s6, s6, s8)
+    vdiv(s4, s4, s6)
+    vdiv(s5, s5, s6)
+    vstr(s4, [r1, 0])   # G[k]
+    vstr(s5, [r1, 4])
+    vneg(s5, s5)
+    vstr(s4, [r7, 0])   # G[N - k]
+    vstr(s5, [r7, 4])
+    sub(r3, 1)
+    bgt(LOOP)
+    label(DONE)
+
+class GCCPhat(object):
+    # length: frame length N, a power of two >= 4
+    # maxlag: largest delay searched (samples), default N/2 - 1. Set it from the
+    # microphone spacing: spacing/343*rate samples.
+    # winfunc: None or a window function f(x, length) applied to both frames
+    def __init__(self, length, maxlag=None, winfunc=None):
+        self.length = length
+        self.maxlag = length//2 - 1 if maxlag is None else min(maxlag, length//2 - 1)
+        self.peak = 0.0
+        self._pair = DFT(length, winfunc=winfunc, pair=True)
+        self._inv = DFT(length, table=True, interleaved=True)
+        self._eps = array.array('f', [1e-20])
+        self.a = self._pair.re  # Frames
+        self.b = self._pair.im
+
+    def load(self, left, right):  # Raw I2S words of each channel
+        a = self.a
+        b = self.b
+        for i in range(self.length):
+            a[i] = left[i] >> 8
+            b[i] = right[i] >> 8
+
+    def loadstereo(self, buf):  # Alternating left and right words
+        a = self.a
+        b = self.b
+        for i in range(self.length):
+            a[i] = buf[2*i] >> 8
+            b[i] = buf[2*i + 1] >> 8
+
+    # Returns the delay of b relative to a in samples
+    def run(self):
+        self._pair.run(FORWARD)
+        r = self._inv.re
+        phat(self._pair.ctrl, r, self._eps)
+        fft_fast(self._inv.ctrl, REVERSE | TABLE)
+        n = self.length
+        best = 0                # r[2t] is the correlation at lag -t (mod n)
+        for t in range(-self.maxlag, self.maxlag + 1):
+            if r[2*(t % n)] > r[2*(best % n)]:
+                best = t
+        y0 = r[2*((best - 1) % n)]
+        y1 = r[2*(best % n)]
+        y2 = r[2*((best + 1) % n)]
+        d = y0 - 2*y1 + y2
+        frac = 0.5*(y0 - y2)/d if d < 0 else 0.0
+        self.peak = y1/(n - 2)  # Sum of the n - 2 unit weights at zero delay
+        return -(best + frac)
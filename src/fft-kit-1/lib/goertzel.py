@@ -0,0 +1,73 @@
+# goertzel.py Goertzel filter bank: magnitudes at a fixed set of frequencies
+# Where only a few known tones matter (mains hum harmonics, a whistle) an FFT
+# computes length//2 bins to use a handful. The Goertzel recurrence computes one
+# bin in a single pass through the frame with one multiply and two adds per sample,
+# so m tones cost m*length multiplies against about 2*length*log2(length) for a real
+# FFT: cheaper for fewer than about log2(length) tones. Each frequency maps to the
+# nearest bin, so results are identical in form to an FFT's.
+# Kernels: 'asm' dft.goertzel() (FPU boards), else 'native' pyfft.goertzel() (plain
+# Python under CPython). The first that imports is used.
+# Interface as the fftbackend engines:
+# gb = GoertzelBank(256, (440, 880, 1320), 8000, 'hanning')
+# gb.load(buf)          # buf: array('i') of raw 32 bit INMP441 I2S words
+# mags = gb.run()       # array('f') of length//2 as calculate_magnitudes(): bins not
+#                       # in the bank are 0. Multiply by gb.scale for |X[k]|/length.
+# gb.bins[i] is the bin measuring freqs[i]; gb.levels[i] its magnitude.
+
+import array
+import math
+import fftplan
+
+def _kernel(name):
+    if name == 'asm':
+        from dft import goertzel as asm_goertzel
+        return asm_goertzel
+    from pyfft import goertzel as py_goertzel
+    return lambda data, coeffs, out, ctrl: py_goertzel(data, coeffs, out)
+
+class GoertzelBank(object):
+    # freqs: target frequencies (Hz), rate: sample rate (Hz)
+    # winfunc: None, a key of fftplan.windows or a function f(x, length)
+    # kernel: 'asm' or 'native', None for the fastest available
+    def __init__(self, length, freqs, rate, winfunc=None, kernel=None):
+        assert length >= 2 and not length & 1, "Length must be even"
+        self.length = length
+        self.scale = 1/length
+        self.freqs = freqs
+        self.bins = array.array('H', (min(round(f*length/rate), length//2 - 1) for f in freqs))
+        self.coeffs = array.array('f')
+        for k in self.bins:
+            w = 2*math.pi*k/length
+            self.coeffs.extend((2*math.cos(w), math.cos(w), math.sin(w)))
+        self.levels = array.array('f', (0 for x in freqs))
+        self.data = array.array('f', (0 for x in range(length)))
+        self.mags = array.array('f', (0 for x in range(length//2)))
+        self._ctrl = array.array('i', [length, len(freqs)])
+        self._win = None
+        if winfunc is not None:
+            func = fftplan.windows[winfunc] if isinstance(winfunc, str) else winfunc
+            self._win = array.array('f', (func(x, length) for x in range(length)))
+        self._run = None
+        for name in ((kernel,) if kernel else ('asm', 'native')):
+            try:
+                self._run = _kernel(name)
+            except Exception:   # Module missing, or emitter/instructions unsupported
+                continue
+            self.kernel = name
+            break
+        if self._run is None:
+            raise OSError('Goertzel kernel {} unavailable'.format(kernel))
+
+    def load(self, buf):
+        data = self.data
+        win = self._win
+        for i in range(self.length):
+            data[i] = buf[i] >> 8 if win is None else (buf[i] >> 8)*win[i]
+
+    def run(self):
+        if len(self.levels):
+            self._run(self.data, self.coeffs, self.levels, self._ctrl)
+        mags = self.mags
+        for i in range(len(self.bins)):
+            mags[self.bins[i]] = self.levels[i]
+        return mags
@@ -146,3 +146,104 @@ def polar(r0, r1, r2):    # Array length in r3: convert to integer
 def topolar(re, im, length):
     consts[0] = length
     polar(re, im, consts)
+
+# Magnitude only: re[i] = abs(re[i] + j*im[i]) for every step'th element.
+# r0: array of real (x) values
+# r1: array of imaginary (y) values
+# r2: number of elements to convert
+# r3: step between elements in bytes (4 for contiguous)
+# The imaginary array is unchanged.
+
+@micropython.asm_thumb
+def magnitude(r0, r1, r2, r3):
+    label(LOOP)
+    vldr(s14, [r0, 0])
+    vldr(s15, [r1, 0])
+    vmul(s14, s14, s14)
+    vmul(s15, s15, s15)
+    vadd(s14, s14, s15)
+    vsqrt(s14, s14)
+    vstr(s14, [r0, 0])
+    add(r0, r0, r3)
+    add(r1, r1, r3)
+    sub(r2, 1)
+    bgt(LOOP)
+
+# Windowed magnitude: a window w(x) = a - 2b*cos(2*pi*x/N) applied in the frequency
+# domain, fused with the magnitude calculation. Multiplying the samples by w is the
+# same as the 3 tap convolution Y[k] = a*X[k] - b*(X[k - 1] + X[k + 1]) of the
+# spectrum, so the time domain pass and the window array are not needed.
+# Hann is a = 0.5, b = 0.25, Hamming a = 0.54, b = 0.23. The spectrum must be that of
+# real data: X[-1] is taken as conj(X[1]).
+# r0: address of X[0].real, on exit re[k] = abs(Y[k]) for k in range(length): the
+# magnitudes are contiguous whatever the step, so interleaved data is compacted.
+# r1: address of X[0].imag, unchanged. Element length is read (X[length]).
+# r2: length
+# r3: array('f', [a, b, step]) step is the byte step between elements: 4 for
+# separate arrays, 8 for interleaved [re, im, re, im...].
+
+@micropython.asm_thumb
+def winmagnitude(r0, r1, r2, r3):
+    vldr(s0, [r3, 0])       # a
+    vldr(s1, [r3, 4])       # b
+    vldr(s2, [r3, 8])
+    vcvt_s32_f32(s2, s2)
+    vmov(r3, s2)            # r3 = step
+    mov(r5, r0)             # r5 = &magnitude[k]
+    add(r6, r0, r3)
+    add(r7, r1, r3)
+    vldr(s2, [r6, 0])       # X[k - 1] = conj(X[1])
+    vldr(s3, [r7, 0])
+    vneg(s3, s3)
+    vldr(s4, [r0, 0])       # X[k] = X[0]
+    vldr(s5, [r1, 0])
+    label(LOOP)
+    add(r0, r0, r3)
+    add(r1, r1, r3)
+    vldr(s6, [r0, 0])       # X[k + 1]
+    vldr(s7, [r1, 0])
+    vadd(s8, s2, s6)
+    vmul(s8, s8, s1)
+    vmul(s9, s4, s0)
+    vsub(s8, s9, s8)        # Y.real
+    vadd(s9, s3, s7)
+    vmul(s9, s9, s1)
+    vmul(s10, s5, s0)
+    vsub(s9, s10, s9)       # Y.imag
+    vmul(s8, s8, s8)
+    vmul(s9, s9, s9)
+    vadd(s8, s8, s9)
+    vsqrt(s8, s8)
+    vstr(s8, [r5, 0])       # Never overtakes the reads
+    vmov(r4, s4)            # X[k - 1] = X[k]
+    vmov(s2, r4)
+    vmov(r4, s5)
+    vmov(s3, r4)
+    vmov(r4, s6)            # X[k] = X[k + 1]
+    vmov(s4, r4)
+    vmov(r4, s7)
+    vmov(s5, r4)
+    add(r5, 4)
+    sub(r2, 1)
+    bgt(LOOP)
+
+# Magnitudes of interleaved complex data [re, im, re, im...] compacted in place:
+# data[k] = abs(data[2k] + j*data[2k + 1]) for k in range(length)
+# r0: the array
+# r1: length
+
+@micropython.asm_thumb
+def cmagnitude(r0, r1):
+    mov(r2, r0)             # r2 = &magnitude[k]
+    label(LOOP)
+    vldr(s14, [r0, 0])
+    vldr(s15, [r0, 4])
+    vmul(s14, s14, s14)
+    vmul(s15, s15, s15)
+    vadd(s14, s14, s15)
+    vsqrt(s14, s14)
+    vstr(s14, [r2, 0])
+    add(r0, 8)
+    add(r2, 4)
+    sub(r1, 1)
+    bgt(LOOP)
@@ -0,0 +1,189 @@
+# pyfft.py Radix 4 FFT in Python for boards and hosts without the assembler FFT
+# Runs under the native code emitter on MicroPython and unchanged under CPython.
+# Uses the tables built by fftplan.FFTPlan:
+# swaps: array('H') bit reversal swap pairs from fftplan.swap_pairs()
+# wr, wi: cos and sin of -2*pi*k/n for k in 0..n/2 - 1 (forward transform), or a
+# quarter wave table in wr with wi None: see fftplan.twiddle()
+# Pairs of radix 2 stages are merged into one radix 4 pass. A radix 4 butterfly
+# needs three complex multiplies where two radix 2 stages need four, and each
+# element is loaded and stored half as often. If log2(n) is odd a radix 2 pass with
+# unit twiddles comes first. The first pass never multiplies.
+# Results are identical in form to iterative_fft(): unscaled, in natural order.
+# Output pruning: if bins is nonzero only X[0..bins - 1] are wanted. When bins is at
+# most n/4 the last pass computes just those outputs: each needs one sum of the four
+# branches instead of a full butterfly, and the other n - bins are never formed.
+# Elements from bins upwards are then left holding intermediate values.
+# leaf: an unrolled codelet from lib/codelets (see fftplan.FFTPlan.leaf) which does
+# the first stages in place of the radix 2 or 4 first pass. log2(n/L) must be even.
+# goertzel(): single bins of a real frame for lib/goertzel, as dft.goertzel().
+
+try:
+    import micropython
+except ImportError:             # CPython: the decorator has no effect
+    class micropython:
+        native = staticmethod(lambda f: f)
+import math
+from fftplan import twiddle
+
+@micropython.native
+def radix4_fft(real, imag, swaps, wr, wi, bins=0, leaf=None):
+    n = len(real)
+    half = n >> 1
+    for k in range(0, len(swaps), 2):   # Bit reversed reordering
+        i = swaps[k]
+        j = swaps[k + 1]
+        real[i], real[j] = real[j], real[i]
+        imag[i], imag[j] = imag[j], imag[i]
+    bits = 0
+    while (1 << bits) < n:
+        bits += 1
+    if leaf is not None:        # Unrolled first stages
+        l = leaf(real, imag, n)
+    elif bits & 1:              # Radix 2 pass, twiddle factor 1
+        for i in range(0, n, 2):
+            ar = real[i]
+            ai = imag[i]
+            br = real[i + 1]
+            bi = imag[i + 1]
+            real[i] = ar + br
+            imag[i] = ai + bi
+            real[i + 1] = ar - br
+            imag[i + 1] = ai - bi
+        l = 2
+    elif n >= 4:                # Radix 4 pass, twiddle factors 1
+        for i in range(0, n, 4):
+            x0r = real[i]
+            x0i = imag[i]
+            x1r = real[i + 1]
+            x1i = imag[i + 1]
+            x2r = real[i + 2]
+            x2i = imag[i + 2]
+            x3r = real[i + 3]
+            x3i = imag[i + 3]
+            s0r = x0r + x1r
+            s0i = x0i + x1i
+            d0r = x0r - x1r
+            d0i = x0i - x1i
+            s1r = x2r + x3r
+            s1i = x2i + x3i
+            d1r = x2r - x3r
+            d1i = x2i - x3i
+            real[i] = s0r + s1r
+            imag[i] = s0i + s1i
+            real[i + 2] = s0r - s1r
+            imag[i + 2] = s0i - s1i
+            real[i + 1] = d0r + d1i
+            imag[i + 1] = d0i - d1r
+            real[i + 3] = d0r - d1i
+            imag[i + 3] = d0i + d1r
+        l = 4
+    else:
+        l = n
+    while l < n:                # Merge four transforms of length l
+        l4 = l << 2
+        if l4 == n and 0 < bins <= l:
+            break
+        step = n // l4          # Twiddle index step: w = W(4l)**j = W(n)**(j*step)
+        t = 0
+        for j in range(l):
+            if wi is None:      # Quarter wave table
+                w1r, w1i = twiddle(wr, t)
+                w2r, w2i = twiddle(wr, 2*t)
+                w3r, w3i = twiddle(wr, 3*t)
+            else:
+                w1r = wr[t]     # w
+                w1i = wi[t]
+                w2r = wr[2*t]   # w**2: index < n/2
+                w2i = wi[2*t]
+                t3 = 3*t        # w**3: W(n)**(k + n/2) = -W(n)**k
+                if t3 < half:
+                    w3r = wr[t3]
+                    w3i = wi[t3]
+                else:
+                    w3r = -wr[t3 - half]
+                    w3i = -wi[t3 - half]
+            t += step
+            for i0 in range(j, n, l4):
+                i1 = i0 + l
+                i2 = i1 + l
+                i3 = i2 + l
+                xr = real[i1]   # b1 = w**2*x1
+                xi = imag[i1]
+                b1r = xr*w2r - xi*w2i
+                b1i = xr*w2i + xi*w2r
+                xr = real[i2]   # b2 = w*x2
+                xi = imag[i2]
+                b2r = xr*w1r - xi*w1i
+                b2i = xr*w1i + xi*w1r
+                xr = real[i3]   # b3 = w**3*x3
+                xi = imag[i3]
+                b3r = xr*w3r - xi*w3i
+                b3i = xr*w3i + xi*w3r
+                x0r = real[i0]
+                x0i = imag[i0]
+                s0r = x0r + b1r
+                s0i = x0i + b1i
+                d0r = x0r - b1r
+                d0i = x0i - b1i
+                s1r = b2r + b3r
+                s1i = b2i + b3i
+                d1r = b2r - b3r
+                d1i = b2i - b3i
+                real[i0] = s0r + s1r
+                imag[i0] = s0i + s1i
+                real[i2] = s0r - s1r
+                imag[i2] = s0i - s1i
+                real[i1] = d0r + d1i    # d0 - j*d1
+                imag[i1] = d0i - d1r
+                real[i3] = d0r - d1i    # d0 + j*d1
+                imag[i3] = d0i + d1r
+        l = l4
+    if l < n:                   # Pruned last pass: X[j] = x0 + w**2*x1 + w*x2 + w**3*x3
+        for j in range(bins):   # Same operations and order as the full pass
+            if wi is None:
+                w1r, w1i = twiddle(wr, j)
+                w2r, w2i = twiddle(wr, 2*j)
+                w3r, w3i = twiddle(wr, 3*j)
+            else:
+                w1r = wr[j]
+                w1i = wi[j]
+                w2r = wr[2*j]
+                w2i = wi[2*j]
+                t3 = 3*j
+                if t3 < half:
+                    w3r = wr[t3]
+                    w3i = wi[t3]
+                else:
+                    w3r = -wr[t3 - half]
+                    w3i = -wi[t3 - half]
+            xr = real[j + l]
+            xi = imag[j + l]
+            b1r = xr*w2r - xi*w2i
+            b1i = xr*w2i + xi*w2r
+            xr = real[j + 2*l]
+            xi = imag[j + 2*l]
+            b2r = xr*w1r - xi*w1i
+            b2i = xr*w1i + xi*w1r
+            xr = real[j + 3*l]
+            xi = imag[j + 3*l]
+            b3r = xr*w3r - xi*w3i
+            b3i = xr*w3i + xi*w3r
+            real[j] = (real[j] + b1r) + (b2r + b3r)
+            imag[j] = (imag[j] + b1i) + (b2i + b3i)
+
+# Magnitudes of selected bins of a real frame by the Goertzel recurrence.
+# coeffs: array('f') of (2*cos(w), cos(w), sin(w)) per bin, out: a result per bin.
+@micropython.native
+def goertzel(data, coeffs, out):
+    n = len(data)
+    for i in range(len(out)):
+        c = coeffs[3*i]
+        s1 = 0.0
+        s2 = 0.0
+        for j in range(n):
+            s = data[j] + c*s1 - s2
+            s2 = s1
+            s1 = s
+        xr = s1 - coeffs[3*i + 1]*s2
+        xi = coeffs[3*i + 2]*s2
+        out[i] = math.sqrt(xr*xr + xi*xi)
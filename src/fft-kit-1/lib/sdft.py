@@ -0,0 +1,143 @@
+# sdft.py Sliding DFT: spectrum bins updated as each sample arrives
+# A frame based FFT reports a tone only once a whole frame has been captured (32ms
+# for 256 samples at 8KHz). The sliding DFT keeps the spectrum of the last length
+# samples and updates each tracked bin in constant time per sample:
+#   X[k] = (X[k] + x_new - x_old)*exp(2j*pi*k/length)
+# so a bin responds within one sample. Each update rounds, so errors accumulate:
+# every resync samples the tracked bins are recomputed from the saved samples, by
+# pyfft.radix4_fft() when all bins are tracked, otherwise a direct sum per bin.
+# The window is rectangular. Bin values are unscaled as the scripts' FFTs: multiply
+# by scale for |X[k]|/length.
+# Usage:
+# sd = SlidingDFT(256, bins=(20, 21, 22))   # bins=None tracks 0..length/2 - 1
+# sd.update(buf)                # buf: array('i') of raw 32 bit INMP441 I2S words
+# mags = sd.magnitudes()        # array('f') of length//2 as calculate_magnitudes():
+#                               # untracked bins are 0. Usable by draw_spectrum().
+# The cost per sample is proportional to the number of bins tracked: track only
+# those needed where the reaction time matters.
+
+import array
+import math
+try:
+    import micropython
+except ImportError:             # CPython: the decorator has no effect
+    class micropython:
+        native = staticmethod(lambda f: f)
+import fftplan
+from pyfft import radix4_fft
+
+# Add count samples from buf[start:] to the history and update the bins.
+# Returns the new history position (that of the oldest sample).
+@micropython.native
+def _slide(buf, start, count, hist, pos, re, im, wr, wi):
+    n = len(hist)
+    m = len(re)
+    for s in range(start, start + count):
+        x = float(buf[s] >> 8)  # 24 bit sample
+        d = x - hist[pos]
+        hist[pos] = x
+        pos += 1
+        if pos == n:
+            pos = 0
+        for i in range(m):
+            a = re[i] + d
+            b = im[i]
+            re[i] = a*wr[i] - b*wi[i]
+            im[i] = a*wi[i] + b*wr[i]
+    return pos
+
+# Direct DFT of the history, oldest sample first, at the tracked bins.
+# cos: cos(2*pi*t/n) for t in 0..n - 1. sin(x) = cos(x - pi/2).
+@micropython.native
+def _direct(hist, pos, cos, bins, re, im):
+    n = len(hist)
+    q = n >> 2
+    for i in range(len(bins)):
+        k = bins[i]
+        sr = 0.0
+        si = 0.0
+        p = pos
+        t = 0
+        for j in range(n):
+            x = hist[p]
+            sr += x*cos[t]
+            si -= x*cos[t - q if t >= q else t + n - q]
+            p += 1
+            if p == n:
+                p = 0
+            t += k
+            if t >= n:
+                t -= n
+        re[i] = sr
+        im[i] = si
+
+class SlidingDFT(object):
+    # bins: sequence of bin numbers below length/2 to track, None for all
+    # resync: samples between recomputations of the bins, default 8*length
+    def __init__(self, length, bins=None, resync=None):
+        self.length = length
+        self.scale = 1/length
+        self.bins = array.array('H', range(length//2) if bins is None else bins)
+        assert all(0 <= k < length//2 for k in self.bins), "Bins must be below length/2"
+        m = len(self.bins)
+        self.re = array.array('f', (0 for x in range(m)))   # X[bins[i]]
+        self.im = array.array('f', (0 for x in range(m)))
+        self._wr = array.array('f', (math.cos(2*math.pi*k/length) for k in self.bins))
+        self._wi = array.array('f', (math.sin(2*math.pi*k/length) for k in self.bins))
+        self._hist = array.array('f', (0 for x in range(length)))   # Last length samples
+        self._pos = 0                   # Index of the oldest
+        self.resync = 8*length if resync is None else resync
+        self._count = 0                 # Samples since the last resync
+        self.mags = array.array('f', (0 for x in range(length//2)))
+        if bins is None:                # Resync by FFT
+            self._plan = fftplan.get(length)
+            self._fre = array.array('f', (0 for x in range(length)))
+            self._fim = array.array('f', (0 for x in range(length)))
+        else:
+            self._plan = None
+            self._cos = array.array('f', (math.cos(2*math.pi*t/length) for t in range(length)))
+
+    # Add count (default all) raw I2S words from buf
+    def update(self, buf, count=None):
+        count = len(buf) if count is None else count
+        start = 0
+        while count > 0:                # Resync at exact intervals
+            n = min(count, self.resync - self._count)
+            self._pos = _slide(buf, start, n, self._hist, self._pos, self.re, self.im, self._wr, self._wi)
+            start += n
+            count -= n
+            self._count += n
+            if self._count >= self.resync:
+                self.sync()
+
+    # Recompute the tracked bins from the saved samples, discarding accumulated error
+    def sync(self):
+        hist = self._hist
+        pos = self._pos
+        if self._plan is None:
+            _direct(hist, pos, self._cos, self.bins, self.re, self.im)
+        else:
+            fre = self._fre
+            fim = self._fim
+            n = self.length
+            for j in range(n):
+                fre[j] = hist[(pos + j) % n]
+                fim[j] = 0.0
+            plan = self._plan
+            radix4_fft(fre, fim, plan.swaps, plan.wr, plan.wi, 0, plan.leaf)
+            re = self.re
+            im = self.im
+            for i in range(len(self.bins)):
+                re[i] = fre[i]          # All bins: bins[i] == i
+                im[i] = fim[i]
+        self._count = 0
+
+    # Unscaled |X[k]| for k below length/2, 0 for untracked bins
+    def magnitudes(self):
+        mags = self.mags
+        bins = self.bins
+        re = self.re
+        im = self.im
+        for i in range(len(bins)):
+            mags[bins[i]] = math.sqrt(re[i]*re[i] + im[i]*im[i])
+        return mags
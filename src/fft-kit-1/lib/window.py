@@ -44,6 +44,46 @@ def winapply(r0, r1, r2):
     sub(r2, 1)
     bgt(LOOP)
 
+# As winapply() for frames arrays of length elements stored one after another in
+# array 0: each has its own DC component removed. One call windows a whole batch.
+# r0: array 0 real data
+# r1: array 1 window coefficients (length elements)
+# r2: length of each frame
+# r3: number of frames
+
+@micropython.asm_thumb
+def winbatch(r0, r1, r2, r3):
+    mov(r7, r1)             # &coefficients
+    label(FRAME)
+    push({r0, r2})
+    mov(r4, 0)
+    vmov(s14, r4)
+    vcvt_f32_s32(s15, s14)  # s15 holds value to set
+    label(LOOP1)
+    vldr(s14, [r0, 0])
+    vadd(s15, s14, s15)
+    add(r0, 4)
+    sub(r2, 1)
+    bgt(LOOP1)
+    pop({r0, r2})
+    vmov(s14, r2)
+    vcvt_f32_s32(s14, s14)  # convert frame length to float
+    vdiv(s13, s15, s14)     # avg. in s13
+    mov(r1, r7)
+    mov(r4, r2)
+    label(LOOP)
+    vldr(s14, [r0, 0])
+    vsub(s15, s14, s13)
+    vldr(s14, [r1, 0])
+    vmul(s15, s14, s15)
+    vstr(s15, [r0, 0])
+    add(r0, 4)
+    add(r1, 4)
+    sub(r4, 1)
+    bgt(LOOP)
+    sub(r3, 1)              # r0 is at the next frame
+    bgt(FRAME)
+
 # Set all elements of a float array to an integer value
 # r0: the array
 # r1: value
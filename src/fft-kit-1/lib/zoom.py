@@ -0,0 +1,167 @@
+# zoom.py Zoom FFT: high resolution analysis of a narrow band
+# Resolution is rate/length: 0.5Hz at 8KHz would need a 16K point FFT. Here the I2S
+# stream is mixed down by the centre frequency, low pass filtered and decimated by
+# a power of two D, and the complex result transformed. A band of rate/D Hz about
+# the centre is then analysed with a resolution of rate/(D*length): 256 points with
+# D = 64 give 0.49Hz bins over 125Hz centred on e.g. 1KHz.
+# Stages, per input sample:
+# Mixer: x*exp(-2j*pi*centre*t/rate) from a complex oscillator updated by one
+# complex multiply and renormalised at every output sample.
+# Low pass: windowed sinc FIR of taps*D + 1 coefficients, cutoff rate/(2D), computed
+# only at every D'th sample: 2*taps multiplies per input sample. With the default
+# taps = 8 a tone 0.2 span outside the band is 50dB down. The outermost bins approach
+# the cutoff: expect some attenuation in the top and bottom tenth of the span.
+# Transform: dft.fft_fast() on a dftclass.DFT's arrays where the assembler is
+# available, else pyfft.radix4_fft().
+# Usage:
+# zf = Zoom(256, 1000, 8000, 64, 'hanning')
+# while True:
+#     audio_in.readinto(buf)    # array('i') of raw 32 bit INMP441 I2S words
+#     i = 0
+#     while i < len(buf):
+#         i += zf.feed(buf, i)
+#         if zf.ready:
+#             mags = zf.run()   # array('f') of length: mags[i] at zf.freq(i)
+# Frames do not overlap: D*length input samples (2s in the example) per frame.
+# Multiply magnitudes by scale for |X[k]|/length: a sine of amplitude A within the
+# band gives A/2 in its bin, as the fftbackend engines.
+
+import array
+import math
+try:
+    import micropython
+except ImportError:             # CPython: the decorator has no effect
+    class micropython:
+        native = staticmethod(lambda f: f)
+import fftplan
+
+# Mix, filter and decimate buf[start:] into re, im until they are full.
+# hr, hi: complex history of the last len(taps) mixed samples.
+# nco: array('f') oscillator value and step (real, imag, real, imag).
+# state: array('i') history position, samples to next output, frame fill, D.
+# Returns the number of words consumed.
+@micropython.native
+def _feed(buf, start, hr, hi, taps, nco, state, re, im):
+    n = len(hr)
+    frame = len(re)
+    pos = state[0]
+    due = state[1]
+    fill = state[2]
+    pr = nco[0]
+    pi = nco[1]
+    sr = nco[2]
+    si = nco[3]
+    s = start
+    end = len(buf)
+    while s < end and fill < frame:
+        x = float(buf[s] >> 8)  # 24 bit sample
+        s += 1
+        hr[pos] = x*pr
+        hi[pos] = x*pi
+        t = pr*sr - pi*si       # Advance the oscillator
+        pi = pr*si + pi*sr
+        pr = t
+        pos += 1
+        if pos == n:
+            pos = 0
+        due -= 1
+        if due == 0:            # Output sample: FIR from the oldest
+            due = state[3]
+            ar = 0.0
+            ai = 0.0
+            p = pos
+            for j in range(n):
+                ar += taps[j]*hr[p]
+                ai += taps[j]*hi[p]
+                p += 1
+                if p == n:
+                    p = 0
+            re[fill] = ar
+            im[fill] = ai
+            fill += 1
+            g = 1.5 - 0.5*(pr*pr + pi*pi)   # Keep abs(oscillator) at 1
+            pr *= g
+            pi *= g
+    state[0] = pos
+    state[1] = due
+    state[2] = fill
+    nco[0] = pr
+    nco[1] = pi
+    return s - start
+
+class Zoom(object):
+    # length: FFT length, centre, rate: Hz, decimate: power of two D
+    # winfunc: None, a key of fftplan.windows or a function f(x, length)
+    # taps: FIR length in multiples of D
+    def __init__(self, length, centre, rate, decimate, winfunc=None, taps=8):
+        assert decimate > 1 and not decimate & (decimate - 1), "Decimation must be a power of two"
+        self.length = length
+        self.centre = centre
+        self.bin_hz = rate/(decimate*length)
+        self.scale = 1/length
+        n = taps*decimate + 1   # Hamming windowed sinc, cutoff rate/(2D), unity gain
+        h = [0.0]*n
+        for t in range(n):
+            x = t - (n - 1)/2
+            h[t] = (1 if x == 0 else math.sin(math.pi*x/decimate)/(math.pi*x/decimate))
+            h[t] *= 0.54 - 0.46*math.cos(2*math.pi*t/(n - 1))
+        g = sum(h)
+        self._taps = array.array('f', (v/g for v in h))
+        self._hr = array.array('f', (0 for x in range(n)))
+        self._hi = array.array('f', (0 for x in range(n)))
+        w = -2*math.pi*centre/rate
+        self._nco = array.array('f', [1.0, 0.0, math.cos(w), math.sin(w)])
+        self._state = array.array('i', [0, decimate, 0, decimate])
+        self._win = fftplan.get(length, winfunc).win if winfunc is not None else None
+        self.mags = array.array('f', (0 for x in range(length)))
+        try:                    # Assembler on FPU boards
+            from dftclass import DFT, FORWARD, NOSCALE
+            from dft import fft_fast
+            self._dft = DFT(length)
+            self._fft = fft_fast
+            self._control = FORWARD | NOSCALE
+            self.re = self._dft.re
+            self.im = self._dft.im
+        except Exception:
+            self._dft = None
+            self._plan = fftplan.get(length)
+            self.re = array.array('f', (0 for x in range(length)))
+            self.im = array.array('f', (0 for x in range(length)))
+
+    @property
+    def ready(self):            # A frame of decimated samples is complete
+        return self._state[2] == self.length
+
+    # Consume raw I2S words from buf[start:] until the frame is complete. Returns the
+    # number consumed.
+    def feed(self, buf, start=0):
+        return _feed(buf, start, self._hr, self._hi, self._taps, self._nco, self._state, self.re, self.im)
+
+    # Frequency (Hz) of mags[i]
+    def freq(self, i):
+        return self.centre + (i - self.length//2)*self.bin_hz
+
+    # Transform the frame and start the next. Returns unscaled magnitudes in frequency
+    # order: mags[length//2] is the centre.
+    def run(self):
+        re = self.re
+        im = self.im
+        length = self.length
+        win = self._win
+        if win is not None:
+            for i in range(length):
+                re[i] *= win[i]
+                im[i] *= win[i]
+        if self._dft is None:
+            plan = self._plan
+            from pyfft import radix4_fft
+            radix4_fft(re, im, plan.swaps, plan.wr, plan.wi, 0, plan.leaf)
+        else:                   # Not DFT.run(): that zeroes im
+            self._fft(self._dft.ctrl, self._control)
+        mags = self.mags
+        half = length//2
+        for i in range(length):         # Negative frequencies first
+            k = i + half if i < half else i - half
+            mags[i] = math.sqrt(re[k]*re[k] + im[k]*im[k])
+        self._state[2] = 0
+        return mags
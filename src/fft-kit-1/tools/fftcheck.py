@@ -0,0 +1,116 @@
+# fftcheck.py Host-side check of the assembler FFT kernels
+# Runs lib/dft.fft and lib/dft.fft_fast under thumbsim on identical random data
+# and checks that the results are bit-for-bit identical, for forward and reverse
+# transforms with and without the twiddle table. Reports instructions executed.
+# The decimation in frequency mode (control bit 4) differs in rounding, so it is
+# checked against fft() after bit reversing its output, to a relative tolerance.
+# lib/fastconv is checked against direct convolution over several blocks, including
+# transforms too short for one block to cover the filter's history.
+#
+# Usage (from src/fft-kit-1):
+#   python3 tools/fftcheck.py [max_bits]
+#
+# thumbsim is used rather than qemu: MicroPython's inline assembler cannot be
+# cross-assembled without building the firmware, whereas thumbsim executes the
+# unmodified lib/dft.py source.
+
+import os
+import random
+import sys
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _here)
+sys.path.insert(0, os.path.join(_here, '..', 'lib'))
+
+import thumbsim
+thumbsim.install()
+
+import array
+import dft
+from dftclass import DFT, FORWARD, REVERSE, TABLE, DIF
+
+def run(func, d, data, control):
+    d.re[:] = array.array('f', data[0])
+    d.im[:] = array.array('f', data[1])
+    func.count = 0
+    func(d.ctrl, control)
+    return bytes(d.re) + bytes(d.im), func.count
+
+def main(max_bits=10):
+    random.seed(1)
+    failures = 0
+    print('{:>6} {:>9} {:>6} {:>10} {:>10} {:>6}'.format(
+        'Length', 'Direction', 'Table', 'fft', 'fft_fast', 'Ratio'))
+    for bits in range(1, max_bits + 1):
+        n = 2**bits
+        data = [[random.uniform(-1000, 1000) for _ in range(n)] for _ in range(2)]
+        for table in (False, True):
+            d = DFT(n, table=table)
+            for control in (FORWARD, REVERSE):
+                control |= TABLE if table else 0
+                ref, count = run(dft.fft, d, data, control)
+                got, fast = run(dft.fft_fast, d, data, control)
+                ok = ref == got
+                failures += not ok
+                print('{:6d} {:>9} {:>6} {:10d} {:10d} {:6.2f}{}'.format(
+                    n, 'forward' if control & FORWARD else 'reverse', 'yes' if table else 'no',
+                    count, fast, count/fast, '' if ok else '  MISMATCH'))
+    print('FAIL' if failures else 'All results identical')
+    print('\n{:>6} {:>9} {:>6} {:>10} {:>10} {:>10}'.format(
+        'Length', 'Direction', 'Table', 'fft_fast', 'DIF', 'Max error'))
+    for bits in range(1, max_bits + 1):
+        n = 2**bits
+        data = [[random.uniform(-1000, 1000) for _ in range(n)] for _ in range(2)]
+        for table in (False, True):
+            d = DFT(n, table=table, dif=True)
+            for control in (FORWARD, REVERSE):
+                control |= TABLE if table else 0
+                ref, count = run(dft.fft_fast, d, data, control)
+                run(dft.fft_fast, d, data, control | DIF)
+                ref = array.array('f', ref)
+                peak = max(abs(v) for v in ref)
+                err = 0
+                for k in range(n):
+                    i = rev(k, bits)
+                    err = max(err, abs(d.re[i] - ref[k]), abs(d.im[i] - ref[n + k]))
+                err /= peak
+                failures += err > 1e-5
+                print('{:6d} {:>9} {:>6} {:10d} {:10d} {:10.1e}{}'.format(
+                    n, 'forward' if control & FORWARD else 'reverse', 'yes' if table else 'no',
+                    count, dft.fft_fast.count, err, '' if err <= 1e-5 else '  FAIL'))
+    print('FAIL' if failures else 'All results correct')
+    failures += convcheck()
+    return failures
+
+# Stream random blocks through FastConv and compare with direct convolution
+def convcheck():
+    from fastconv import FastConv
+    failures = 0
+    print('\n{:>6} {:>6} {:>6} {:>10}'.format('Taps', 'Length', 'Block', 'Max error'))
+    for p, length in ((15, 16), (9, 16), (17, 32), (31, None)):
+        taps = array.array('f', (random.uniform(-1, 1) for _ in range(p)))
+        fc = FastConv(taps, length)
+        blocks = max(3, (2*p)//fc.block + 2)
+        x = array.array('f', (random.uniform(-1000, 1000) for _ in range(blocks*fc.block)))
+        y = array.array('f')
+        for b in range(blocks):
+            buf = x[b*fc.block:(b + 1)*fc.block]
+            fc.process(buf, buf)
+            y.extend(buf)
+        ref = [sum(taps[j]*x[i - j] for j in range(p) if i >= j) for i in range(len(x))]
+        peak = max(abs(v) for v in ref)
+        err = max(abs(a - b) for a, b in zip(y, ref))/peak
+        failures += err > 1e-5
+        print('{:6d} {:6d} {:6d} {:10.1e}{}'.format(p, fc.length, fc.block, err,
+              '' if err <= 1e-5 else '  FAIL'))
+    print('FAIL' if failures else 'All results correct')
+    return failures
+
+def rev(k, bits):
+    r = 0
+    for b in range(bits):
+        r = (r << 1) | ((k >> b) & 1)
+    return r
+
+if __name__ == '__main__':
+    sys.exit(main(*(int(a) for a in sys.argv[1:])) != 0)
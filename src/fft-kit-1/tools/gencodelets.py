@@ -0,0 +1,160 @@
+# gencodelets.py Generate lib/codelets.py: unrolled leaf FFTs for lib/pyfft
+# A leaf of size L performs the first log2(L) radix 2 stages of a bit reversed
+# input FFT on each block of L elements. In those stages the loop bookkeeping and
+# twiddle indexing cost more than the arithmetic, and the twiddles are constants:
+# here they are folded into straight line code. Multiplies by 1 and -j become
+# swaps and negations, W(8) and W(8)**3 need one multiply by sqrt(0.5) per part.
+# The codelets are @micropython.native so run on every board and under CPython.
+# After writing the module it is checked against a direct DFT and against
+# radix4_fft() without leaves.
+#
+# Usage (from src/fft-kit-1):
+#   python3 tools/gencodelets.py [sizes...]     default sizes 8 16 32
+
+import cmath
+import math
+import os
+import random
+import sys
+
+_here = os.path.dirname(os.path.abspath(__file__))
+_lib = os.path.join(_here, '..', 'lib')
+OUTPUT = os.path.join(_lib, 'codelets.py')
+
+HEADER = '''# codelets.py Unrolled leaf FFTs for pyfft.radix4_fft()
+# GENERATED by tools/gencodelets.py: do not edit.
+# leafL(real, imag, n) performs the first log2(L) stages of a length n FFT whose
+# input has been bit reversed, on each block of L elements, and returns L.
+# leaves: (L, function) largest first. See fftplan.FFTPlan.leaf.
+
+try:
+    import micropython
+except ImportError:             # CPython: the decorator has no effect
+    class micropython:
+        native = staticmethod(lambda f: f)
+'''
+
+def const(x):                   # Twiddle component as source text
+    return repr(float('{:.9g}'.format(x)))
+
+# Source lines computing one butterfly: out_a = a + w*b, out_b = a - w*b
+# where w = exp(-2j*pi*k/m). Names are (real, imag) pairs.
+def butterfly(a, b, oa, ob, k, m):
+    ar, ai = a
+    br, bi = b
+    k8 = 8*k/m                  # w as a multiple of W(8)
+    if k == 0:
+        tr, ti = br, bi
+        lines = []
+    elif k8 == 2:               # -j
+        return ['{} = {} + {}'.format(oa[0], ar, bi), '{} = {} - {}'.format(oa[1], ai, br),
+                '{} = {} - {}'.format(ob[0], ar, bi), '{} = {} + {}'.format(ob[1], ai, br)]
+    elif k8 == 1:               # (1 - j)/sqrt(2)
+        lines = ['tr = ({} + {})*C8'.format(br, bi), 'ti = ({} - {})*C8'.format(bi, br)]
+        tr, ti = 'tr', 'ti'
+    elif k8 == 3:               # -(1 + j)/sqrt(2)
+        lines = ['tr = ({} - {})*C8'.format(bi, br), 'ti = -({} + {})*C8'.format(br, bi)]
+        tr, ti = 'tr', 'ti'
+    else:
+        wr = math.cos(-2*math.pi*k/m)
+        wi = math.sin(-2*math.pi*k/m)
+        lines = ['tr = {}*{} - {}*{}'.format(br, const(wr), bi, const(wi)),
+                 'ti = {}*{} + {}*{}'.format(br, const(wi), bi, const(wr))]
+        tr, ti = 'tr', 'ti'
+    return lines + ['{} = {} + {}'.format(oa[0], ar, tr), '{} = {} + {}'.format(oa[1], ai, ti),
+                    '{} = {} - {}'.format(ob[0], ar, tr), '{} = {} - {}'.format(ob[1], ai, ti)]
+
+def codelet(size):
+    stages = size.bit_length() - 1
+    sets = ('a', 'b')           # Stages alternate between two sets of locals
+    names = lambda s, i: ('{}{}r'.format(sets[s & 1], i), '{}{}i'.format(sets[s & 1], i))
+    body = []
+    for i in range(size):
+        r, im = names(0, i)
+        body.append('{} = real[b + {}]'.format(r, i) if i else '{} = real[b]'.format(r))
+        body.append('{} = imag[b + {}]'.format(im, i) if i else '{} = imag[b]'.format(im))
+    for s in range(stages):
+        m = 2 << s
+        half = m >> 1
+        body.append('# Stage {}: {} point butterflies'.format(s + 1, m))
+        for g in range(0, size, m):
+            for k in range(half):
+                i = g + k
+                body += butterfly(names(s, i), names(s, i + half), names(s + 1, i), names(s + 1, i + half), k, m)
+    for i in range(size):
+        r, im = names(stages, i)
+        idx = 'b + {}'.format(i) if i else 'b'
+        body.append('real[{}] = {}'.format(idx, r))
+        body.append('imag[{}] = {}'.format(idx, im))
+    lines = ['@micropython.native', 'def leaf{}(real, imag, n):'.format(size)]
+    if any('C8' in l for l in body):
+        lines.append('    C8 = {}'.format(const(math.sqrt(0.5))))
+    lines.append('    for b in range(0, n, {}):'.format(size))
+    lines += ['        ' + l for l in body]
+    lines.append('    return {}'.format(size))
+    return '\n'.join(lines) + '\n'
+
+def generate(sizes):
+    sizes = sorted(sizes)
+    src = HEADER
+    for size in sizes:
+        src += '\n' + codelet(size)
+    src += '\nleaves = ({},)\n'.format(', '.join('({0}, leaf{0})'.format(s) for s in reversed(sizes)))
+    return src
+
+# Checks: each leaf on one block is an L point DFT of bit reversed input; a full
+# radix4_fft() using each leaf matches one without.
+def reverse(k, bits):
+    r = 0
+    for b in range(bits):
+        r = (r << 1) | ((k >> b) & 1)
+    return r
+
+def check():
+    sys.path.insert(0, _lib)
+    import array
+    import codelets
+    import fftplan
+    from pyfft import radix4_fft
+    random.seed(1)
+    worst = 0
+    for size, leaf in codelets.leaves:
+        bits = size.bit_length() - 1
+        x = [complex(random.uniform(-1, 1), random.uniform(-1, 1)) for _ in range(size)]
+        re = array.array('f', (x[reverse(k, bits)].real for k in range(size)))
+        im = array.array('f', (x[reverse(k, bits)].imag for k in range(size)))
+        assert leaf(re, im, size) == size
+        for k in range(size):
+            X = sum(x[t]*cmath.exp(-2j*math.pi*k*t/size) for t in range(size))
+            worst = max(worst, abs(complex(re[k], im[k]) - X)/size)
+    for bits in range(3, 11):
+        n = 1 << bits
+        plan = fftplan.FFTPlan(n)
+        data = [random.uniform(-1000, 1000) for _ in range(n)]
+        ref = (array.array('f', data), array.array('f', [0]*n))
+        radix4_fft(ref[0], ref[1], plan.swaps, plan.wr, plan.wi)
+        peak = max(math.hypot(a, b) for a, b in zip(*ref))
+        for size, leaf in codelets.leaves:
+            if size > n or (bits - size.bit_length() + 1) & 1:
+                continue
+            re = array.array('f', data)
+            im = array.array('f', [0]*n)
+            radix4_fft(re, im, plan.swaps, plan.wr, plan.wi, 0, leaf)
+            err = max(max(abs(a - b) for a, b in zip(re, ref[0])), max(abs(a - b) for a, b in zip(im, ref[1])))
+            worst = max(worst, err/peak)
+            print('{:6d} leaf{:<3d} max error {:.1e}'.format(n, size, err/peak))
+    ok = worst < 1e-5
+    print('Worst relative error {:.1e}: {}'.format(worst, 'OK' if ok else 'FAIL'))
+    return ok
+
+def main(args):
+    sizes = [int(a) for a in args] or [8, 16, 32]
+    for s in sizes:
+        assert s >= 4 and s & (s - 1) == 0, 'Sizes must be powers of two >= 4'
+    with open(OUTPUT, 'w') as f:
+        f.write(generate(sizes))
+    print('Wrote', os.path.normpath(OUTPUT))
+    return check()
+
+if __name__ == '__main__':
+    sys.exit(0 if main(sys.argv[1:]) else 1)
@@ -0,0 +1,145 @@
+# pyfftbench.py Benchmark lib/pyfft.radix4_fft against the scripts' iterative_fft
+# Runs under CPython or the MicroPython unix port (or on a board with pyfft in lib).
+# Under MicroPython lib/fixfft.FixFFT (viper) is timed too: it needs the viper
+# emitter so is skipped under CPython.
+#
+# Usage (from src/fft-kit-1):
+#   python3 tools/pyfftbench.py
+#   micropython tools/pyfftbench.py
+
+import array
+import math
+import sys
+import time
+
+sys.path.insert(0, 'lib')
+from pyfft import radix4_fft
+from fftplan import swap_pairs
+
+try:
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+except AttributeError:          # CPython
+    ticks_us = lambda: time.perf_counter_ns() // 1000
+    ticks_diff = lambda a, b: a - b
+
+def tables(n):                  # As built by faster-fft.py
+    bits = 0
+    while (1 << bits) < n:
+        bits += 1
+    rev = array.array('H', [0] * n)
+    for i in range(n):
+        r = 0
+        for b in range(bits):
+            r = (r << 1) | ((i >> b) & 1)
+        rev[i] = r
+    wr = array.array('f', [0] * (n // 2))
+    wi = array.array('f', [0] * (n // 2))
+    for i in range(n // 2):
+        angle = -2 * math.pi * i / n
+        wr[i] = math.cos(angle)
+        wi[i] = math.sin(angle)
+    return rev, wr, wi
+
+# iterative_fft() from faster-fft.py with the tables passed in
+def iterative_fft(real, imag, rev, wr, wi):
+    n = len(real)
+    for i in range(n):
+        j = rev[i]
+        if i < j:
+            real[i], real[j] = real[j], real[i]
+            imag[i], imag[j] = imag[j], imag[i]
+    for stage in range(1, int(math.log2(n)) + 1):
+        m = 2 ** stage
+        m2 = m // 2
+        for k in range(0, n, m):
+            for j in range(m2):
+                twiddle_idx = j * (n // m)
+                wre = wr[twiddle_idx]
+                wim = wi[twiddle_idx]
+                idx1 = k + j
+                idx2 = idx1 + m2
+                tr = real[idx2] * wre - imag[idx2] * wim
+                ti = real[idx2] * wim + imag[idx2] * wre
+                real[idx2] = real[idx1] - tr
+                imag[idx2] = imag[idx1] - ti
+                real[idx1] = real[idx1] + tr
+                imag[idx1] = imag[idx1] + ti
+
+# Bit reversal as done by iterative_fft() and by swap pairs
+def reverse_scan(real, imag, rev):
+    for i in range(len(real)):
+        j = rev[i]
+        if i < j:
+            real[i], real[j] = real[j], real[i]
+            imag[i], imag[j] = imag[j], imag[i]
+
+def reverse_swaps(real, imag, swaps):
+    for k in range(0, len(swaps), 2):
+        i = swaps[k]
+        j = swaps[k + 1]
+        real[i], real[j] = real[j], real[i]
+        imag[i], imag[j] = imag[j], imag[i]
+
+def bench(func, n, data, tabs, reps):
+    best = None
+    for _ in range(reps):
+        re = array.array('f', data)
+        im = array.array('f', [0] * n)
+        t = ticks_us()
+        func(re, im, *tabs)
+        dt = ticks_diff(ticks_us(), t)
+        best = dt if best is None or dt < best else best
+    return best, re, im
+
+def main(reps=5):
+    print('{:>6} {:>14} {:>14} {:>7} {:>10}'.format(
+        'Length', 'iterative us', 'radix4 us', 'Ratio', 'Max error'))
+    perm = []
+    for n in (256, 512, 1024):
+        tabs = tables(n)
+        data = [math.sin(2 * math.pi * 13.7 * i / n) + 0.3 * ((i * 7919) % 101 - 50) / 50
+                for i in range(n)]
+        t0, re0, im0 = bench(iterative_fft, n, data, tabs, reps)
+        swaps = swap_pairs(n)
+        t1, re1, im1 = bench(radix4_fft, n, data, (swaps,) + tabs[1:], reps)
+        err = max(max(abs(a - b) for a, b in zip(re0, re1)), max(abs(a - b) for a, b in zip(im0, im1)))
+        print('{:6d} {:14d} {:14d} {:7.2f} {:10.2e}'.format(n, t0, t1, t0 / t1, err))
+        perm.append((n, bench(reverse_scan, n, data, tabs[:1], reps)[0],
+                     bench(reverse_swaps, n, data, (swaps,), reps)[0]))
+    print('\n{:>6} {:>14} {:>14} {:>7}'.format('Length', 'scan us', 'swap pairs us', 'Ratio'))
+    for n, t0, t1 in perm:
+        print('{:6d} {:14d} {:14d} {:7.2f}'.format(n, t0, t1, t0 / t1))
+    fixed(reps)
+
+# FixFFT.run() (bit reversal, butterflies and magnitudes) against iterative_fft()
+def fixed(reps):
+    try:
+        from fixfft import FixFFT
+    except Exception:           # No viper emitter
+        print('\nfixfft: viper emitter unavailable, not timed')
+        return
+    print('\n{:>6} {:>14} {:>14} {:>7} {:>10}'.format(
+        'Length', 'iterative us', 'fixfft us', 'Ratio', 'Max error'))
+    for n in (256, 512, 1024):
+        tabs = tables(n)
+        data = [math.sin(2 * math.pi * 13.7 * i / n) + 0.3 * ((i * 7919) % 101 - 50) / 50
+                for i in range(n)]
+        t0, re0, im0 = bench(iterative_fft, n, data, tabs, reps)
+        buf = array.array('i', [int(x * 2**20) << 8 for x in data])
+        fft = FixFFT(n)
+        t1 = None
+        for _ in range(reps):
+            fft.load(buf)
+            t = ticks_us()
+            mags = fft.run()
+            dt = ticks_diff(ticks_us(), t)
+            t1 = dt if t1 is None or dt < t1 else t1
+        # Relative to the peak, both magnitudes as max + 13/32*min
+        scale = 2**fft.exponent / 2**20
+        ref = [max(abs(a), abs(b)) + 0.40625 * min(abs(a), abs(b)) for a, b in zip(re0, im0)]
+        peak = max(ref)
+        err = max(abs(mags[k] * scale - ref[k]) for k in range(n // 2)) / peak
+        print('{:6d} {:14d} {:14d} {:7.2f} {:10.2e}'.format(n, t0, t1, t0 / t1, err))
+
+main()
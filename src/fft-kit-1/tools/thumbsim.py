@@ -0,0 +1,463 @@
+# thumbsim.py Host-side simulator for MicroPython @micropython.asm_thumb code
+# Runs the unmodified lib/*.py assembler functions under CPython so that the
+# FFT kernels can be checked against each other without a board.
+#
+# Usage:
+#   import thumbsim
+#   thumbsim.install()          # before importing any module using asm_thumb
+#   import dft
+#
+# Only the subset of the inline assembler used by this project is implemented.
+# The operand restrictions of the 16 bit Thumb encodings used by MicroPython
+# (low registers, immediate ranges, load/store offsets) are enforced so that code
+# which runs here will also assemble on the target. Conditional branch ranges are
+# estimated from instruction sizes.
+# Floating point: every FPU operation is performed in double precision and rounded
+# to single precision. For add, subtract, multiply, divide and square root this
+# gives the correctly rounded IEEE result, so output is bit-for-bit identical to
+# the hardware FPU (in round to nearest mode).
+# Every executed instruction is counted in Function.count (labels excluded).
+
+import ast
+import builtins
+import inspect
+import math
+import struct
+import sys
+import textwrap
+import time
+import types
+
+_CONDS = ('eq', 'ne', 'cs', 'cc', 'mi', 'pl', 'vs', 'vc',
+          'hi', 'ls', 'ge', 'lt', 'gt', 'le', 'al')
+_CONDALIAS = {'hs': 'cs', 'lo': 'cc'}
+_BRANCHES = {'b' + c: c for c in _CONDS if c != 'al'}
+_BRANCHES.update({'b' + k: v for k, v in _CONDALIAS.items()})
+
+class AsmError(Exception):
+    pass
+
+# ********* Memory *********
+# Addresses handed out by addressof() map onto the buffers of the Python objects,
+# so loads and stores in simulated code act directly on the caller's arrays.
+# Any access outside a registered buffer raises AsmError.
+
+class Memory:
+    BASE = 0x20000000
+    GAP = 0x100                 # Guard gap between buffers
+
+    def __init__(self):
+        self.regions = []       # (base, size, memoryview, owner)
+        self.next = self.BASE
+
+    def addressof(self, obj):
+        for base, size, mv, owner in self.regions:
+            if owner is obj:
+                return base
+        mv = memoryview(obj).cast('B')
+        base = self.next
+        self.regions.append((base, len(mv), mv, obj))
+        self.next = (base + len(mv) + self.GAP + 7) & ~7
+        return base
+
+    def _find(self, addr, nbytes):
+        for base, size, mv, owner in self.regions:
+            if base <= addr and addr + nbytes <= base + size:
+                return mv, addr - base
+        raise AsmError('Memory access out of bounds at 0x{:08x}'.format(addr))
+
+    def load(self, addr, nbytes):
+        if addr % nbytes:
+            raise AsmError('Unaligned access at 0x{:08x}'.format(addr))
+        mv, off = self._find(addr, nbytes)
+        return int.from_bytes(mv[off:off + nbytes], 'little')
+
+    def store(self, addr, nbytes, value):
+        if addr % nbytes:
+            raise AsmError('Unaligned access at 0x{:08x}'.format(addr))
+        mv, off = self._find(addr, nbytes)
+        mv[off:off + nbytes] = (value & ((1 << (8 * nbytes)) - 1)).to_bytes(nbytes, 'little')
+
+memory = Memory()
+
+def f2u(x):                     # Python float to single precision bit pattern
+    try:
+        return struct.unpack('<I', struct.pack('<f', x))[0]
+    except OverflowError:
+        return 0xff800000 if x < 0 else 0x7f800000
+
+def u2f(u):                     # Single precision bit pattern to Python float
+    return struct.unpack('<f', struct.pack('<I', u & 0xffffffff))[0]
+
+def _s32(x):
+    x &= 0xffffffff
+    return x - 0x100000000 if x & 0x80000000 else x
+
+# ********* Assembler *********
+# Each statement of the function body is parsed into (op, args, size, lineno).
+# Operands: ('r', n) core register, ('s', n) FPU register, ('i', value),
+# ('l', name) label or condition, ('m', reg, offset) memory, ('set', regs).
+
+def _operand(node):
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name == 'lr':
+            return ('r', 14)
+        if name == 'sp':
+            return ('r', 13)
+        if name == 'pc':
+            return ('r', 15)
+        if name[0] in 'rs' and name[1:].isdigit():
+            return (name[0], int(name[1:]))
+        return ('l', name)
+    if isinstance(node, ast.List):
+        reg = _operand(node.elts[0])
+        off = _operand(node.elts[1]) if len(node.elts) > 1 else ('i', 0)
+        return ('m', reg[1], off[1])
+    if isinstance(node, ast.Set):
+        return ('set', tuple(sorted(_operand(e)[1] for e in node.elts)))
+    return ('i', ast.literal_eval(node))
+
+def _size(op, args):
+    if op in ('label', 'align'):
+        return 0
+    if op == 'data':
+        return args[0][1] * (len(args) - 1)
+    if op[0] == 'v' or op in ('bl', 'rbit', 'clz', 'movw', 'movt', 'sdiv', 'udiv'):
+        return 4
+    if op == 'movwt':
+        return 8
+    if op in ('push', 'pop') and any(r > 7 and r not in (14, 15) for r in args[0][1]):
+        return 4
+    if op.endswith('_w'):
+        return 4
+    return 2
+
+class Function:
+    def __init__(self, func):
+        self.name = func.__name__
+        src = textwrap.dedent(inspect.getsource(func))
+        fdef = ast.parse(src).body[0]
+        self.nargs = len(fdef.args.args)
+        self.prog = []
+        self.labels = {}
+        addr = 0
+        self.addr = []
+        for stmt in fdef.body:
+            if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Call)):
+                continue        # Docstrings
+            call = stmt.value
+            op = call.func.id
+            args = [_operand(a) for a in call.args]
+            if op == 'label':
+                self.labels[args[0][1]] = len(self.prog)
+            if op == 'align':
+                addr = (addr + args[0][1] - 1) & ~(args[0][1] - 1)
+            self.addr.append(addr)
+            self.prog.append((op, args, stmt.lineno + func.__code__.co_firstlineno - 1))
+            addr += _size(op, args)
+        self.addr.append(addr)
+        self.nbytes = addr
+        self._check()
+        self.count = 0
+
+    def _err(self, line, msg):
+        raise AsmError('{}() line {}: {}'.format(self.name, line, msg))
+
+    def _check(self):           # Static checks: operand encodings and branch ranges
+        for pc, (op, args, line) in enumerate(self.prog):
+            if op in _BRANCHES or op in ('b', 'bl') or op[:-2] in _BRANCHES:
+                if args[0][1] not in self.labels:
+                    self._err(line, 'undefined label ' + args[0][1])
+                dist = self.addr[self.labels[args[0][1]]] - (self.addr[pc] + 4)
+                if op in _BRANCHES and not -256 <= dist <= 254:
+                    self._err(line, 'conditional branch not in range')
+                if op == 'b' and not -2048 <= dist <= 2046:
+                    self._err(line, 'branch not in range')
+            lows = [a[1] for a in args if a[0] == 'r']
+            if op in ('ldr', 'str', 'ldrh', 'strh', 'ldrb', 'strb'):
+                width = {'ldr': 4, 'str': 4, 'ldrh': 2, 'strh': 2}.get(op, 1)
+                rt, m = args
+                if rt[1] > 7 or m[1] > 7:
+                    self._err(line, 'low registers only')
+                if m[2] % width or not 0 <= m[2] < 32 * width:
+                    self._err(line, 'offset out of range')
+            elif op in ('vldr', 'vstr'):
+                m = args[1]
+                if m[2] % 4 or not 0 <= m[2] <= 1020:
+                    self._err(line, 'offset out of range')
+            elif op in ('add', 'sub'):
+                if len(args) == 2 and args[1][0] == 'i' and not 0 <= args[1][1] <= 255:
+                    self._err(line, 'immediate out of range')
+                if len(args) == 3 and args[2][0] == 'i' and not 0 <= args[2][1] <= 7:
+                    self._err(line, 'immediate out of range')
+                if any(r > 7 for r in lows):
+                    self._err(line, 'low registers only')
+            elif op in ('mov', 'cmp'):
+                if args[1][0] == 'i':
+                    if not 0 <= args[1][1] <= 255:
+                        self._err(line, 'immediate out of range')
+                    if args[0][1] > 7:
+                        self._err(line, 'low registers only')
+            elif op in ('and_', 'orr', 'eor', 'bic', 'mvn', 'neg', 'mul',
+                        'lsl', 'lsr', 'asr', 'tst', 'cmn'):
+                if any(r > 7 for r in lows):
+                    self._err(line, 'low registers only')
+                if len(args) == 3 and not 0 <= args[2][1] <= 31:
+                    self._err(line, 'shift out of range')
+
+    # ********* Execution *********
+    def __call__(self, *args):
+        if len(args) != self.nargs:
+            raise TypeError('{}() takes {} arguments'.format(self.name, self.nargs))
+        r = [0] * 16
+        for n, a in enumerate(args):
+            r[n] = a & 0xffffffff if isinstance(a, int) else memory.addressof(a)
+        r[14] = _RET
+        cpu = _CPU(r)
+        prog = self.prog
+        end = len(prog)
+        pc = 0
+        count = 0
+        while 0 <= pc < end:
+            op, a, line = prog[pc]
+            pc += 1
+            if op in ('label', 'align'):
+                continue
+            count += 1
+            if cpu.itq and not cpu.cond(cpu.itq.pop(0)):
+                continue
+            cpu.pc = pc
+            try:
+                target = cpu.execute(op, a)
+            except (AsmError, KeyError, IndexError) as e:
+                self._err(line, str(e))
+            if target is not None:
+                pc = self.labels[target] if isinstance(target, str) else target
+        self.count += count
+        return _s32(r[0])
+
+_RET = -1                       # Link register value on entry: return to caller
+_INVERSE = {'eq': 'ne', 'ne': 'eq', 'cs': 'cc', 'cc': 'cs', 'mi': 'pl', 'pl': 'mi',
+            'vs': 'vc', 'vc': 'vs', 'hi': 'ls', 'ls': 'hi', 'ge': 'lt',
+            'lt': 'ge', 'gt': 'le', 'le': 'gt'}
+
+# Register file, flags and stack for one call. execute() returns a branch target
+# (label name or program index) or None to continue with the next instruction.
+class _CPU:
+    def __init__(self, r):
+        self.r = r
+        self.s = [0] * 32
+        self.n = self.z = self.c = self.v = 0
+        self.fpflags = (0, 0, 0, 0)
+        self.stack = []
+        self.itq = []           # Pending IT block conditions
+        self.pc = 0             # Address of the next instruction, for bl()
+
+    def cond(self, c):
+        c = _CONDALIAS.get(c, c)
+        n, z, cf, v = self.n, self.z, self.c, self.v
+        return {'eq': z, 'ne': not z, 'cs': cf, 'cc': not cf, 'mi': n, 'pl': not n,
+                'vs': v, 'vc': not v, 'hi': cf and not z, 'ls': (not cf) or z,
+                'ge': n == v, 'lt': n != v, 'gt': (not z) and n == v,
+                'le': z or n != v, 'al': True}[c]
+
+    def nz(self, x):
+        x &= 0xffffffff
+        self.n = x >> 31
+        self.z = int(x == 0)
+        return x
+
+    def addc(self, a, b, carry=0):
+        res = a + b + carry
+        self.c = int(res > 0xffffffff)
+        self.v = int(_s32(a) + _s32(b) + carry != _s32(res))
+        return self.nz(res)
+
+    def subc(self, a, b):
+        return self.addc(a, (~b) & 0xffffffff, 1)
+
+    def val(self, arg):
+        return self.r[arg[1]] if arg[0] == 'r' else arg[1] & 0xffffffff
+
+    def f(self, arg):
+        return u2f(self.s[arg[1]])
+
+    def execute(self, op, a):
+        r, s = self.r, self.s
+        if op == 'mov':
+            r[a[0][1]] = self.nz(self.val(a[1])) if a[1][0] == 'i' else r[a[1][1]]
+        elif op in ('movw', 'movwt'):
+            r[a[0][1]] = a[1][1] & 0xffffffff
+        elif op == 'movt':
+            r[a[0][1]] = (r[a[0][1]] & 0xffff) | ((a[1][1] & 0xffff) << 16)
+        elif op in ('add', 'sub', 'lsl', 'lsr', 'asr'):
+            x, y = (a[0], a[1]) if len(a) == 2 else (a[1], a[2])
+            x, y = self.val(x), self.val(y)
+            if op == 'add':
+                res = self.addc(x, y)
+            elif op == 'sub':
+                res = self.subc(x, y)
+            else:
+                sh = y & 0xff
+                if op == 'lsl':
+                    if sh:
+                        self.c = (x >> (32 - sh)) & 1 if sh <= 32 else 0
+                    res = x << sh if sh < 32 else 0
+                elif op == 'lsr':
+                    if sh:
+                        self.c = (x >> (sh - 1)) & 1 if sh <= 32 else 0
+                    res = x >> sh if sh < 32 else 0
+                else:
+                    if sh:
+                        self.c = (_s32(x) >> min(sh - 1, 31)) & 1
+                    res = _s32(x) >> min(sh, 31)
+                res = self.nz(res)
+            r[a[0][1]] = res
+        elif op == 'cmp':
+            self.subc(self.val(a[0]), self.val(a[1]))
+        elif op == 'cmn':
+            self.addc(self.val(a[0]), self.val(a[1]))
+        elif op == 'tst':
+            self.nz(self.val(a[0]) & self.val(a[1]))
+        elif op in ('and_', 'orr', 'eor', 'bic'):
+            x, y = r[a[0][1]], self.val(a[1])
+            res = {'and_': x & y, 'orr': x | y, 'eor': x ^ y, 'bic': x & ~y}[op]
+            r[a[0][1]] = self.nz(res)
+        elif op == 'mvn':
+            r[a[0][1]] = self.nz(~self.val(a[1]))
+        elif op == 'neg':
+            r[a[0][1]] = self.subc(0, self.val(a[1]))
+        elif op == 'mul':
+            r[a[0][1]] = self.nz(r[a[0][1]] * r[a[1][1]])
+        elif op in ('sdiv', 'udiv'):
+            x, y = self.val(a[1]), self.val(a[2])
+            if op == 'sdiv':
+                x, y = _s32(x), _s32(y)
+                q = 0 if y == 0 else int(x / y)
+            else:
+                q = 0 if y == 0 else x // y
+            r[a[0][1]] = q & 0xffffffff
+        elif op == 'rbit':
+            r[a[0][1]] = int('{:032b}'.format(self.val(a[1]))[::-1], 2)
+        elif op == 'clz':
+            r[a[0][1]] = 32 - self.val(a[1]).bit_length()
+        elif op in ('ldr', 'ldrh', 'ldrb'):
+            w = {'ldr': 4, 'ldrh': 2, 'ldrb': 1}[op]
+            r[a[0][1]] = memory.load((r[a[1][1]] + a[1][2]) & 0xffffffff, w)
+        elif op in ('str', 'strh', 'strb'):
+            w = {'str': 4, 'strh': 2, 'strb': 1}[op]
+            memory.store((r[a[1][1]] + a[1][2]) & 0xffffffff, w, r[a[0][1]])
+        elif op == 'push':
+            for reg in a[0][1]:
+                self.stack.append(r[reg])
+        elif op == 'pop':
+            for reg in reversed(a[0][1]):
+                r[reg] = self.stack.pop()
+            if 15 in a[0][1]:
+                return r[15]
+        elif op == 'b':
+            return a[0][1]
+        elif op in _BRANCHES or op[:-2] in _BRANCHES:
+            if self.cond(_BRANCHES[op if op in _BRANCHES else op[:-2]]):
+                return a[0][1]
+        elif op == 'bl':
+            r[14] = self.pc
+            return a[0][1]
+        elif op == 'bx':
+            return r[a[0][1]]
+        elif op.startswith('it'):
+            first = _CONDALIAS.get(a[0][1], a[0][1])
+            self.itq = [first] + [first if ch == 't' else _INVERSE[first] for ch in op[2:]]
+        elif op == 'nop':
+            pass
+        elif op == 'vldr':
+            s[a[0][1]] = memory.load((r[a[1][1]] + a[1][2]) & 0xffffffff, 4)
+        elif op == 'vstr':
+            memory.store((r[a[1][1]] + a[1][2]) & 0xffffffff, 4, s[a[0][1]])
+        elif op == 'vmov':
+            if a[0][0] == 's' and a[1][0] == 'r':
+                s[a[0][1]] = r[a[1][1]]
+            elif a[0][0] == 'r' and a[1][0] == 's':
+                r[a[0][1]] = s[a[1][1]]
+            else:
+                raise AsmError('unsupported vmov operands')
+        elif op in ('vadd', 'vsub', 'vmul', 'vdiv'):
+            x, y = self.f(a[1]), self.f(a[2])
+            if op == 'vadd':
+                res = x + y
+            elif op == 'vsub':
+                res = x - y
+            elif op == 'vmul':
+                res = x * y
+            elif y:
+                res = x / y
+            else:
+                res = math.nan if x == 0 or x != x else math.copysign(math.inf, x) * math.copysign(1, y)
+            s[a[0][1]] = f2u(res)
+        elif op == 'vneg':
+            s[a[0][1]] = s[a[1][1]] ^ 0x80000000
+        elif op == 'vsqrt':
+            x = self.f(a[1])
+            s[a[0][1]] = f2u(math.sqrt(x)) if x >= 0 else 0x7fc00000
+        elif op == 'vcvt_f32_s32':
+            s[a[0][1]] = f2u(float(_s32(s[a[1][1]])))
+        elif op == 'vcvt_s32_f32':
+            x = self.f(a[1])
+            v = max(-0x80000000, min(0x7fffffff, int(x))) if x == x else 0
+            s[a[0][1]] = v & 0xffffffff
+        elif op == 'vcmp':
+            x, y = self.f(a[0]), self.f(a[1])
+            unordered = x != x or y != y
+            self.fpflags = (int(x < y), int(x == y), int(not x < y), int(unordered))
+        elif op == 'vmrs':
+            self.n, self.z, self.c, self.v = self.fpflags
+        else:
+            raise AsmError('unsupported instruction ' + op)
+        return None
+
+# ********* Host environment *********
+# install() provides the names MicroPython's compiler supplies to these modules:
+# the micropython decorators, const(), and the uctypes/utime modules.
+
+def _const(x):
+    return x
+
+def _identity(f):
+    return f
+
+# Viper pointers: loads from ptr8 and ptr16 are zero extended, ptr32 loads are
+# signed machine words. Stores truncate to the element size.
+class _Ptr:
+    def __init__(self, obj, width):
+        self.mv = memoryview(obj).cast('B')
+        self.width = width
+
+    def __getitem__(self, i):
+        w = self.width
+        return int.from_bytes(self.mv[i*w:(i + 1)*w], 'little', signed=(w == 4))
+
+    def __setitem__(self, i, v):
+        w = self.width
+        self.mv[i*w:(i + 1)*w] = (int(v) & ((1 << (8*w)) - 1)).to_bytes(w, 'little')
+
+def install():
+    mp = types.ModuleType('micropython')
+    mp.asm_thumb = Function
+    mp.native = _identity
+    mp.viper = _identity
+    mp.const = _const
+    sys.modules['micropython'] = mp
+    builtins.micropython = mp
+    builtins.const = _const
+    builtins.ptr8 = lambda obj: _Ptr(obj, 1)
+    builtins.ptr16 = lambda obj: _Ptr(obj, 2)
+    builtins.ptr32 = lambda obj: _Ptr(obj, 4)
+    uctypes = types.ModuleType('uctypes')
+    uctypes.addressof = memory.addressof
+    sys.modules['uctypes'] = uctypes
+    utime = types.ModuleType('utime')
+    utime.ticks_us = lambda: time.perf_counter_ns() // 1000
+    utime.ticks_ms = lambda: time.perf_counter_ns() // 1000000
+    utime.ticks_diff = lambda a, b: a - b
+    sys.modules['utime'] = utime